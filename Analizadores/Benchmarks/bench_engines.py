@@ -0,0 +1,65 @@
+'''
+
+Compara el tiempo de ejecución de los motores disponibles en Context
+sobre los programas de esta carpeta.
+
+uso: python Benchmarks/bench_engines.py [programa.mcc ...]
+
+'''
+
+import io
+import os
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from tabulate import tabulate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROGRAMS = ['loops.mcc', 'nested.mcc', 'calls.mcc', 'scopes.mcc', 'constants.mcc', 'recursion.mcc',
+            'strings.mcc', 'mathlib.mcc', 'kernels.mcc', 'dynamic.mcc', 'objects.mcc']
+REPEAT = 3
+
+
+def run(source, mode):
+    '''
+    Ejecuta el programa REPEAT veces y devuelve el mejor tiempo y la salida
+    '''
+    best = None
+    for _ in range(REPEAT):
+        ctxt = Context()
+        ctxt.parse(source)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            start = time.perf_counter()
+            ctxt.run(mode)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, out.getvalue()
+
+
+def main(argv):
+    programs = argv[1:] or [os.path.join(HERE, p) for p in PROGRAMS]
+    modes = list(Context().engines)
+    table = [["Program"] + [f"{m} (s)" for m in modes] + [f"{m} speedup" for m in modes[1:]]]
+    for path in programs:
+        with open(path) as file:
+            source = file.read()
+        times = {}
+        outputs = {}
+        for mode in modes:
+            times[mode], outputs[mode] = run(source, mode)
+        for mode in modes[1:]:
+            if outputs[mode] != outputs['tree']:
+                print(f"{os.path.basename(path)}: la salida de '{mode}' difiere de 'tree'")
+        table.append([os.path.basename(path)]
+                     + [f"{times[m]:.3f}" for m in modes]
+                     + [f"{times['tree'] / times[m]:.1f}x" for m in modes[1:]])
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
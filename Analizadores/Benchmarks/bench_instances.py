@@ -0,0 +1,136 @@
+'''
+
+Mide la memoria por instancia y el acceso a atributos de los objetos.
+
+Crea N objetos (por defecto 1000000) de una clase con cuatro atributos
+declarados y compara:
+
+- memoria por instancia con tracemalloc: Instance (lista de tamaño fijo
+  según la forma de la clase) contra DictInstance, la forma anterior con
+  un diccionario por objeto;
+- lectura y escritura de un atributo en Python: por posición, como hace
+  el Interpreter cuando la caché del acceso acierta, contra el diccionario;
+- el programa Mini C++ equivalente con el intérprete de árbol: crea los N
+  objetos y en cada uno lee 4 atributos y escribe 2.
+
+uso: python Benchmarks/bench_instances.py [objetos]
+
+'''
+
+import gc
+import io
+import os
+import sys
+import time
+import contextlib
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from CppInterpreter import Class, Instance
+from tabulate import tabulate
+
+FIELDS = {'valor': 0, 'peso': 1, 'escala': 1.0, 'visitas': 0}
+
+
+class DictInstance:
+    '''
+    Instancia con los atributos en un diccionario propio
+    '''
+    __slots__ = ('klass', 'data')
+
+    def __init__(self, klass):
+        self.klass = klass
+        self.data = dict(FIELDS)
+
+
+def per_instance(factory, count, klass):
+    '''
+    Bytes por instancia que quedan ocupados al crear 'count' objetos
+    '''
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objects = [factory(klass) for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    # La lista que guarda los objetos no es parte de ellos
+    size -= sys.getsizeof(objects)
+    del objects
+    return size / count
+
+
+def access_time(count, klass):
+    '''
+    Nanosegundos por lectura más escritura de un atributo
+    '''
+    obj = Instance(klass)
+    index = klass.shape['visitas']
+    slots = obj.slots
+    start = time.perf_counter()
+    for _ in range(count):
+        slots[index] = slots[index] + 1
+    by_index = time.perf_counter() - start
+
+    old = DictInstance(klass)
+    data = old.data
+    start = time.perf_counter()
+    for _ in range(count):
+        data['visitas'] = data['visitas'] + 1
+    by_name = time.perf_counter() - start
+    return by_index / count * 1e9, by_name / count * 1e9
+
+
+def generate(count):
+    return (
+        "class Nodo {\n"
+        "    int valor = 0;\n"
+        "    int peso = 1;\n"
+        "    float escala = 1.0;\n"
+        "    int visitas = 0;\n"
+        "}\n"
+        "int i = 0;\n"
+        "int total = 0;\n"
+        f"while (i < {count}) {{\n"
+        "    Nodo n = Nodo();\n"
+        "    n.valor = i;\n"
+        "    n.visitas = n.visitas + 1;\n"
+        "    total = total + n.valor * n.peso + n.visitas;\n"
+        "    i = i + 1;\n"
+        "}\n"
+        "printf(total);\n")
+
+
+def run_program(count):
+    ctxt = Context(cache=False)
+    ctxt.parse(generate(count))
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        ctxt.run('tree')
+        elapsed = time.perf_counter() - start
+    return elapsed
+
+
+def main(argv):
+    count = int(argv[1]) if len(argv) > 1 else 1000000
+    klass = Class('Nodo', {}, FIELDS)
+
+    slots_size = per_instance(Instance, count, klass)
+    dict_size = per_instance(DictInstance, count, klass)
+    index_ns, name_ns = access_time(count, klass)
+
+    print(f"{count} objetos con {len(FIELDS)} atributos")
+    table = [["Forma", "Bytes / instancia", "ns / lectura + escritura"],
+             ["Instance (slots)", f"{slots_size:.0f}", f"{index_ns:.1f}"],
+             ["Diccionario", f"{dict_size:.0f}", f"{name_ns:.1f}"]]
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+    elapsed = run_program(count)
+    print(f"Intérprete de árbol: {elapsed:.2f} s, "
+          f"{count / elapsed:,.0f} objetos/s, {6 * count / elapsed:,.0f} accesos a atributos/s")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,63 @@
+'''
+
+Compara el intérprete de árbol con y sin memorización de funciones puras.
+
+Ejecuta fib(n) recursivo (sin memorizar hace un número exponencial de
+llamadas) para varios n y reporta el tiempo de cada modo y los aciertos y
+fallos de la caché de fib.
+
+uso: python Benchmarks/bench_memo.py [n ...]
+
+'''
+
+import io
+import os
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from tabulate import tabulate
+
+SOURCE = '''
+int fib(int n) {
+    if (n < 2) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+printf(fib(%d));
+'''
+
+
+def run(n, memoize):
+    '''
+    Ejecuta fib(n) y devuelve el tiempo, la salida y el intérprete
+    '''
+    ctxt = Context(cache=False, memoize=memoize)
+    ctxt.parse(SOURCE % n)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        ctxt.run()
+        elapsed = time.perf_counter() - start
+    return elapsed, out.getvalue(), ctxt.interp
+
+
+def main(argv):
+    sizes = [int(n) for n in argv[1:]] or [10, 15, 20, 25]
+    table = [["n", "sin memorizar (s)", "memorizando (s)", "aciertos", "fallos"]]
+    for n in sizes:
+        plain, expected, _ = run(n, False)
+        memo, output, interp = run(n, True)
+        if output != expected:
+            print(f"fib({n}): la salida memorizando difiere")
+        fib = interp.memoized[0]
+        table.append([n, f"{plain:.3f}", f"{memo:.4f}", fib.hits, fib.misses])
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
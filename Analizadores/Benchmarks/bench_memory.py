@@ -0,0 +1,76 @@
+'''
+
+Mide la memoria del AST de un programa grande generado.
+
+Genera un programa de N líneas (por defecto 100000), lo analiza con
+tracemalloc activo y reporta:
+
+- el pico de memoria durante el análisis;
+- la memoria que queda ocupada por el AST (con sus posiciones).
+
+uso: python Benchmarks/bench_memory.py [líneas]
+
+'''
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from CppOptimizer import count_nodes
+from tabulate import tabulate
+
+
+def generate(lines):
+    '''
+    Programa con funciones de 7 líneas hasta llegar a 'lines' líneas
+    '''
+    funcs = []
+    for i in range(max(1, lines // 7)):
+        funcs.append(
+            f"int f{i}(int n) {{\n"
+            f"  int s = 0;\n"
+            f"  for (int i = 0; i < n; i++) {{\n"
+            f"    if (i % 3 == 0) s += i * 2; else s -= 1;\n"
+            f"  }}\n"
+            f"  return s + {i};\n"
+            f"}}")
+    return '\n'.join(funcs) + '\nprintf(f0(10));\n'
+
+
+def mb(size):
+    return f"{size / 2**20:.1f}"
+
+
+def main(argv):
+    lines = int(argv[1]) if len(argv) > 1 else 100000
+    source = generate(lines)
+    ctxt = Context(cache=False)
+
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    ctxt.parse(source)
+    parse_time = time.perf_counter() - start
+    gc.collect()
+    tree_size, peak = tracemalloc.get_traced_memory()
+    tree_size -= base
+    peak -= base
+
+    tracemalloc.stop()
+    nodes = count_nodes(ctxt.ast)
+
+    print(f"{source.count(chr(10))} líneas, {len(source) / 2**20:.1f} MB de fuente, {nodes} nodos")
+    table = [["Medida", "MB", "s (con tracemalloc)"],
+             ["Pico durante parse", mb(peak), f"{parse_time:.2f}"],
+             ["AST (con posiciones)", mb(tree_size), ""]]
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,120 @@
+'''
+
+Cuenta los objetos que crea cada llamada a un método en el intérprete.
+
+Ejecuta un programa con clases (por defecto objects.mcc) contando las
+llamadas a métodos y los marcos (Frame), funciones (Function) y métodos
+enlazados (Method) que se crean durante la ejecución, de dos formas:
+
+- llamada directa: p.m(...) busca el método en la caché en línea del
+  acceso y pasa la instancia en el slot 0 del marco del método;
+- camino genérico: p.m(...) evalúa primero p.m, que crea un Method, y
+  después lo llama, como cuando un método se usa como valor.
+
+uso: python Benchmarks/bench_methods.py [programa.mcc]
+
+'''
+
+import io
+import os
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import CppInterpreter
+from CppContext import Context
+from CppInterpreter import Interpreter
+from CppResolver import Frame
+from tabulate import tabulate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Clases cuyas instancias se cuentan
+COUNTED = [Frame, CppInterpreter.Function, CppInterpreter.Method]
+
+
+class GenericMethods(Interpreter):
+    '''
+    Interpreter que llama a los métodos por el camino genérico
+    '''
+
+    def call_method(self, node):
+        return self.call(node, node.func.accept(self))
+
+
+def count_objects(counts):
+    '''
+    Envuelve el __init__ de las clases contadas y el método que busca los
+    miembros (una vez por llamada, en los dos caminos; con los atributos
+    no devuelve método)
+    '''
+    originals = [(cls, cls.__init__) for cls in COUNTED]
+    originals.append((Interpreter, Interpreter.member))
+
+    def counting(cls, init):
+        def __init__(self, *args):
+            counts[cls.__name__] += 1
+            init(self, *args)
+        return __init__
+
+    def member(self, node, obj):
+        found = originals[-1][1](self, node, obj)
+        if found[2] is not None:
+            counts['calls'] += 1
+        return found
+
+    for cls, init in originals[:-1]:
+        cls.__init__ = counting(cls, init)
+    Interpreter.member = member
+    return originals
+
+
+def restore(originals):
+    for cls, init in originals[:-1]:
+        cls.__init__ = init
+    Interpreter.member = originals[-1][1]
+
+
+def run(source, engine_class):
+    '''
+    Ejecuta el programa y devuelve los objetos creados, el tiempo y la salida
+    '''
+    ctxt = Context(cache=False)
+    ctxt.parse(source)
+    engine = engine_class(ctxt)
+    counts = dict.fromkeys(['calls'] + [cls.__name__ for cls in COUNTED], 0)
+    originals = count_objects(counts)
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            start = time.perf_counter()
+            ctxt.execute(engine.interpret, ctxt.ast)
+            elapsed = time.perf_counter() - start
+    finally:
+        restore(originals)
+    return counts, elapsed, out.getvalue()
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else os.path.join(HERE, 'objects.mcc')
+    with open(path) as file:
+        source = file.read()
+
+    table = [["Camino", "Llamadas"] + [f"{cls.__name__} / llamada" for cls in COUNTED] + ["µs / llamada"]]
+    outputs = {}
+    for name, engine_class in (("Llamada directa", Interpreter), ("Camino genérico", GenericMethods)):
+        counts, elapsed, outputs[name] = run(source, engine_class)
+        calls = counts['calls'] or 1
+        table.append([name, counts['calls']]
+                     + [f"{counts[cls.__name__] / calls:.2f}" for cls in COUNTED]
+                     + [f"{elapsed / calls * 1e6:.1f}"])
+    if len(set(outputs.values())) != 1:
+        print("La salida de los dos caminos difiere")
+    print(f"{os.path.basename(path)}")
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
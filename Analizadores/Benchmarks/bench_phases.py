@@ -0,0 +1,213 @@
+'''
+
+Mide por separado cada fase del compilador sobre el conjunto de programas
+de esta carpeta y un programa grande generado.
+
+Por cada programa repite varias veces, con un Context nuevo y sin caché:
+
+- lex: CppLexer.tokenize hasta agotar los tokens;
+- parse: CppParser.parse sobre esos tokens (con las posiciones del AST);
+- check: Checker.check;
+- run: Context.run con el motor elegido (incluye la revisión, la
+  optimización y la resolución que el motor hace antes de ejecutar).
+
+Reporta la mediana, la desviación estándar y el mínimo de cada fase. Con
+--json guarda los resultados; con --baseline los compara con un archivo
+guardado antes y termina con error si alguna mediana empeoró más que
+--threshold.
+
+uso: python Benchmarks/bench_phases.py [-n REPETICIONES] [--lines LÍNEAS] [--engine MOTOR]
+                                       [--json SALIDA.json] [--baseline BASE.json]
+                                       [--threshold FRACCIÓN] [programa.mcc ...]
+
+'''
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from CppChecker import Checker
+from tabulate import tabulate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROGRAMS = ['loops.mcc', 'nested.mcc', 'calls.mcc', 'recursion.mcc', 'scopes.mcc', 'constants.mcc',
+            'strings.mcc', 'mathlib.mcc', 'kernels.mcc', 'dynamic.mcc', 'objects.mcc']
+PHASES = ['lex', 'parse', 'check', 'run']
+REPEAT = 5
+LINES = 20000
+THRESHOLD = 0.10
+
+
+def generate(lines):
+    '''
+    Programa de unas 'lines' líneas con funciones, ciclos, condicionales y
+    clases que se llaman entre sí
+    '''
+    parts = []
+    count = max(1, lines // 19)
+    for i in range(count):
+        parts.append(
+            f"class Caja{i} {{\n"
+            f"    int valor = {i};\n"
+            f"    int doble() {{\n"
+            f"        return this.valor * 2;\n"
+            f"    }}\n"
+            f"}}\n"
+            f"int f{i}(int n) {{\n"
+            f"    int s = 0;\n"
+            f"    Caja{i} c = Caja{i}();\n"
+            f"    for (int i = 0; i < n; i++) {{\n"
+            f"        if (i % 3 == 0 && s > -100) {{\n"
+            f"            s += i * 2 + c.doble();\n"
+            f"        }} else {{\n"
+            f"            s -= 1;\n"
+            f"        }}\n"
+            f"    }}\n"
+            f"    while (s > 1000) {{ s = s / 2; }}\n"
+            f"    return s + {'f%d(n - 1)' % (i - 1) if i else 0};\n"
+            f"}}\n")
+    parts.append(f"printf(f{count - 1}(3));\n")
+    return ''.join(parts)
+
+
+def measure(source, engine):
+    '''
+    Segundos de cada fase en una pasada sobre el programa
+    '''
+    ctxt = Context(cache=False)
+    times = {}
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        tokens = list(ctxt.lexer.tokenize(source))
+        times['lex'] = time.perf_counter() - start
+
+        ctxt.source = source
+        ctxt.parser.syntax_errors = 0
+        start = time.perf_counter()
+        ctxt.ast = ctxt.parser.parse(iter(tokens))
+        ctxt.attach_positions()
+        times['parse'] = time.perf_counter() - start
+        if ctxt.ast is None or ctxt.have_errors or ctxt.parser.syntax_errors:
+            raise ValueError('el programa tiene errores de sintaxis')
+
+        start = time.perf_counter()
+        Checker.check(ctxt.ast, ctxt)
+        times['check'] = time.perf_counter() - start
+        if ctxt.have_errors:
+            raise ValueError('el programa tiene errores semánticos')
+
+        start = time.perf_counter()
+        ctxt.run(engine)
+        times['run'] = time.perf_counter() - start
+    return times
+
+
+def summarize(runs):
+    return {
+        'median': statistics.median(runs),
+        'stdev': statistics.stdev(runs) if len(runs) > 1 else 0.0,
+        'min': min(runs),
+        'runs': runs,
+    }
+
+
+def benchmark(programs, repeat, engine):
+    '''
+    {programa: {fase: resumen}} con 'repeat' pasadas por programa
+    '''
+    results = {}
+    for name, source in programs:
+        runs = {phase: [] for phase in PHASES}
+        for _ in range(repeat):
+            for phase, elapsed in measure(source, engine).items():
+                runs[phase].append(elapsed)
+        results[name] = {phase: summarize(runs[phase]) for phase in PHASES}
+        print(f"{name}: " + ", ".join(f"{phase} {results[name][phase]['median']:.3f}s" for phase in PHASES),
+              file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    '''
+    Tabla con el cambio de cada mediana respecto a la base y la cantidad
+    de fases que empeoraron más que 'threshold'
+    '''
+    table = [["Programa", "Fase", "Base (s)", "Actual (s)", "Cambio", ""]]
+    regressions = 0
+    for name, phases in results.items():
+        for phase, summary in phases.items():
+            base = baseline.get(name, {}).get(phase)
+            if not base or not base['median']:
+                continue
+            change = summary['median'] / base['median'] - 1
+            # Un cambio menor que la variación medida no se toma en cuenta
+            noise = max(summary['stdev'], base['stdev']) / base['median']
+            slower = change > max(threshold, noise)
+            regressions += slower
+            table.append([name, phase, f"{base['median']:.4f}", f"{summary['median']:.4f}",
+                          f"{change:+.1%}", "más lento" if slower else ""])
+    return tabulate(table, headers="firstrow", tablefmt="fancy_grid"), regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Tiempo de cada fase del compilador Mini C++')
+    parser.add_argument('programs', nargs='*', help='programas .mcc (por defecto los de Benchmarks/)')
+    parser.add_argument('-n', '--repeat', type=int, default=REPEAT)
+    parser.add_argument('--lines', type=int, default=LINES, help='líneas del programa generado (0: ninguno)')
+    parser.add_argument('--engine', default='tree', help='motor de Context.run')
+    parser.add_argument('--json', help='archivo donde guardar los resultados')
+    parser.add_argument('--baseline', help='resultados guardados con los que comparar')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args(argv[1:])
+
+    paths = args.programs or [os.path.join(HERE, name) for name in PROGRAMS]
+    programs = []
+    for path in paths:
+        with open(path) as file:
+            programs.append((os.path.basename(path), file.read()))
+    if args.lines and not args.programs:
+        programs.append((f"generado-{args.lines}", generate(args.lines)))
+
+    results = benchmark(programs, args.repeat, args.engine)
+
+    table = [["Programa"] + [f"{phase} mediana (s)" for phase in PHASES] + ["Desv. est. (s)", "Total (s)"]]
+    for name, phases in results.items():
+        table.append([name] + [f"{phases[phase]['median']:.4f}" for phase in PHASES]
+                     + [" / ".join(f"{phases[phase]['stdev']:.4f}" for phase in PHASES),
+                        f"{sum(phases[phase]['median'] for phase in PHASES):.3f}"])
+    print(f"{args.repeat} repeticiones, motor '{args.engine}'")
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({
+                'engine': args.engine,
+                'repeat': args.repeat,
+                'python': platform.python_version(),
+                'programs': results,
+            }, file, indent=2)
+        print(f"Resultados guardados en '{args.json}'")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['programs']
+        table, regressions = compare(results, baseline, args.threshold)
+        print(table)
+        if regressions:
+            print(f"{regressions} fases más lentas que la base")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,70 @@
+'''
+
+Mide el costo del perfilador por muestreo (CppSampler.py).
+
+Ejecuta cada programa con el intérprete de árbol sin muestrear y
+muestreando, toma el mejor de varios intentos de cada modo y reporta la
+diferencia de tiempo, las muestras tomadas y el tiempo que el hilo de
+muestreo pasó recorriendo pilas.
+
+uso: python Benchmarks/bench_sampler.py [intentos] [programa.mcc ...]
+
+'''
+
+import io
+import os
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from CppSampler import Sampler
+from tabulate import tabulate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROGRAMS = ['calls.mcc', 'loops.mcc', 'objects.mcc', 'kernels.mcc', 'recursion.mcc']
+
+
+def run(source, sampler):
+    '''
+    Ejecuta el programa y devuelve el tiempo y la salida
+    '''
+    ctxt = Context(cache=False)
+    ctxt.parse(source)
+    function = ctxt.interp.interpret
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        if sampler is None:
+            ctxt.execute(function, ctxt.ast)
+        else:
+            ctxt.execute(sampler.run, function, ctxt.ast)
+        elapsed = time.perf_counter() - start
+    return elapsed, out.getvalue()
+
+
+def main(argv):
+    reps = int(argv[1]) if len(argv) > 1 else 3
+    paths = argv[2:] or [os.path.join(HERE, name) for name in PROGRAMS]
+    table = [["Programa", "Sin muestrear (s)", "Muestreando (s)", "Diferencia", "Muestras", "Costo del hilo"]]
+    for path in paths:
+        with open(path) as file:
+            source = file.read()
+        plain = sampled = float('inf')
+        for _ in range(reps):
+            elapsed, expected = run(source, None)
+            plain = min(plain, elapsed)
+            sampler = Sampler()
+            elapsed, output = run(source, sampler)
+            sampled = min(sampled, elapsed)
+            if output != expected:
+                print(f"{os.path.basename(path)}: la salida muestreando difiere")
+        table.append([os.path.basename(path), f"{plain:.3f}", f"{sampled:.3f}",
+                      f"{sampled / plain - 1:+.1%}", sampler.samples, f"{sampler.thread_share:.2%}"])
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,99 @@
+'''
+
+Mide el costo por visita del despacho de Visitor.
+
+Recorre todos los nodos del AST de un programa con un visitante trivial
+(un manejador vacío por cada tipo de nodo) construido de dos formas:
+
+- multimethod.multimeta, el despacho usado antes por los visitantes;
+- CppAST.VisitorMeta, la tabla tipo -> manejador precalculada.
+
+uso: python Benchmarks/bench_visit.py [programa.mcc]
+
+'''
+
+import os
+import sys
+import time
+import dataclasses
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import CppAST
+from CppAST import ASTNode, VisitorMeta
+from CppContext import Context
+from tabulate import tabulate
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPEAT = 5
+
+
+def node_types():
+    pending, types = [ASTNode], []
+    while pending:
+        cls = pending.pop()
+        types.append(cls)
+        pending.extend(cls.__subclasses__())
+    return types
+
+
+def make_visitor(metaclass):
+    '''
+    Clase visitante con un 'visit' vacío por tipo de nodo
+    '''
+    lines = ['class Trivial(metaclass=metaclass):']
+    for cls in node_types():
+        lines.append(f'    def visit(self, node: {cls.__name__}):')
+        lines.append(f'        return None')
+    namespace = dict(vars(CppAST), metaclass=metaclass)
+    exec('\n'.join(lines), namespace)
+    return namespace['Trivial']()
+
+
+def walk(node, nodes):
+    if isinstance(node, ASTNode):
+        nodes.append(node)
+        for f in dataclasses.fields(node):
+            walk(getattr(node, f.name), nodes)
+    elif isinstance(node, list):
+        for item in node:
+            walk(item, nodes)
+    return nodes
+
+
+def per_visit(visitor, nodes):
+    '''
+    Mejor tiempo por visita en microsegundos
+    '''
+    visit = visitor.visit
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(20):
+            for node in nodes:
+                visit(node)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / (20 * len(nodes)) * 1e6
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else os.path.join(HERE, 'loops.mcc')
+    with open(path) as file:
+        ctxt = Context()
+        ctxt.parse(file.read())
+    nodes = walk(ctxt.ast, [])
+
+    table = [["Despacho", "us/visita"]]
+    try:
+        from multimethod import multimeta
+        table.append(["multimethod", f"{per_visit(make_visitor(multimeta), nodes):.3f}"])
+    except ImportError:
+        table.append(["multimethod", "no instalado"])
+    table.append(["VisitorMeta", f"{per_visit(make_visitor(VisitorMeta), nodes):.3f}"])
+    print(f"{os.path.basename(path)}: {len(nodes)} nodos")
+    print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
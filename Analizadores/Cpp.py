@@ -6,10 +6,18 @@ del compilador mini cpp
 '''
 
 from CppContext import Context
+from CppParser import CppParser
+from CppChecker import Checker
+from CppProfile import ProfilingInterpreter
+from CppSampler import Sampler
+from CppCounters import CountingInterpreter
 from rich import print
+from rich.markup import escape
 from render import DotRender
 from tabulate import tabulate
 
+import json
+
 
 def menu():
     print("\t\t\t\n ********* BIENVENIDO AL COMPILADOR MINI C++ ********* \n")
@@ -24,23 +32,55 @@ def menu():
     print("-h, --help             show this help message and exit")
     print("-l, --lex              display tokens from lexer")
     print("-a, --AST              Display AST")
+    print("-O, --optimize         Display the optimized AST and what each optimization changed")
     print("-D, --dot              Generate AST graph as DOT format")
+    print("-p, --parser           Write the grammar and LALR states to MiniCCParser.txt")
     print("-s, --sym              Dump the symbol table") #the Checker one
     print("-R, --exec             Execute the generated program")
+    print("-Q, --quicken          Execute the program on the adaptive interpreter (quickening)")
+    print("-M, --memoize          Execute the program caching the results of pure functions")
+    print("-C, --closure          Execute the program compiled to closures")
+    print("-B, --bytecode         Execute the program on the bytecode VM")
+    print("-P, --python           Execute the program transpiled to Python (cached)")
+    print("--profile [OUT.json]   Execute the program measuring calls and time per function")
+    print("--sample [OUT.folded]  Execute the program sampling the running line and call stack")
+    print("--counts [OUT.txt]     Execute the program counting executions per line and branch")
+    print("--stats [OUT.json]     Execute the program reporting time, memory and size of each phase")
+    print("--trace [OUT.json]     Execute the program writing a Chrome trace of phases and calls")
 
 def main(argv):
+    # Las tablas del parser vienen de la caché; el archivo de depuración
+    # sólo se escribe cuando se pide
+    if len(argv) >= 2 and argv[1] in ["-p", "--parser"]:
+        CppParser.write_debugfile()
+        raise SystemExit()
+
     if len(argv) == 2:
         menu()
         raise SystemExit()
 
     print("\t\t\t\n ********* BIENVENIDO AL COMPILADOR MINI C++ ********* \n")
-    ctxt = Context()
+    # Con --stats y --trace el Context mide las fases desde el análisis léxico
+    flag = argv[1] if len(argv) > 1 else None
+    trace = None
+    if flag == "--trace":
+        trace = argv[3] if len(argv) > 3 else 'trace.json'
+    # --profile y --counts describen el programa tal como se escribió: sin
+    # optimizar, las funciones expandidas y el código eliminado también cuentan
+    ctxt = Context(optimize=flag not in ("--profile", "--counts"), stats=flag == "--stats", trace=trace)
 
     if len(argv) > 2:
         source = ""
 
         with open(argv[2]) as file:
             source = file.read()
+
+        # El código transpilado se toma de la caché antes de analizar el fuente
+        if argv[1] in ["-P", "--python"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.run_python(source)
+            return
+
         ctxt.parse(source)
 
         if ctxt.have_errors:
@@ -60,6 +100,14 @@ def main(argv):
         elif argv[1] in ["-a", "--AST"]:
             print("\n\n\t\t************ AST ************\n\n")
             print(ctxt.ast)
+        elif argv[1] in ["-O", "--optimize"]:
+            print("\n\n\t\t************ OPTIMIZED AST ************\n\n")
+            Checker.check(ctxt.ast, ctxt)
+            if not ctxt.have_errors:
+                print(ctxt.optimize(ctxt.ast))
+                print(f"\n[green]Llamadas expandidas: {ctxt.optimizer.inlined}[/green]")
+                print(f"[green]Nodos eliminados: {ctxt.optimizer.removed}[/green]")
+                print(f"[green]Expresiones sacadas de ciclos: {ctxt.optimizer.hoisted}[/green]")
         elif argv[1] in ["-D", "--dot"]:
             print("\n\n\t\t************ AST - DOT LANGUAGE ************\n\n")
             dot = DotRender.render(ctxt.ast)
@@ -75,11 +123,99 @@ def main(argv):
         elif argv[1] in ["-R", "--exec"]:
             print("\n\n\t\t************ OUTPUT ************\n\n")
             ctxt.run()
+        elif argv[1] in ["-Q", "--quicken"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.run('adaptive')
+            engine = ctxt.engines['adaptive']
+            print(f"\n[green]Sitios especializados: {engine.specialized}[/green]")
+            print(f"[green]Sitios que volvieron al camino genérico: {engine.deoptimized}[/green]")
+        elif argv[1] in ["-M", "--memoize"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.memoize = True
+            ctxt.run()
+            table = [["Función pura", "Aciertos", "Fallos"]]
+            for func in ctxt.interp.memoized:
+                table.append([func.node.name, func.hits, func.misses])
+            print()
+            print(tabulate(table, headers="firstrow", tablefmt="fancy_grid"))
+        elif argv[1] in ["--profile"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            if not ctxt.have_errors:
+                # interpret ya pasa el Checker: si hay errores no ejecuta nada
+                profiler = ProfilingInterpreter(ctxt)
+                ctxt.execute(profiler.interpret, ctxt.ast)
+            if not ctxt.have_errors:
+                print("\n\n\t\t************ PROFILE ************\n\n")
+                print(profiler.profile.table())
+                if len(argv) > 3:
+                    with open(argv[3], 'w') as file:
+                        file.write(profiler.profile.to_json())
+                    print(f"\n[green]Perfil guardado en '{argv[3]}'[/green]")
+        elif argv[1] in ["--sample"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            sampler = Sampler()
+            if not ctxt.have_errors:
+                ctxt.execute(sampler.run, ctxt.interp.interpret, ctxt.ast)
+            if sampler.samples:
+                print("\n\n\t\t************ SAMPLES ************\n\n")
+                print(sampler.table(source))
+                # Sólo el tiempo del hilo; el costo en tiempo de reloj lo
+                # mide Benchmarks/bench_sampler.py
+                print(f"\n[green]Muestras: {sampler.samples} (tiempo del hilo de muestreo: "
+                      f"{sampler.thread_share:.2%})[/green]")
+                if len(argv) > 3:
+                    with open(argv[3], 'w') as file:
+                        file.write(sampler.collapsed())
+                    print(f"[green]Pilas colapsadas guardadas en '{argv[3]}'[/green]")
+        elif argv[1] in ["--counts"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            if not ctxt.have_errors:
+                # interpret ya pasa el Checker: si hay errores no ejecuta nada
+                counter = CountingInterpreter(ctxt)
+                ctxt.execute(counter.interpret, ctxt.ast)
+                if counter.program is not None:
+                    listing = counter.listing(source)
+                    print("\n\n\t\t************ EXECUTION COUNTS ************\n\n")
+                    print(escape(listing))
+                    print()
+                    print(counter.branch_table())
+                    if len(argv) > 3:
+                        with open(argv[3], 'w') as file:
+                            file.write(listing + '\n')
+                        print(f"\n[green]Listado guardado en '{argv[3]}'[/green]")
+        elif argv[1] in ["--stats"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.run()
+            ctxt.stats.stop()
+            stats = ctxt.stats
+            print("\n\n\t\t************ STATS ************\n\n")
+            print(stats.table())
+            tokens = stats.tokens if stats.tokens is not None else "- (AST de la caché)"
+            print(f"\n[green]Tokens: {tokens}  Nodos del AST: {stats.nodes}  "
+                  f"Símbolos: {stats.symbols} en {stats.scopes} tablas[/green]")
+            if len(argv) > 3:
+                with open(argv[3], 'w') as file:
+                    json.dump(stats.as_dict(), file, indent=2)
+                print(f"[green]Estadísticas guardadas en '{argv[3]}'[/green]")
+        elif argv[1] in ["--trace"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.run()
+            ctxt.trace.close()
+            print(f"\n[green]Traza guardada en '{ctxt.trace.path}' ({ctxt.trace.events} eventos)[/green]")
+        elif argv[1] in ["-C", "--closure"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.run('closure')
+        elif argv[1] in ["-B", "--bytecode"]:
+            print("\n\n\t\t************ OUTPUT ************\n\n")
+            ctxt.run('vm')
         else:
             print("Invalid option")
             op = int(input("Do you want to see the menu? (1: Yes, 0: No) "))
             if op == 1:
                 menu()
+        # Con errores de sintaxis la traza sólo tiene el análisis
+        if ctxt.trace is not None:
+            ctxt.trace.close()
     else:
         try:
             while True:
@@ -56,8 +56,8 @@ Expression
 
 '''
 
-from dataclasses import dataclass, field
-from multimethod import multimeta
+from dataclasses import dataclass, field, fields, is_dataclass
+import inspect
 from typing import List, Union
 
 '''
@@ -65,28 +65,111 @@ from typing import List, Union
 
 '''
 
-@dataclass
-class Visitor(metaclass=multimeta): # Clase abstracta del patrón Visitor
+class _VisitNamespace(dict):
+    '''
+    Espacio de nombres usado al definir un Visitor. Cada definición de
+    'visit' se guarda según la anotación de su primer parámetro (el tipo
+    de nodo) en lugar de sobrescribir a la anterior. Un 'visit' sin
+    anotación reemplaza al que genera VisitorMeta.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.handlers = {}
+
+    def __setitem__(self, key, value):
+        if key == 'visit' and callable(value):
+            params = list(inspect.signature(value).parameters.values())
+            if len(params) >= 2 and params[1].annotation is not inspect.Parameter.empty \
+                    and isinstance(params[1].annotation, type):
+                self.handlers[params[1].annotation] = value
+                return
+        super().__setitem__(key, value)
+
+
+class _DispatchTable(dict):
+    '''
+    Tabla tipo de nodo -> manejador. Los tipos sin manejador propio se
+    resuelven una sola vez siguiendo su MRO y quedan guardados.
+    '''
+
+    def __missing__(self, cls):
+        for base in cls.__mro__[1:]:
+            if dict.__contains__(self, base):
+                handler = self[cls] = dict.__getitem__(self, base)
+                return handler
+        raise TypeError(f'{self.owner}: no hay un visit() para {cls.__name__}')
+
+
+class VisitorMeta(type):
+    '''
+    Metaclase de los visitantes. Al definir la clase construye su tabla de
+    despacho (heredando la de sus bases) y genera un único 'visit' que
+    despacha con una búsqueda en un diccionario por type(node).
+    '''
+
+    @classmethod
+    def __prepare__(mcls, name, bases):
+        return _VisitNamespace()
+
+    def __new__(mcls, name, bases, namespace):
+        cls = super().__new__(mcls, name, bases, dict(namespace))
+
+        # Los manejadores de las bases se heredan y los propios los reemplazan
+        table = _DispatchTable()
+        table.owner = name
+        for base in reversed(cls.__mro__[1:]):
+            table.update(base.__dict__.get('_visit_handlers', {}))
+        table.update(namespace.handlers)
+        cls._visit_handlers = namespace.handlers
+        cls._visit_table = table
+
+        if 'visit' not in namespace:
+            def visit(self, node, *args):
+                return table[node.__class__](self, node, *args)
+            cls.visit = visit
+        return cls
+
+
+class Visitor(metaclass=VisitorMeta): # Clase abstracta del patrón Visitor
     pass
 
 @dataclass
 class ASTNode:
+    # Posición en el fuente: línea, inicio y fin empaquetados en un entero
+    # (ver set_position). La asigna Context.parse
+    __slots__ = ('_pos',)
+
     def accept(self, v:Visitor):
         return v.visit(self)
 
-@dataclass
+
+def set_position(node, lineno, start, end):
+    node._pos = lineno << 64 | start << 32 | end
+
+
+def get_position(node):
+    '''
+    (línea, inicio, fin) del nodo en el fuente, o None si no la tiene
+    '''
+    pos = getattr(node, '_pos', None)
+    if pos is None:
+        return None
+    return pos >> 64, pos >> 32 & 0xFFFFFFFF, pos & 0xFFFFFFFF
+
+@dataclass(slots=True)
 class Statement(ASTNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Expression(ASTNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Declaration(Statement):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class Parameter:
     type_: str
     name: str
@@ -107,12 +190,17 @@ class Parameter:
 #     def return_type(self):
 #         return self.type_
 
-@dataclass
+@dataclass(slots=True)
 class FuncDeclStmt(Declaration):
     type_: str
     name: str
     params: List[Parameter] = field(default_factory=list)
     body: List[Statement] = field(default_factory=list)
+    # Anotaciones del Resolver: slot de la función y tamaño de su marco
+    slot: int = field(default=None, repr=False, compare=False)
+    frame_size: int = field(default=None, repr=False, compare=False)
+    # Anotación de CppPurity: el resultado sólo depende de los argumentos
+    pure: bool = field(default=None, repr=False, compare=False)
 
     @property
     def return_type(self):
@@ -121,32 +209,38 @@ class FuncDeclStmt(Declaration):
 
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDeclStmt(Declaration):
     type_: str
     name: str
     expr: Expression
+    slot: int = field(default=None, repr=False, compare=False)
 
     @property
     def return_type(self):
         return self.type_
 
-@dataclass
+@dataclass(slots=True)
 class ClassDeclStmt(Declaration):
     name: str  # El nombre de la clase
     class_members: List[Declaration] = field(default_factory=list) # Las declaraciones de la clase
+    slot: int = field(default=None, repr=False, compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class ConstructorDeclStmt(ASTNode):
     name: str  # Nombre de la clase, para identificar el constructor
     params: List['VarDeclStmt']  # Lista de parámetros del constructor
     body: 'CompoundStmt'  # Cuerpo del constructor
+    slot: int = field(default=None, repr=False, compare=False)
+    frame_size: int = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class DestructorDeclStmt(ASTNode):
     name: str  # Nombre de la clase para identificar el destructor
     body: 'CompoundStmt'  # Cuerpo del destructor
+    slot: int = field(default=None, repr=False, compare=False)
+    frame_size: int = field(default=None, repr=False, compare=False)
 
 
 
@@ -156,57 +250,57 @@ Statements
 
 '''
 
-@dataclass
+@dataclass(slots=True)
 class Program(Statement):
     decl: List[Statement] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class PrintfStmt(Statement):
     expr: Expression
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(Statement):
     cond: Expression
     then_stmt: List[Statement] = field(default_factory=list)
     else_stmt: List[Statement] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(Statement):
     cond: Expression
     body_stmt: List[Statement] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class ForStmt(Statement):
     init: Expression
     cond: Expression
     update: Expression
     body_stmt: List[Statement] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt(Statement):
     expr: Expression
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt(Statement):
     expr: Expression
 
-@dataclass
+@dataclass(slots=True)
 class BreakStmt(Statement):
     name: str
 
-@dataclass
+@dataclass(slots=True)
 class ContinueStmt(Statement):
     name: str
 
-@dataclass
+@dataclass(slots=True)
 class SizeStmt(Statement):
     expr: Expression
 
-@dataclass
+@dataclass(slots=True)
 class CompoundStmt(Statement):
     stmts: List[Statement] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class NullStmt(Statement):
     pass
 
@@ -214,9 +308,12 @@ class NullStmt(Statement):
 **************** EXPRESIONES ****************
 
 '''
-@dataclass
+@dataclass(slots=True)
 class LiteralExpr(Expression):
     value: any
+    # Anotación del Checker: tipo probado del valor ('int', 'float', 'bool',
+    # 'string') o None si no se pudo probar
+    static_type: str = field(default=None, repr=False, compare=False)
 
 
 
@@ -233,14 +330,22 @@ class LiteralExpr(Expression):
 #     def return_type(self):
 #         return self.type_
 
-@dataclass
+@dataclass(slots=True)
 class CallExpr(Expression):
     func: Expression
     args: List[Expression] = field(default_factory=list)
+    static_type: str = field(default=None, repr=False, compare=False)
+    # Caché en línea del intérprete adaptativo (CppAdaptive)
+    cache: object = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class VarExpr(Expression):
     name: str
+    # Anotaciones del Resolver: marcos a subir (o GLOBAL) y slot de la variable
+    depth: int = field(default=None, repr=False, compare=False)
+    slot: int = field(default=None, repr=False, compare=False)
+    # Anotación del Checker: tipo probado de la variable
+    static_type: str = field(default=None, repr=False, compare=False)
 
 # @dataclass
 # class ArrayLookupExpr(Expression): #Acceso a arreglos
@@ -252,22 +357,29 @@ class VarExpr(Expression):
 #     expr: Expression
 #     field: str
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOpExpr(Expression):
     op: str
     expr: Expression
+    static_type: str = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOpExpr(Expression):
     op: str
     left: Expression
     right: Expression
+    static_type: str = field(default=None, repr=False, compare=False)
+    # Tipo común de los operandos si ambos son numéricos ('int' o 'float')
+    operand_type: str = field(default=None, repr=False, compare=False)
+    # Caché en línea del intérprete adaptativo (CppAdaptive)
+    cache: object = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class LogicalExpr(Expression):
     op: str
     left: Expression
     right: Expression
+    static_type: str = field(default=None, repr=False, compare=False)
 
 
 # @dataclass
@@ -289,36 +401,60 @@ class LogicalExpr(Expression):
 # class ArraySizeExpr(Expression):
 #     array: Expression
 
-@dataclass
+@dataclass(slots=True)
 class AssignExpr(Expression):
     op: str
     name: str
     expr: Expression
+    depth: int = field(default=None, repr=False, compare=False)
+    slot: int = field(default=None, repr=False, compare=False)
+    static_type: str = field(default=None, repr=False, compare=False)
 
 # Añadidos operadores de incremento y decremento
-@dataclass
+@dataclass(slots=True)
 class AssignPostFix(Expression):
     op: str
     expr: Expression
+    static_type: str = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class AssignPreFix(Expression):
     op: str
     expr: Expression
+    static_type: str = field(default=None, repr=False, compare=False)
 
 # *************************************************
 
-@dataclass
+@dataclass(slots=True)
 class Set(Expression):
     obj: str
     name: str
     expr: Expression
+    static_type: str = field(default=None, repr=False, compare=False)
+    # Caché en línea del Interpreter: (clase, posición del atributo)
+    cache: object = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class Get(Expression):
     obj: str
     name: str
+    static_type: str = field(default=None, repr=False, compare=False)
+    # Caché en línea del Interpreter: (clase, posición del atributo, método)
+    cache: object = field(default=None, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class ThisExpr(Expression):
-    pass
\ No newline at end of file
+    depth: int = field(default=None, repr=False, compare=False)
+    slot: int = field(default=None, repr=False, compare=False)
+    static_type: str = field(default=None, repr=False, compare=False)
+
+
+# Clases de nodos (ordenadas por nombre) con sus campos. Las usa la caché
+# de ASTs (CppContext) para codificar cada nodo como un número de clase más
+# sus campos en orden
+NODE_CLASSES = sorted(
+    (cls for cls in list(globals().values())
+     if isinstance(cls, type) and is_dataclass(cls)),
+    key=lambda cls: cls.__name__)
+NODE_FIELDS = {cls: tuple(f.name for f in fields(cls)) for cls in NODE_CLASSES}
+NODE_IDS = {cls: index for index, cls in enumerate(NODE_CLASSES)}
@@ -0,0 +1,282 @@
+'''
+
+Intérprete adaptativo (quickening) para Mini C++.
+
+Es el Interpreter de referencia con sitios que se especializan solos
+mientras el programa corre, como hace CPython 3.11 con su bytecode:
+
+- Un BinaryOpExpr registra en su caché en línea las clases de los
+  operandos que recibe. Si durante WARMUP ejecuciones son siempre las
+  mismas, el nodo se reescribe a un manejador especializado (int con int,
+  float con float, números mezclados o dos cadenas) que sólo revisa las
+  clases con un 'is' antes de aplicar el operador.
+- Un CallExpr registra la función a la que llama. Si durante WARMUP
+  ejecuciones es siempre la misma Function (y recibe la cantidad correcta
+  de argumentos) el nodo pasa a llamarla directamente, sin revisar que
+  sea invocable ni su aridad.
+- Un VarExpr se reescribe en su primera ejecución al manejador del marco
+  en el que está la variable (local, global o de una función externa).
+
+Un sitio que ve operandos o funciones distintos, o cuya guarda falla
+después de especializarse, vuelve al camino genérico y deja de observar.
+
+La reescritura cambia la clase del nodo por una subclase sin campos
+nuevos, así que el despacho del Visitor elige el manejador nuevo sin
+costo extra. Al terminar interpret() los nodos recuperan su clase para
+que el AST se pueda seguir usando con los demás motores.
+WARMUP se configura con MINICPP_WARMUP.
+
+'''
+
+from CppAST import *
+from CppInterpreter import Interpreter, Function, _NUMERIC_OPERATORS
+from CppResolver import GLOBAL
+from stdlib import CallError
+
+import operator
+import os
+
+# Ejecuciones que observa un sitio antes de especializarse
+WARMUP = int(os.environ.get('MINICPP_WARMUP', 8))
+
+_NUMBERS = (int, float)
+
+# Operadores que aceptan dos cadenas
+_STRING_OPERATORS = {
+    '+': operator.add,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+
+class InlineCache:
+    '''
+    Lo que un sitio ha visto: cuántas veces se ejecutó y la clave
+    observada (clases de los operandos o la función llamada)
+    '''
+    __slots__ = ('count', 'key')
+
+    def __init__(self, key):
+        self.count = 0
+        self.key = key
+
+
+# Formas especializadas de los nodos. Son subclases sin campos nuevos para
+# poder cambiar la clase de un nodo ya creado
+
+class GenericBinaryOp(BinaryOpExpr):
+    __slots__ = ()
+
+class IntBinaryOp(BinaryOpExpr):
+    __slots__ = ()
+
+class FloatBinaryOp(BinaryOpExpr):
+    __slots__ = ()
+
+class NumberBinaryOp(BinaryOpExpr):
+    __slots__ = ()
+
+class StringBinaryOp(BinaryOpExpr):
+    __slots__ = ()
+
+class GenericCallExpr(CallExpr):
+    __slots__ = ()
+
+class DirectCallExpr(CallExpr):
+    __slots__ = ()
+
+class LocalVarExpr(VarExpr):
+    __slots__ = ()
+
+class GlobalVarExpr(VarExpr):
+    __slots__ = ()
+
+class OuterVarExpr(VarExpr):
+    __slots__ = ()
+
+
+# Especialización de un BinaryOpExpr según las clases de sus operandos
+_BINARY_SPECIALIZATIONS = {
+    (int, int): IntBinaryOp,
+    (float, float): FloatBinaryOp,
+    (int, float): NumberBinaryOp,
+    (float, int): NumberBinaryOp,
+    (str, str): StringBinaryOp,
+}
+
+
+def _binary_specialization(node, key):
+    return key
+
+
+def _call_specialization(node, callee):
+    '''
+    Sólo se llama directamente a una Function que recibe la cantidad de
+    argumentos que espera
+    '''
+    args = node.args if node.args is not None else []
+    if callee.__class__ is Function and (callee.node.params is None
+                                         or len(callee.node.params) == len(args)):
+        return DirectCallExpr
+    return None
+
+
+class AdaptiveInterpreter(Interpreter):
+    '''
+    Interpreter que especializa los sitios calientes del AST. Expone la
+    misma interfaz que Interpreter (interpret, error, env).
+    '''
+
+    def __init__(self, ctxt):
+        super().__init__(ctxt)
+        # Nodos reescritos y su clase original
+        self.quickened = []
+        self.specialized = 0
+        self.deoptimized = 0
+
+    def interpret(self, node):
+        try:
+            super().interpret(node)
+        finally:
+            self.restore()
+
+    def restore(self):
+        '''
+        Devuelve a los nodos reescritos su clase original
+        '''
+        for node, cls in self.quickened:
+            node.__class__ = cls
+            if 'cache' in NODE_FIELDS[cls]:
+                node.cache = None
+        self.quickened = []
+
+    # Observación y reescritura de sitios
+
+    def rewrite(self, node, cls):
+        if node.__class__ in NODE_IDS:
+            self.quickened.append((node, node.__class__))
+        node.__class__ = cls
+
+    def observe(self, node, key, generic, specialize):
+        '''
+        Registra la clave vista en el sitio. Tras WARMUP ejecuciones con la
+        misma clave el nodo pasa a la clase que devuelve
+        specialize(node, key), o a la forma genérica si devuelve None o si
+        la clave cambia.
+        '''
+        cache = node.cache
+        if cache is None:
+            node.cache = cache = InlineCache(key)
+        elif cache.key is not key:
+            node.cache = None
+            self.rewrite(node, generic)
+            return
+        cache.count += 1
+        if cache.count >= WARMUP:
+            cls = specialize(node, key)
+            if cls is None:
+                node.cache = None
+                cls = generic
+            else:
+                self.specialized += 1
+            self.rewrite(node, cls)
+
+    def deoptimize(self, node, cls):
+        '''
+        La guarda de un sitio especializado falló: vuelve al camino genérico
+        '''
+        self.deoptimized += 1
+        node.cache = None
+        node.__class__ = cls
+
+    # Operadores binarios
+
+    def visit(self, node: BinaryOpExpr):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if node.operand_type is not None:
+            return _NUMERIC_OPERATORS[node.op](left, right)
+        result = self.binary(node, left, right)
+        # La clave es la clase especializada que corresponde a los operandos
+        self.observe(node, _BINARY_SPECIALIZATIONS.get((left.__class__, right.__class__)),
+                     GenericBinaryOp, _binary_specialization)
+        return result
+
+    def visit(self, node: GenericBinaryOp):
+        return self.binary(node, self.visit(node.left), self.visit(node.right))
+
+    def visit(self, node: IntBinaryOp):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if left.__class__ is int and right.__class__ is int:
+            return _NUMERIC_OPERATORS[node.op](left, right)
+        self.deoptimize(node, GenericBinaryOp)
+        return self.binary(node, left, right)
+
+    def visit(self, node: FloatBinaryOp):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if left.__class__ is float and right.__class__ is float:
+            return _NUMERIC_OPERATORS[node.op](left, right)
+        self.deoptimize(node, GenericBinaryOp)
+        return self.binary(node, left, right)
+
+    def visit(self, node: NumberBinaryOp):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if left.__class__ in _NUMBERS and right.__class__ in _NUMBERS:
+            return _NUMERIC_OPERATORS[node.op](left, right)
+        self.deoptimize(node, GenericBinaryOp)
+        return self.binary(node, left, right)
+
+    def visit(self, node: StringBinaryOp):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if left.__class__ is str and right.__class__ is str and node.op in _STRING_OPERATORS:
+            return _STRING_OPERATORS[node.op](left, right)
+        self.deoptimize(node, GenericBinaryOp)
+        return self.binary(node, left, right)
+
+    # Variables
+
+    def visit(self, node: VarExpr):
+        depth = node.depth
+        if depth == 0:
+            self.rewrite(node, LocalVarExpr)
+        elif depth == GLOBAL:
+            self.rewrite(node, GlobalVarExpr)
+        else:
+            self.rewrite(node, OuterVarExpr)
+        return self.visit(node)
+
+    def visit(self, node: LocalVarExpr):
+        return self.env.values[node.slot]
+
+    def visit(self, node: GlobalVarExpr):
+        return self.globals.frame.values[node.slot]
+
+    def visit(self, node: OuterVarExpr):
+        return self._values(node.depth)[node.slot]
+
+    # Llamadas
+
+    def visit(self, node: CallExpr):
+        if node.func.__class__ is Get:
+            return self.call_method(node)
+        callee = node.func.accept(self)
+        self.observe(node, callee, GenericCallExpr, _call_specialization)
+        return self.call(node, callee)
+
+    def visit(self, node: GenericCallExpr):
+        return self.call(node, node.func.accept(self))
+
+    def visit(self, node: DirectCallExpr):
+        callee = node.func.accept(self)
+        if callee is not node.cache.key:
+            self.deoptimize(node, GenericCallExpr)
+            return self.call(node, callee)
+        args = [arg.accept(self) for arg in node.args] if node.args is not None else []
+        try:
+            return callee.invoke(self, args)
+        except CallError as err:
+            self.error(node.func, str(err))
@@ -0,0 +1,108 @@
+'''
+
+Caché en disco del compilador Mini C++.
+
+Guarda artefactos de compilación (tablas LALR, ASTs y el código de Python
+generado por el transpilador) en archivos direccionados por contenido: la
+clave es un hash del código fuente junto con la versión del compilador y
+la del intérprete de Python, de modo que cualquier cambio en alguno de
+ellos invalida la entrada.
+
+El directorio por defecto es '__mcccache__' junto a este archivo y puede
+cambiarse con la variable de entorno MINICPP_CACHE_DIR.
+
+El tamaño total está limitado (MINICPP_CACHE_SIZE, en bytes). Cada lectura
+actualiza la fecha de modificación de la entrada y, al superar el límite,
+se borran primero las entradas usadas hace más tiempo (LRU).
+
+'''
+
+import hashlib
+import importlib.util
+import os
+import tempfile
+
+# Debe incrementarse cada vez que cambie la forma en que se generan los
+# artefactos guardados en la caché.
+COMPILER_VERSION = '9'
+
+DEFAULT_DIR = os.environ.get(
+    'MINICPP_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '__mcccache__'))
+
+DEFAULT_MAX_SIZE = int(os.environ.get('MINICPP_CACHE_SIZE', 64 * 1024 * 1024))
+
+
+class Cache:
+    '''
+    Almacén clave -> bytes respaldado por un directorio.
+    '''
+
+    def __init__(self, directory=DEFAULT_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    @staticmethod
+    def key(kind, source):
+        '''
+        Clave de una entrada: tipo de artefacto, fuente, versión del
+        compilador y número mágico del bytecode de Python.
+        '''
+        digest = hashlib.sha256()
+        for part in (kind, COMPILER_VERSION, importlib.util.MAGIC_NUMBER.hex(), source):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return f'{kind}-{digest.hexdigest()}'
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            # La fecha de modificación marca el último uso (LRU)
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def store(self, key, data):
+        # Se escribe en un archivo temporal y se renombra para que otro
+        # proceso nunca lea una entrada a medio escribir.
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp, self.path(key))
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        '''
+        Borra las entradas usadas hace más tiempo hasta que el tamaño total
+        de la caché quede dentro de max_size.
+        '''
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
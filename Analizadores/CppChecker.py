@@ -22,6 +22,120 @@ from CppAST import *
 from stdlib import *
 
 
+'''
+INFERENCIA DE TIPOS
+
+Además de revisar el programa, el Checker anota cada expresión con su tipo
+estático (static_type): 'int', 'float', 'bool', 'string' o None si no se
+puede probar. Los motores usan operaciones sin revisiones en tiempo de
+ejecución cuando los tipos de los operandos están probados, así que un
+tipo sólo se anota si vale para todo valor que la expresión pueda tomar:
+
+- El tipo declarado de una variable (o parámetro) queda probado si todos
+  los valores que se le asignan son de ese tipo. Una variable sin
+  inicializador empieza valiendo nil, así que su tipo no queda probado.
+- Los parámetros de una función sólo reciben valores de las llamadas
+  directas por su nombre; si la función se usa como valor, se reasigna o
+  es un método, sus parámetros no quedan probados.
+- El tipo de retorno de una función queda probado si todos sus return
+  devuelven ese tipo y el cuerpo siempre termina en un return.
+
+Primero se supone que todos los tipos declarados valen y se descartan los
+que alguna asignación contradice, hasta que no cambia nada.
+'''
+
+# Tipos de los valores que el Checker puede probar
+VALUE_TYPES = {'int', 'float', 'bool', 'string'}
+NUMERIC_TYPES = {'int', 'float'}
+
+# Tipo del resultado de las funciones de la biblioteca estándar
+STDLIB_TYPES = {
+    'clock': 'float', 'len': 'int', 'format': 'string', 'str': 'string',
+    'isInteger': 'bool', 'isFloat': 'bool', 'isStr': 'bool',
+    'sin': 'float', 'cos': 'float', 'tan': 'float', 'asin': 'float',
+    'acos': 'float', 'atan': 'float', 'log': 'float',
+    'radToDeg': 'float', 'degToRad': 'float',
+}
+
+COMPARISON_OPERATORS = {'==', '!=', '<', '<=', '>', '>='}
+
+
+def literal_type(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, str):
+        return 'string'
+    return None
+
+
+def static_type(node):
+    return getattr(node, 'static_type', None)
+
+
+def operand_type(left, right):
+    '''
+    Tipo común de dos operandos numéricos: 'int' si ambos son enteros,
+    'float' si alguno es flotante y None si alguno no es numérico
+    '''
+    if left == right == 'int':
+        return 'int'
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        return 'float'
+    return None
+
+
+def binary_type(op, left, right):
+    '''
+    Tipo del resultado de 'left op right'
+    '''
+    if op in COMPARISON_OPERATORS:
+        return 'bool'
+    if op == '+' and left == right == 'string':
+        return 'string'
+    numeric = operand_type(left, right)
+    if op == '/':
+        return numeric and 'float'
+    return numeric
+
+
+def assignable(declared, type_):
+    '''
+    Si una variable de tipo 'declared' sigue teniendo ese tipo al
+    asignarle un valor de tipo 'type_'
+    '''
+    return type_ == declared or (declared == 'float' and type_ == 'int')
+
+
+def compatible(declared, type_):
+    '''
+    Si el Checker acepta asignar un valor de tipo 'type_' a una variable
+    de tipo 'declared'. Los tipos numéricos y bool se convierten entre sí
+    '''
+    if declared not in VALUE_TYPES or type_ is None:
+        return True
+    if declared == 'string' or type_ == 'string':
+        return declared == type_
+    return True
+
+
+def always_returns(node):
+    '''
+    Si la instrucción termina siempre en un return
+    '''
+    if isinstance(node, ReturnStmt):
+        return True
+    if isinstance(node, CompoundStmt):
+        return any(always_returns(stmt) for stmt in node.stmts)
+    if isinstance(node, IfStmt):
+        return (isinstance(node.else_stmt, ASTNode)
+                and always_returns(node.then_stmt) and always_returns(node.else_stmt))
+    return False
+
+
 class SymbolTable:
     '''
     TABLA DE SÍMBOLOS
@@ -87,7 +201,19 @@ class SymbolTable:
         '''
         return [(name, value) for name, value in self.symbols.items()]
 
-InLoop = False
+    def size(self):
+        '''
+        (símbolos declarados, tablas) de esta tabla y sus descendientes,
+        sin contar la biblioteca estándar que se copia en cada una
+        '''
+        symbols = tables = 0
+        pending = [self]
+        while pending:
+            table = pending.pop()
+            symbols += len(table.symbols) - len(stdlibFunctions)
+            tables += 1
+            pending.extend(table.children)
+        return symbols, tables
 
 #Analizador semántico
 class Checker(Visitor):
@@ -95,6 +221,25 @@ class Checker(Visitor):
     Visitante para crear y enlazar tabla de símbolos al AST    
     '''
 
+    def __init__(self, ctxt):
+        self.ctxt = ctxt
+        # Ciclos que encierran la instrucción actual dentro de la función actual
+        self.loops = 0
+        # Funciones, clases y constructores que encierran la instrucción actual
+        self.functions = []
+        # Datos para la inferencia de tipos:
+        # - typed_nodes: (expresión, símbolo al que se refiere) en postorden
+        # - stores: (símbolo, operador, expresión) por cada valor que se le
+        #   asigna a un símbolo; el operador es el de una asignación
+        #   compuesta ('+=' -> '+'), None para '=' y la expresión es None
+        #   en ++ y --
+        # - unproven: símbolos cuyo tipo declarado no queda probado
+        # - global_symbols: nombre -> declaraciones del marco global
+        self.typed_nodes = []
+        self.stores = []
+        self.unproven = set()
+        self.global_symbols = {}
+
     def add_symbol(self, node, env: SymbolTable):
         '''
         Intenta agregar un símbolo a la tabla de símbolos.
@@ -105,8 +250,153 @@ class Checker(Visitor):
         except SymbolTable.SymbolError:
             self.error(node, f"El símbolo '{node.name}' ya ha sido declarado")
 
-    def error(cls, position, txt):
-        cls.ctxt.error(position, txt)
+    def error(self, position, txt):
+        self.ctxt.error(position, txt)
+
+    # Inferencia de tipos. Los símbolos son los nodos de las declaraciones
+    # (VarDeclStmt, FuncDeclStmt, Parameter...) o, para la biblioteca
+    # estándar, su nombre
+
+    def lookup(self, name, env: SymbolTable):
+        symbol = env.getSymbol(name)
+        if symbol is None or isinstance(symbol, (ASTNode, Parameter)):
+            return symbol
+        return name
+
+    def declare(self, node, env: SymbolTable):
+        '''
+        Agrega la declaración a la tabla de símbolos. Las del marco global
+        se registran por nombre: en ejecución todas las que tienen el mismo
+        nombre comparten un slot aunque estén en bloques distintos
+        '''
+        self.add_symbol(node, env)
+        if not self.functions:
+            self.global_symbols.setdefault(node.name, []).append(node)
+
+    @staticmethod
+    def key(symbol):
+        return symbol if isinstance(symbol, str) else id(symbol)
+
+    def proven(self, symbol):
+        return symbol is not None and self.key(symbol) not in self.unproven
+
+    def unprove(self, symbol):
+        self.unproven.add(self.key(symbol))
+
+    def escape(self, function):
+        '''
+        La función puede llamarse sin pasar por una llamada directa, así que
+        no se sabe qué valores reciben sus parámetros
+        '''
+        self.unprove(function)
+        for param in function.params or []:
+            self.unprove(param)
+
+    def declared(self, symbol):
+        '''
+        Tipo declarado del símbolo (el de retorno si es una función)
+        '''
+        if isinstance(symbol, str):
+            return literal_type(stdlibFunctions[symbol])
+        type_ = getattr(symbol, 'type_', None)
+        return type_ if type_ in VALUE_TYPES else None
+
+    def type_of(self, symbol):
+        '''
+        Tipo probado del valor de una variable
+        '''
+        if isinstance(symbol, FuncDeclStmt) or not self.proven(symbol):
+            return None
+        return self.declared(symbol)
+
+    def store(self, symbol, op, expr):
+        '''
+        Registra un valor que se le asigna al símbolo
+        '''
+        if isinstance(symbol, (str, FuncDeclStmt)):
+            # Se reemplaza una función o una constante de la biblioteca
+            if isinstance(symbol, FuncDeclStmt):
+                self.escape(symbol)
+            self.unprove(symbol)
+        elif symbol is not None:
+            self.stores.append((symbol, op, expr))
+
+    def store_type(self, symbol, op, expr):
+        value = 'int' if expr is None else static_type(expr)
+        if op is None:
+            return value
+        return binary_type(op, self.type_of(symbol), value)
+
+    def infer(self, node, symbol=None):
+        '''
+        Tipo de la expresión a partir del tipo de sus hijos
+        '''
+        cls = type(node)
+        if cls is LiteralExpr:
+            return literal_type(node.value)
+        if cls is VarExpr:
+            return self.type_of(symbol)
+        if cls is CallExpr:
+            if isinstance(symbol, FuncDeclStmt):
+                return self.declared(symbol) if self.proven(symbol) else None
+            if isinstance(symbol, str) and self.proven(symbol):
+                return STDLIB_TYPES.get(symbol)
+            return None
+        if cls is UnaryOpExpr:
+            if node.op == '!':
+                return 'bool'
+            type_ = static_type(node.expr)
+            return type_ if type_ in NUMERIC_TYPES else None
+        if cls is BinaryOpExpr:
+            left, right = static_type(node.left), static_type(node.right)
+            node.operand_type = operand_type(left, right)
+            return binary_type(node.op, left, right)
+        if cls is LogicalExpr:
+            left, right = static_type(node.left), static_type(node.right)
+            return left if left == right and node.op in ('||', '&&') else None
+        if cls in (AssignPostFix, AssignPreFix):
+            type_ = static_type(node.expr)
+            return type_ if type_ in NUMERIC_TYPES else None
+        return None
+
+    def typed(self, node, symbol=None):
+        '''
+        Anota la expresión con su tipo (suponiendo probados los tipos que
+        aún no se han descartado) y la guarda para settle()
+        '''
+        self.typed_nodes.append((node, symbol))
+        node.static_type = self.infer(node, symbol)
+        return node.static_type
+
+    def settle(self):
+        '''
+        Descarta los tipos declarados que alguna asignación contradice y
+        vuelve a anotar las expresiones hasta que no cambia nada
+        '''
+        groups = [group for group in self.global_symbols.values() if len(group) > 1]
+        for group in groups:
+            if not all(isinstance(s, VarDeclStmt) and s.type_ == group[0].type_ for s in group):
+                for symbol in group:
+                    if isinstance(symbol, FuncDeclStmt):
+                        self.escape(symbol)
+                    self.unprove(symbol)
+
+        changed = True
+        while changed:
+            for node, symbol in self.typed_nodes:
+                node.static_type = self.infer(node, symbol)
+
+            changed = False
+            for symbol, op, expr in self.stores:
+                if self.proven(symbol) and not assignable(self.declared(symbol), self.store_type(symbol, op, expr)):
+                    self.unprove(symbol)
+                    changed = True
+            # Los globales con el mismo nombre y tipo son una sola variable
+            for group in groups:
+                if not all(self.proven(s) for s in group) and any(self.proven(s) for s in group):
+                    for symbol in group:
+                        self.unprove(symbol)
+                    changed = True
     
 
     @classmethod
@@ -115,21 +405,17 @@ class Checker(Visitor):
         Método estático para iniciar el análisis semántico
         '''
 
-        cls.ctxt = ctxt
-        check = cls()
-        
-        model.accept(check)
+        check = cls(ctxt)
+        check.symtable = SymbolTable()
 
-        return check
+        check.visit(model, check.symtable)
+        check.settle()
 
-    #Puerta de entrada a través de ASTNode de CppAST
-    def visit(self, node: ASTNode):
-        s1 = SymbolTable()
-        self.visit(node, s1)
+        return check
 
     def visit(self, node: FuncDeclStmt, env: SymbolTable):
         # 1. Agregar el nombre de la función a la tabla de símbolos actual con su tipo
-        self.add_symbol(node, env)
+        self.declare(node, env)
 
         # 2. Crear una nueva tabla de símbolos para la función
         new_env = SymbolTable(parent=env)
@@ -138,28 +424,41 @@ class Checker(Visitor):
         if node.params:
             for param in node.params:
                 print(node.params)
-                self.add_symbol(VarExpr(param.name), new_env)
+                self.add_symbol(param, new_env)
 
-        # 4. Visitar el cuerpo de la función
+        # 4. Visitar el cuerpo de la función (un break en el cuerpo no
+        # pertenece a los ciclos que encierran la declaración)
+        loops, self.loops = self.loops, 0
+        self.functions.append(node)
         self.visit(node.body, new_env)
+        self.functions.pop()
+        self.loops = loops
+
+        # 5. Si el cuerpo puede terminar sin un return la función devuelve nil
+        if not always_returns(node.body):
+            self.unprove(node)
 
         
     
     def visit(self, node: VarDeclStmt, env: SymbolTable):
         '''
-        1. Agregar el nombre de la variable a la tabla de símbolos actual con su tipo.
-        2. Visitar la expresión de inicialización de la variable.
-        3. Verificar que la expresión de inicialización sea del mismo tipo que la variable.
+        1. Visitar la expresión de inicialización de la variable.
+        2. Verificar que la expresión de inicialización sea del mismo tipo que la variable.
+        3. Agregar el nombre de la variable a la tabla de símbolos actual con su tipo.
         '''
 
-        # 1. Se agrega el nombre y tipo de la variable a la tabla de símbolos actual
-        self.add_symbol(node, env)
-
-        # 2,3 Visitar la expresión de inicialización de la variable y verificar tipo
+        # 1,2 Visitar la expresión de inicialización de la variable y verificar
+        # tipo (la variable aún no es visible en su inicializador)
         if node.expr:
-            expr_type = 'int'
-            if expr_type != node.type_:
+            expr_type = self.visit(node.expr, env)
+            if not compatible(node.type_, expr_type):
                 self.error(node, f"Error en la inicialización de la variable. '{expr_type}' no coincide con el tipo de la variable '{node.type_}'")
+            self.store(node, None, node.expr)
+        else:
+            self.unprove(node)
+
+        # 3. Se agrega el nombre y tipo de la variable a la tabla de símbolos actual
+        self.declare(node, env)
     
     def visit(self, node: ClassDeclStmt, env: SymbolTable):
         '''
@@ -169,18 +468,27 @@ class Checker(Visitor):
         '''
 
         # 1. Se agrega el nombre de la clase a la tabla de símbolos
-        self.add_symbol(node, env)
+        self.declare(node, env)
         
         # 2. Se crea una nueva tabla de símbolos para la clase
         class_scope = SymbolTable(parent=env)
 
         # 3. Se registran las declaraciones de la clase en la nueva tabla de símbolos
+        self.functions.append(node)
         for member in node.class_members:
-            if isinstance(member, Declaration):
+            if isinstance(member, (Declaration, ConstructorDeclStmt, DestructorDeclStmt)):
                 # Se visita cada miembro de la clase
                 self.visit(member, class_scope)
             else:
-                self.error(node, f"El miembro'{member}' en la clase '{node.class_name}' no es una declaración válida")
+                self.error(node, f"El miembro'{member}' en la clase '{node.name}' no es una declaración válida")
+        self.functions.pop()
+
+        # 4. Los atributos y métodos se usan a través de las instancias, así
+        # que sus tipos no quedan probados
+        for member in node.class_members:
+            if isinstance(member, (FuncDeclStmt, ConstructorDeclStmt)):
+                self.escape(member)
+            self.unprove(member)
     
     def visit(self, node: ConstructorDeclStmt, env: SymbolTable):
         '''
@@ -197,32 +505,34 @@ class Checker(Visitor):
         constructor_scope = SymbolTable(parent=env)
 
         # 3. Se registran los parámetros del constructor en la nueva tabla de símbolos
-        for param in node.params:
-            if isinstance(param, VarDeclStmt):
-                constructor_scope.addSymbol(param.name, {'type': param.type_})
-            else:
-                self.error(node, f"El parámetro '{param}' en el constructor '{node.name}' no es una declaración válida")
+        for param in node.params or []:
+            self.add_symbol(param, constructor_scope)
         
         # 4. Se visita el cuerpo del constructor
-        for statement in node.body:
-            self.visit(statement, constructor_scope)
+        loops, self.loops = self.loops, 0
+        self.functions.append(node)
+        self.visit(node.body, constructor_scope)
+        self.functions.pop()
+        self.loops = loops
     
     def visit(self, node: DestructorDeclStmt, env: SymbolTable):
         '''
-        1. Agregar el nombre del destructor a la tabla de símbolos actual.
-        2. Crear una nueva tabla de símbolos para el ámbito del destructor.
-        3. Visitar el cuerpo del destructor dentro del nuevo ámbito.
+        1. Crear una nueva tabla de símbolos para el ámbito del destructor.
+        2. Visitar el cuerpo del destructor dentro del nuevo ámbito.
+
+        El destructor se llama como la clase y su constructor, así que no
+        se agrega a la tabla de símbolos
         '''
 
-        # 1. Se agrega el nombre del destructor a la tabla de símbolos
-        self.add_symbol(node, env)
-        
-        # 2. Se crea una nueva tabla de símbolos para el destructor
+        # 1. Se crea una nueva tabla de símbolos para el destructor
         destructor_scope = SymbolTable(parent=env)
 
-        # 3. Se visita el cuerpo del destructor
-        for statement in node.body:
-            self.visit(statement, destructor_scope)
+        # 2. Se visita el cuerpo del destructor
+        loops, self.loops = self.loops, 0
+        self.functions.append(node)
+        self.visit(node.body, destructor_scope)
+        self.functions.pop()
+        self.loops = loops
     
     #Visita de nodos de instrucciones
     def visit(self, node: Program, env: SymbolTable):
@@ -264,14 +574,13 @@ class Checker(Visitor):
         2. Visitar el cuerpo del while
         '''
 
-        global InLoop
         # 1. Se visita la condición del while
         self.visit(node.cond, env)
-        InLoop=True
 
         # 2. Se visita el cuerpo del while
+        self.loops += 1
         self.visit(node.body_stmt, env)
-        InLoop=False
+        self.loops -= 1
     
     def visit(self, node: ForStmt, env: SymbolTable):
         '''
@@ -281,7 +590,6 @@ class Checker(Visitor):
         4. Visitar el cuerpo del for
         '''
 
-        global InLoop
         env = SymbolTable(env)
 
         # 1. Se visita la inicialización del for
@@ -291,10 +599,10 @@ class Checker(Visitor):
         # 3. Se visita la actualización del for
         self.visit(node.update, env)
 
-        InLoop=True
         # 4. Se visita el cuerpo del for
+        self.loops += 1
         self.visit(node.body_stmt, env)
-        InLoop=False
+        self.loops -= 1
     
     def visit(self, node: ReturnStmt, env: SymbolTable):
         '''
@@ -304,6 +612,13 @@ class Checker(Visitor):
         if node.expr:
             self.visit(node.expr, env)
 
+        # El valor devuelto es un valor que toma la llamada a la función
+        if self.functions and isinstance(self.functions[-1], FuncDeclStmt):
+            if node.expr:
+                self.stores.append((self.functions[-1], None, node.expr))
+            else:
+                self.unprove(self.functions[-1])
+
     def visit(self, node: ExprStmt, env: SymbolTable):
         '''
         Visitar la expresión
@@ -317,7 +632,7 @@ class Checker(Visitor):
         Verificar que el break esté dentro de un ciclo
         '''
 
-        if not InLoop:
+        if not self.loops:
             self.error(node, f"Error: '{node.name}' fuera de un ciclo")
     
     def visit(self, node: ContinueStmt, env: SymbolTable):
@@ -325,7 +640,7 @@ class Checker(Visitor):
         Verificar que el continue esté dentro de un ciclo
         '''
 
-        if not InLoop:
+        if not self.loops:
             self.error(node, f"Error: '{node.name}' fuera de un ciclo")
     
     def visit(self, node: SizeStmt, env: SymbolTable):
@@ -354,9 +669,9 @@ class Checker(Visitor):
     
     def visit(self, node: LiteralExpr, env: SymbolTable):
         '''
-        No hacer nada
+        El tipo del literal es el de su valor
         '''
-        pass
+        return self.typed(node)
 
     def visit(self, node: CallExpr, env: SymbolTable):
         '''
@@ -366,36 +681,48 @@ class Checker(Visitor):
         4. Visitar las expr de los argumentos
         '''
 
-        # Buscar la función en la tabla de símbolos
-        self.visit(node.func, env)
-        result = env.getSymbol(node.func.name)
+        # Buscar la función en la tabla de símbolos. Una llamada directa por
+        # el nombre no hace que la función escape
+        if isinstance(node.func, VarExpr):
+            result = self.resolve(node.func, env)
+        else:
+            self.visit(node.func, env)
+            result = None
 
         # Visita las expresiones de los argumentos
-        if node.args is not None:
-            for argument in node.args:
-                self.visit(argument, env)
+        args = node.args or []
+        for argument in args:
+            self.visit(argument, env)
         
         # Verifica que sea una declaración de una función y la cantidad de argumentos
-        if result is FuncDeclStmt:
-            if result is not None:
-                if result.params is not None:
-                    if len(result.params) != len(node.args):
-                        self.error(node, f"Error de checker. La funcion '{node.func.name}' esperaba {len(result.params)} argumentos, pero se pasaron {len(node.args)}")
+        if isinstance(result, FuncDeclStmt) and result.params is not None:
+            if len(result.params) != len(args):
+                self.error(node, f"Error de checker. La funcion '{node.func.name}' esperaba {len(result.params)} argumentos, pero se pasaron {len(args)}")
+
+            # Verifica el tipo de los argumentos, que son los valores de los parámetros
+            for argument, param in zip(args, result.params):
+                arg_type = static_type(argument)
+                if not compatible(param.type_, arg_type):
+                    self.error(
+                        argument,
+                        f"Tipo de argumento inválido para '{param.name}' en la llamada a '{node.func.name}': "
+                        f"esperado '{param.type_}', pero se encontró '{arg_type}'."
+                    )
+                self.store(param, None, argument)
         
-        # Verifica el tipo de los argumentos
-        # if node.args and node.func.params:
-        #     for argument, param in zip(node.args, result.params):
-        #         arg_type = self.visit(argument, env)
-
-        #         # Verifica que el tipo del argumento sea el mismo que el tipo del parámetro
-        #         if arg_type != param.return_type:
-        #             self.error(
-        #             node,
-        #             f"Tipo de argumento inválido para '{param.name}' en la llamada a '{node.func.name}': "
-        #             f"esperado '{param.return_type}', pero se encontró '{arg_type}'."
-        #         )
-        
-        # return result.return_type
+        return self.typed(node, result)
+
+    def resolve(self, node: VarExpr, env: SymbolTable):
+        '''
+        Busca la variable en la tabla de símbolos, anota su tipo y
+        devuelve el símbolo al que se refiere
+        '''
+
+        result = self.lookup(node.name, env)
+        if result is None:
+            self.error(node, f"Error de checker. La variable '{node.name}' no ha sido declarada")
+        self.typed(node, result)
+        return result
     
     def visit(self, node: VarExpr, env: SymbolTable):
         '''
@@ -403,11 +730,13 @@ class Checker(Visitor):
         que todo Identificador debe ser declarado previamente
         '''
 
-        result = env.getSymbol(node.name)
-        if result is None:
-            self.error(node, f"Error de checker. La variable '{node.name}' no ha sido declarada")
+        result = self.resolve(node, env)
+
+        # La función se usa como valor: se le puede llamar desde cualquier parte
+        if isinstance(result, FuncDeclStmt):
+            self.escape(result)
         
-        # return result.return_type
+        return node.static_type
     
     def visit(self, node: UnaryOpExpr, env: SymbolTable):
         '''
@@ -415,6 +744,7 @@ class Checker(Visitor):
         '''
 
         self.visit(node.expr, env)
+        return self.typed(node)
     
     def visit(self, node: BinaryOpExpr, env: SymbolTable):
         '''
@@ -423,6 +753,7 @@ class Checker(Visitor):
 
         self.visit(node.left, env)
         self.visit(node.right, env)
+        return self.typed(node)
     
     def visit(self, node: LogicalExpr, env: SymbolTable):
         '''
@@ -431,6 +762,7 @@ class Checker(Visitor):
 
         self.visit(node.left, env)
         self.visit(node.right, env)
+        return self.typed(node)
     
     def visit(self, node: AssignExpr, env: SymbolTable):
         '''
@@ -440,18 +772,20 @@ class Checker(Visitor):
         '''
 
         # 1. Verificar que la variable exista en la tabla de símbolos
-        result = env.getSymbol(node.name)
+        result = self.lookup(node.name, env)
         if result is None:
             self.error(node, f"Error de checker. La variable '{node.name}' no ha sido declarada")
         
         # 2. Visitar la expresión
-        self.visit(node.expr, env)
+        expr_type = self.visit(node.expr, env)
 
         # 3. Verificar que el tipo de la expresión sea el mismo que el tipo de la variable
-        # if result.return_type != node.expr.return_type:
-        #     self.error(node, f"Error de checker. Se esperaba una expresión de tipo '{result.return_type}' pero se encontró una expresión de tipo '{node.expr.return_type}'")
+        if node.op == '=' and isinstance(result, (VarDeclStmt, Parameter)) and not compatible(result.type_, expr_type):
+            self.error(node, f"Error de checker. Se esperaba una expresión de tipo '{result.type_}' pero se encontró una expresión de tipo '{expr_type}'")
+        self.store(result, None if node.op == '=' else node.op[0], node.expr)
         
-        # return result.return_type
+        # La asignación no tiene valor
+        return self.typed(node)
     
     # Añadidos operadores de incremento y decremento
 
@@ -459,45 +793,47 @@ class Checker(Visitor):
         '''
         Visitar la expresión
         '''
-        self.visit(node.expr, env)
+        self.increment(node, env)
+        return self.typed(node)
     
     def visit(self, node: AssignPreFix, env: SymbolTable):
         '''
         Visitar la expresión
         '''
-        self.visit(node.expr, env)
+        self.increment(node, env)
+        return self.typed(node)
+
+    def increment(self, node, env: SymbolTable):
+        '''
+        ++ y -- le asignan a la variable su valor más o menos 1
+        '''
+        if isinstance(node.expr, VarExpr):
+            self.store(self.resolve(node.expr, env), node.op[0], None)
+        else:
+            self.visit(node.expr, env)
     
     # ***************************************************
     
     def visit(self, node: Set, env: SymbolTable):
         '''
-        1. Buscar objeto en la tabla de símbolos
-        2. Buscar nombre en la tabla de símbolos
-        3. Visitar la expresión
-        
+        1. Visitar el objeto
+        2. Visitar la expresión
+
+        Los atributos se crean al asignarlos, así que el nombre se busca
+        en ejecución
         '''
 
         self.visit(node.obj, env)
-        name = env.getSymbol(node.name)
-
-        if name is None:
-            self.error(node, f"Error de checker. El nombre (set) '{node.name}' no ha sido declarado")
-        
         self.visit(node.expr, env)
 
     def visit(self, node: Get, env: SymbolTable):
         '''
-        1. Buscar objeto en la tabla de símbolos
-        2. Buscar nombre en la tabla de símbolos
+        Visitar el objeto. El atributo o método depende de la clase de la
+        instancia, que se conoce en ejecución, así que no tiene tipo probado
         '''
 
         self.visit(node.obj, env)
-        name = env.getSymbol(node.name)
-
-        if name is None:
-            self.error(node, f"Error de checker. El nombre (Get) '{node.name}' no ha sido declarado")
-        
-        return name.return_type
+        return node.static_type
     
     def visit(self, node: ThisExpr, env: SymbolTable):
         '''
@@ -0,0 +1,577 @@
+'''
+
+Compilador a clausuras para Mini C++.
+
+El AST (ya revisado por el Checker) se recorre una sola vez y cada nodo
+se convierte en una clausura de Python con sus hijos ya enlazados. Al
+ejecutar el programa sólo se invocan esas clausuras, de modo que ya no
+se despacha por el tipo del nodo en cada visita como ocurre en el
+Interpreter.
+
+- Las expresiones se compilan a funciones `fn(env) -> valor`.
+- Las instrucciones se compilan a funciones `fn(env) -> señal`, donde la
+  señal es None (flujo normal), BREAK, CONTINUE o un objeto Return.
+- Las variables viven en marcos de tamaño fijo (Frame), en el slot que
+  les asigna el Resolver, igual que en el Interpreter de referencia: los
+  bloques ocultan las variables de los bloques exteriores y asignar a una
+  variable global o de una función externa la modifica en su marco.
+
+'''
+
+from CppAST import *
+from CppInterpreter import _is_truthy, Class, MiniCExit, AttributeError, Instance, Method, TailCall, BREAK, CONTINUE, Return, member_name
+from CppResolver import Resolver, GlobalScope, Frame, GLOBAL
+from rich import print
+from stdlib import *
+
+import operator
+
+_NUMERIC = (int, float)
+
+
+class CompiledFunction:
+    '''
+    Función de Mini C++ cuyo cuerpo ya fue compilado a una clausura.
+    '''
+
+    def __init__(self, node, body, env):
+        self.node = node
+        self.body = body
+        self.env = env
+        self.size = node.frame_size
+        # Los destructores no tienen parámetros
+        params = getattr(node, 'params', [])
+        self.params = len(params) if params is not None else None
+
+    @property
+    def arity(self) -> int:
+        return len(self.node.params)
+
+    def check_arity(self, args):
+        if self.params is not None and len(args) != self.params:
+            raise CallError(f"Interp Error. Expected {self.params} arguments but got {len(args)}")
+
+    def __call__(self, interp, *args):
+        self.check_arity(args)
+        return self.invoke(interp, args)
+
+    def invoke(self, interp, args):
+        '''
+        Ejecuta la función con argumentos cuya cantidad ya se revisó
+        '''
+        function = self
+        while True:
+            # Los parámetros (y 'this' en los métodos) ocupan los primeros slots
+            values = [None] * function.size
+            values[:len(args)] = args
+
+            result = function.body(Frame(values, function.env))
+            if result.__class__ is not Return:
+                return None
+            value = result.value
+            if value.__class__ is not TailCall:
+                return value
+            # La llamada de cola reemplaza a esta en lugar de anidarse
+            function, args = value.function, value.args
+
+    def bind(self, instance):
+        return Method(self, instance)
+
+
+class Compiler(Visitor):
+    '''
+    Visitante que traduce cada nodo del AST a una clausura.
+    '''
+
+    def __init__(self, interp):
+        self.interp = interp
+        self.ctxt = interp.ctxt
+        # Lista de valores del marco global; el Resolver la agranda en su lugar
+        self.globals = interp.globals.frame.values
+
+    @classmethod
+    def compile(cls, node, interp):
+        return cls(interp).visit(node)
+
+    def _numeric_error(self, node, plural=True):
+        error = self.interp.error
+        if plural:
+            message = f"Interp Error. In '{node.op}', operands must be numeric"
+        else:
+            message = f"Interp Error. In '{node.op}', operand must be numeric"
+
+        def fail():
+            error(node, message)
+        return fail
+
+    def _block(self, stmts):
+        '''
+        Compila una secuencia de instrucciones. Las señales distintas de
+        None (break, continue, return) cortan la secuencia.
+        '''
+        code = tuple(self.visit(stmt) for stmt in stmts)
+        if len(code) == 1:
+            return code[0]
+
+        def block(env):
+            for stmt in code:
+                signal = stmt(env)
+                if signal is not None:
+                    return signal
+        return block
+
+    def _optional(self, node):
+        if node is None:
+            return lambda env: None
+        return self.visit(node)
+
+    def _values(self, depth):
+        '''
+        Clausura que devuelve la lista de valores del marco donde está una
+        variable: el actual, el global o uno que está depth niveles arriba
+        '''
+        if depth == 0:
+            return lambda env: env.values
+        if depth == GLOBAL:
+            values = self.globals
+            return lambda env: values
+
+        def outer(env):
+            for _ in range(depth):
+                env = env.parent
+            return env.values
+        return outer
+
+    def _store(self, slot, expr):
+        '''
+        Guarda el valor de expr en el slot de una declaración del marco actual
+        '''
+        def store(env):
+            env.values[slot] = expr(env)
+        return store
+
+    # Declaraciones
+
+    def visit(self, node: Program):
+        # La biblioteca estándar ya está en el marco global (GlobalScope)
+        return self._block(node.decl)
+
+    def visit(self, node: CompoundStmt):
+        return self._block(node.stmts)
+
+    def visit(self, node: ClassDeclStmt):
+        members = [(member_name(memb), self.visit(memb.body), memb)
+                   for memb in node.class_members if not isinstance(memb, VarDeclStmt)]
+        fields = [(memb.name, self.visit(memb.expr) if memb.expr else None)
+                  for memb in node.class_members if isinstance(memb, VarDeclStmt)]
+        name = node.name
+        slot = node.slot
+
+        def class_decl(env):
+            class_members = {}
+            for memb_name, body, memb in members:
+                class_members[memb_name] = CompiledFunction(memb, body, env)
+            values = {field: expr(env) if expr is not None else None for field, expr in fields}
+            env.values[slot] = Class(name, class_members, values)
+        return class_decl
+
+    def _func_decl(self, node):
+        body = self.visit(node.body)
+        slot = node.slot
+
+        def func_decl(env):
+            env.values[slot] = CompiledFunction(node, body, env)
+        return func_decl
+
+    def visit(self, node: FuncDeclStmt):
+        return self._func_decl(node)
+
+    def visit(self, node: ConstructorDeclStmt):
+        return self._func_decl(node)
+
+    def visit(self, node: DestructorDeclStmt):
+        return self._func_decl(node)
+
+    def visit(self, node: VarDeclStmt):
+        if node.expr:
+            return self._store(node.slot, self.visit(node.expr))
+        return self._store(node.slot, lambda env: None)
+
+    def visit(self, node: PrintfStmt):
+        expr = self.visit(node.expr)
+
+        def printf(env):
+            print(expr(env))
+        return printf
+
+    def visit(self, node: IfStmt):
+        cond = self.visit(node.cond)
+        then_stmt = self.visit(node.then_stmt)
+        if node.else_stmt:
+            else_stmt = self.visit(node.else_stmt)
+
+            def if_else(env):
+                if _is_truthy(cond(env)):
+                    return then_stmt(env)
+                return else_stmt(env)
+            return if_else
+
+        def if_then(env):
+            if _is_truthy(cond(env)):
+                return then_stmt(env)
+        return if_then
+
+    def visit(self, node: WhileStmt):
+        cond = self.visit(node.cond)
+        body = self.visit(node.body_stmt)
+
+        def while_stmt(env):
+            while _is_truthy(cond(env)):
+                signal = body(env)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+        return while_stmt
+
+    def visit(self, node: ForStmt):
+        init = self._optional(node.init)
+        cond = self.visit(node.cond) if node.cond is not None else (lambda env: True)
+        update = self._optional(node.update)
+        body = self.visit(node.body_stmt)
+
+        def for_stmt(env):
+            init(env)
+            while _is_truthy(cond(env)):
+                signal = body(env)
+                if signal is not None:
+                    if signal is BREAK:
+                        break
+                    if signal is not CONTINUE:
+                        return signal
+                update(env)
+        return for_stmt
+
+    def visit(self, node: ReturnStmt):
+        if node.expr is None:
+            return lambda env: Return(None)
+        if isinstance(node.expr, CallExpr):
+            return self.tail_call(node.expr)
+        expr = self.visit(node.expr)
+
+        def return_stmt(env):
+            return Return(expr(env))
+        return return_stmt
+
+    def tail_call(self, node):
+        '''
+        return f(...): si f es una función de Mini C++ se devuelve la
+        llamada para que CompiledFunction la ejecute sin anidarla
+        '''
+        func = self.visit(node.func)
+        args = tuple(self.visit(arg) for arg in node.args) if node.args is not None else ()
+        interp = self.interp
+        error = interp.error
+        ctxt = self.ctxt
+
+        def tail_call(env):
+            callee = func(env)
+            if not callable(callee):
+                error(node.func, f'Interp error {ctxt.find_source(node.func)!r} no es invocable')
+            values = [arg(env) for arg in args]
+            try:
+                if callee.__class__ is CompiledFunction:
+                    callee.check_arity(values)
+                    return Return(TailCall(callee, values))
+                return Return(callee(interp, *values))
+            except CallError as err:
+                error(node.func, str(err))
+        return tail_call
+
+    def visit(self, node: ExprStmt):
+        expr = self.visit(node.expr)
+
+        def expr_stmt(env):
+            expr(env)
+        return expr_stmt
+
+    def visit(self, node: BreakStmt):
+        return lambda env: BREAK
+
+    def visit(self, node: ContinueStmt):
+        return lambda env: CONTINUE
+
+    def visit(self, node: SizeStmt):
+        expr = self.visit(node.expr)
+
+        def size(env):
+            len(expr(env))
+        return size
+
+    def visit(self, node: NullStmt):
+        return lambda env: None
+
+    # Expresiones
+
+    def visit(self, node: LiteralExpr):
+        value = node.value
+        return lambda env: value
+
+    def visit(self, node: BinaryOpExpr):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = node.op
+        if node.operand_type is not None:
+            # El Checker probó que ambos operandos son numéricos
+            return _TYPED[op](left, right)
+        fail = self._numeric_error(node)
+
+        if op == '+':
+            def binop(env):
+                l = left(env)
+                r = right(env)
+                if not (isinstance(l, str) and isinstance(r, str)):
+                    if not (isinstance(l, _NUMERIC) and isinstance(r, _NUMERIC)):
+                        fail()
+                return l + r
+        elif op == '==':
+            def binop(env):
+                return left(env) == right(env)
+        elif op == '!=':
+            def binop(env):
+                return left(env) != right(env)
+        elif op in _ARITHMETIC:
+            binop = _ARITHMETIC[op](left, right, fail)
+        else:
+            raise NotImplementedError(f"Interp Error. Binary operator '{op}' not implemented")
+        return binop
+
+    def visit(self, node: UnaryOpExpr):
+        expr = self.visit(node.expr)
+        if node.op == '-' and node.static_type is not None:
+            return lambda env: - expr(env)
+        elif node.op == '-':
+            fail = self._numeric_error(node, plural=False)
+
+            def neg(env):
+                value = expr(env)
+                if not isinstance(value, _NUMERIC):
+                    fail()
+                return - value
+            return neg
+        elif node.op == '!':
+            return lambda env: not _is_truthy(expr(env))
+        else:
+            raise NotImplementedError(f"Interp Error. Unary operator '{node.op}' not implemented")
+
+    def visit(self, node: LogicalExpr):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if node.op == '||':
+            def logical_or(env):
+                value = left(env)
+                return value if _is_truthy(value) else right(env)
+            return logical_or
+        if node.op == '&&':
+            def logical_and(env):
+                value = left(env)
+                return right(env) if _is_truthy(value) else value
+            return logical_and
+        raise NotImplementedError(f"Interp Error. Logical operator '{node.op}' not implemented")
+
+    def visit(self, node: VarExpr):
+        slot = node.slot
+        if node.depth == 0:
+            return lambda env: env.values[slot]
+        if node.depth == GLOBAL:
+            values = self.globals
+            return lambda env: values[slot]
+        values = self._values(node.depth)
+        return lambda env: values(env)[slot]
+
+    def visit(self, node: CallExpr):
+        func = self.visit(node.func)
+        args = tuple(self.visit(arg) for arg in node.args) if node.args is not None else ()
+        interp = self.interp
+        error = interp.error
+        ctxt = self.ctxt
+
+        def call(env):
+            callee = func(env)
+            if not callable(callee):
+                error(node.func, f'Interp error {ctxt.find_source(node.func)!r} no es invocable')
+            try:
+                return callee(interp, *[arg(env) for arg in args])
+            except CallError as err:
+                error(node.func, str(err))
+        return call
+
+    def visit(self, node: AssignExpr):
+        slot = node.slot
+        expr = self.visit(node.expr)
+        if node.op not in _AUGMENTED:
+            if node.op != '=':
+                expr = lambda env: 0
+            if node.depth == 0:
+                return self._store(slot, expr)
+            values = self._values(node.depth)
+
+            def assign(env):
+                values(env)[slot] = expr(env)
+            return assign
+
+        operation = _AUGMENTED[node.op]
+        if node.depth == 0:
+            def assign(env):
+                values = env.values
+                values[slot] = operation(values[slot], expr(env))
+            return assign
+        values = self._values(node.depth)
+
+        def assign(env):
+            frame = values(env)
+            frame[slot] = operation(frame[slot], expr(env))
+        return assign
+
+    def _increment(self, node, prefix):
+        var = node.expr
+        slot = var.slot
+        values = self._values(var.depth)
+        step = 1 if node.op == '++' else -1
+        if prefix:
+            def increment(env):
+                frame = values(env)
+                value = frame[slot] = frame[slot] + step
+                return value
+        else:
+            def increment(env):
+                frame = values(env)
+                value = frame[slot]
+                frame[slot] = value + step
+                return value
+        return increment
+
+    def visit(self, node: AssignPostFix):
+        return self._increment(node, prefix=False)
+
+    def visit(self, node: AssignPreFix):
+        return self._increment(node, prefix=True)
+
+    def visit(self, node: Set):
+        obj = self.visit(node.obj)
+        expr = self.visit(node.expr)
+        name = node.name
+        error = self.interp.error
+        ctxt = self.ctxt
+
+        def set_attr(env):
+            instance = obj(env)
+            value = expr(env)
+            if isinstance(instance, Instance):
+                instance.set(name, value)
+                return value
+            error(node.obj, f'Interp Error{ctxt.find_source(node.obj)!r} is not an instance')
+        return set_attr
+
+    def visit(self, node: Get):
+        obj = self.visit(node.obj)
+        name = node.name
+        error = self.interp.error
+        ctxt = self.ctxt
+
+        def get_attr(env):
+            instance = obj(env)
+            if isinstance(instance, Instance):
+                try:
+                    return instance.get(name)
+                except AttributeError as err:
+                    error(node.obj, str(err))
+            error(node.obj, f'Interp Error{ctxt.find_source(node.obj)!r}  is not an instance')
+        return get_attr
+
+    def visit(self, node: ThisExpr):
+        slot = node.slot
+        values = self._values(node.depth)
+        return lambda env: values(env)[slot]
+
+
+def _arithmetic(operation):
+    '''
+    Construye el generador de clausuras para un operador numérico
+    '''
+    def build(left, right, fail):
+        def binop(env):
+            l = left(env)
+            r = right(env)
+            if not (isinstance(l, _NUMERIC) and isinstance(r, _NUMERIC)):
+                fail()
+            return operation(l, r)
+        return binop
+    return build
+
+_ARITHMETIC = {
+    '-': _arithmetic(operator.sub),
+    '*': _arithmetic(operator.mul),
+    '/': _arithmetic(operator.truediv),
+    '%': _arithmetic(operator.mod),
+    '<': _arithmetic(operator.lt),
+    '<=': _arithmetic(operator.le),
+    '>': _arithmetic(operator.gt),
+    '>=': _arithmetic(operator.ge),
+}
+
+# Clausuras para operandos que el Checker probó numéricos: no revisan los
+# valores. La prueba supone los ámbitos del Checker (un bloque oculta la
+# variable del bloque exterior), que son los que da el Resolver a los marcos.
+_TYPED = {
+    '+': lambda left, right: lambda env: left(env) + right(env),
+    '-': lambda left, right: lambda env: left(env) - right(env),
+    '*': lambda left, right: lambda env: left(env) * right(env),
+    '/': lambda left, right: lambda env: left(env) / right(env),
+    '%': lambda left, right: lambda env: left(env) % right(env),
+    '==': lambda left, right: lambda env: left(env) == right(env),
+    '!=': lambda left, right: lambda env: left(env) != right(env),
+    '<': lambda left, right: lambda env: left(env) < right(env),
+    '<=': lambda left, right: lambda env: left(env) <= right(env),
+    '>': lambda left, right: lambda env: left(env) > right(env),
+    '>=': lambda left, right: lambda env: left(env) >= right(env),
+}
+
+_AUGMENTED = {
+    '+=': operator.add,
+    '-=': operator.sub,
+    '*=': operator.mul,
+    '/=': operator.truediv,
+    '%=': operator.mod,
+}
+
+
+class ClosureInterpreter:
+    '''
+    Motor de ejecución que compila el AST a clausuras y luego las ejecuta.
+    Expone la misma interfaz que Interpreter (interpret, error, env).
+    '''
+
+    def __init__(self, ctxt):
+        self.ctxt = ctxt
+        self.globals = GlobalScope()
+        self.env = self.globals.frame
+
+    def error(self, position, message):
+        self.ctxt.error(position, message)
+        raise MiniCExit()
+
+    # Punto de entrada alto-nivel
+    def interpret(self, node):
+        try:
+            self.ctxt.check(node)
+            if not self.ctxt.have_errors:
+                node = self.ctxt.optimize(node)
+                Resolver.resolve(node, self.ctxt, self.globals)
+            if not self.ctxt.have_errors:
+                code = Compiler.compile(node, self)
+                code(self.env)
+            else: print("\n The interpreter could not start because the Checker returned errors")
+        except MiniCExit as e:
+            pass
@@ -8,42 +8,299 @@ y la ejecución de un programa mini cpp
 from CppLexer import CppLexer
 from CppParser import CppParser
 from CppInterpreter import Interpreter
+from CppAdaptive import AdaptiveInterpreter
+from CppCompiler import ClosureInterpreter
+from CppVM import VM
+from CppTranspiler import PythonBackend
+from CppCache import Cache
+from CppOptimizer import Optimizer, count_nodes
+from CppChecker import Checker
+from CppTelemetry import Telemetry
+from CppTrace import TraceWriter, TracingInterpreter
+from CppAST import NODE_CLASSES, NODE_FIELDS, NODE_IDS
 from rich import print
 
+import contextlib
+import marshal
+import sys
+import threading
+import zlib
 import CppAST
 
+# La forma de las clases del AST es parte de la clave de la caché, así que
+# un cambio en CppAST invalida los ASTs guardados
+AST_SIGNATURE = repr([(cls.__name__, NODE_FIELDS[cls]) for cls in NODE_CLASSES])
+
+# Los programas se ejecutan en un hilo con una pila de este tamaño (sólo
+# se reserva la memoria que se usa) y con este límite de recursión, para
+# que la profundidad de la recursión de Mini C++ la limite la memoria y
+# no la pila del hilo principal
+STACK_SIZE = 1024 * 1024 * 1024
+
+_NO_PHASE = contextlib.nullcontext()
+RECURSION_LIMIT = 3_000_000
+
+# El tamaño de pila de los hilos nuevos y el límite de recursión son de
+# todo el proceso. El lock evita que dos ejecuciones cambien el tamaño de
+# pila a la vez, y el límite se sube mientras haya al menos un hilo de pila
+# grande corriendo (_deep_runs) y se restaura cuando termina el último
+_deep_lock = threading.Lock()
+_deep_runs = 0
+_saved_limit = None
+
+
+def _raise_recursion_limit():
+    global _deep_runs, _saved_limit
+    with _deep_lock:
+        if _deep_runs == 0:
+            _saved_limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(max(_saved_limit, RECURSION_LIMIT))
+        _deep_runs += 1
+
+
+def _restore_recursion_limit():
+    global _deep_runs
+    with _deep_lock:
+        _deep_runs -= 1
+        if _deep_runs == 0:
+            sys.setrecursionlimit(_saved_limit)
+
+
+def run_with_deep_stack(function, *args):
+    '''
+    Ejecuta function(*args) en un hilo con una pila grande y devuelve su
+    resultado; las excepciones se propagan al hilo que llama. El límite de
+    recursión sólo está subido mientras corre el hilo, aunque el que llama
+    deje de esperarlo (Ctrl+C)
+    '''
+    outcome = {}
+
+    def target():
+        try:
+            _raise_recursion_limit()
+            try:
+                outcome['value'] = function(*args)
+            finally:
+                _restore_recursion_limit()
+        except BaseException as err:
+            outcome['error'] = err
+
+    thread = threading.Thread(target=target, daemon=True)
+    with _deep_lock:
+        old_size = threading.stack_size()
+        try:
+            threading.stack_size(STACK_SIZE)
+            thread.start()
+        finally:
+            threading.stack_size(old_size)
+    # join() con espera para que Ctrl+C llegue al hilo principal
+    while thread.is_alive():
+        thread.join(0.1)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value')
+
+
 class Context:
 
-    def __init__(self):
+    def __init__(self, cache=None, optimize=True, memoize=False, stats=False, trace=None):
+        # Caché en disco de ASTs (None: la caché por defecto, False: sin caché)
+        self.cache = Cache() if cache is None else (cache or None)
+        # Optimizaciones del AST que aplican los motores después del Checker
+        self.optimizer = Optimizer(self) if optimize else None
+        # El intérprete de árbol guarda los resultados de las funciones puras
+        self.memoize = memoize
+        # Tiempos, memoria y tamaños de cada fase (ver CppTelemetry), o None
+        self.stats = Telemetry() if stats else None
+        # Traza de las fases y las llamadas (ver CppTrace) que se escribe en
+        # el archivo 'trace', o None. Hay que cerrarla con trace.close()
+        self.trace = TraceWriter(trace) if trace else None
         self.lexer = CppLexer(self)
         self.parser = CppParser(self)
-        self.interp = Interpreter(self)
+        self.interp = Interpreter(self) if self.trace is None else TracingInterpreter(self)
+        # Motores de ejecución disponibles. 'tree' es el intérprete de referencia
+        self.engines = {
+            'tree': self.interp,
+            'adaptive': AdaptiveInterpreter(self),
+            'closure': ClosureInterpreter(self),
+            'vm': VM(self),
+            'python': PythonBackend(self),
+        }
         self.source = ''
         self.ast = None
         self.have_errors = False
 
-    #Se pone en marcha el parser
+    #Se pone en marcha el parser; si el fuente ya se analizó antes se toma el AST de la caché
     def parse(self, source):
         self.have_errors = False
         self.source = source
-        self.ast = self.parser.parse(self.lexer.tokenize(source))
 
-    #Se ejecuta el programa con el intérprete
-    def run(self):
+        key = None
+        if self.cache:
+            key = self.cache.key('ast', f'{AST_SIGNATURE}\n{source}')
+            data = self.cache.load(key)
+            if data is not None:
+                try:
+                    with self.phase('load'):
+                        self.ast = self.load_ast(data)
+                    self.count_nodes()
+                    return
+                except (zlib.error, EOFError, IndexError, TypeError, ValueError):
+                    pass
+
+        self.parser.syntax_errors = 0
+        if self.stats is None and self.trace is None:
+            self.ast = self.parser.parse(self.lexer.tokenize(source))
+            self.attach_positions()
+        else:
+            # Con telemetría o traza los tokens se leen antes para medir cada fase
+            with self.phase('lex'):
+                tokens = list(self.lexer.tokenize(source))
+            if self.stats is not None:
+                self.stats.tokens = len(tokens)
+            with self.phase('parse'):
+                self.ast = self.parser.parse(iter(tokens))
+                self.attach_positions()
+            self.count_nodes()
+
+        if key and self.ast is not None and not (self.have_errors or self.parser.syntax_errors):
+            try:
+                self.cache.store(key, self.dump_ast(self.ast))
+            except (RecursionError, ValueError):
+                pass
+
+    def attach_positions(self):
+        '''
+        Pasa a cada nodo del AST la posición que registró sly y vacía las
+        tablas del parser. sly guarda la posición de todos los valores de
+        las producciones (listas, nombres, símbolos intermedios...) en dos
+        diccionarios por id() que nunca se limpian; en el nodo ocupa un
+        solo entero.
+        '''
+        lines = getattr(self.parser, '_line_positions', None)
+        if lines is None:
+            return
+        indices = self.parser._index_positions
+
+        pending = [self.ast]
+        while pending:
+            value = pending.pop()
+            if type(value) is list:
+                pending.extend(value)
+            elif isinstance(value, CppAST.ASTNode):
+                lineno = lines.get(id(value))
+                start, end = indices.get(id(value), (None, None))
+                if lineno is not None and start is not None:
+                    CppAST.set_position(value, lineno, start, end)
+                pending.extend(getattr(value, name) for name in NODE_FIELDS[type(value)])
+
+        self.parser._line_positions = {}
+        self.parser._index_positions = {}
+        # sly también conserva la pila de símbolos del último análisis, que
+        # mantiene vivo el Program anterior
+        self.parser.symstack = self.parser.statestack = None
+
+    def dump_ast(self, ast):
+        '''
+        Forma binaria compacta del AST: cada nodo es una tupla
+        (clase, posición, *campos) serializada con marshal y comprimida
+        '''
+        def encode(value):
+            cls = type(value)
+            if cls in NODE_IDS:
+                return (NODE_IDS[cls], getattr(value, '_pos', None),
+                        *[encode(getattr(value, name)) for name in NODE_FIELDS[cls]])
+            if cls is list:
+                return [encode(item) for item in value]
+            return value
+
+        return zlib.compress(marshal.dumps(encode(ast)), 1)
+
+    def load_ast(self, data):
+        '''
+        Reconstruye el AST con las posiciones de sus nodos
+        '''
+        def decode(value):
+            if type(value) is tuple:
+                index, pos, *fields = value
+                node = NODE_CLASSES[index](*[decode(f) for f in fields])
+                if pos is not None:
+                    node._pos = pos
+                return node
+            if type(value) is list:
+                return [decode(item) for item in value]
+            return value
+
+        return decode(marshal.loads(zlib.decompress(data)))
+
+    #Se ejecuta el programa con el motor indicado (por defecto el intérprete)
+    def run(self, mode='tree'):
+        if mode not in self.engines:
+            raise ValueError(f"Modo de ejecución desconocido '{mode}'. Opciones: {', '.join(self.engines)}")
         if not self.have_errors:
-            return self.interp.interpret(self.ast)
+            with self.phase('execute'):
+                return self.execute(self.engines[mode].interpret, self.ast)
+
+    def execute(self, function, *args):
+        '''
+        Ejecuta un motor con pila profunda y reporta como error de Mini C++
+        una recursión que aun así se queda sin espacio
+        '''
+        try:
+            return run_with_deep_stack(function, *args)
+        except RecursionError:
+            self.error(None, 'Interp Error. Maximum recursion depth exceeded')
+
+    def phase(self, name):
+        '''
+        Mide la fase 'name' en self.stats y la registra en self.trace (no
+        hace nada sin telemetría ni traza)
+        '''
+        if self.trace is None:
+            return _NO_PHASE if self.stats is None else self.stats.phase(name)
+        if self.stats is None:
+            return self.trace.phase(name)
+        phase = contextlib.ExitStack()
+        phase.enter_context(self.stats.phase(name))
+        phase.enter_context(self.trace.phase(name))
+        return phase
+
+    def count_nodes(self):
+        if self.stats is not None and self.ast is not None:
+            self.stats.nodes = count_nodes(self.ast)
+
+    #Análisis semántico que piden los motores antes de ejecutar
+    def check(self, node):
+        with self.phase('check'):
+            checker = Checker.check(node, self)
+        if self.stats is not None:
+            self.stats.symbols, self.stats.scopes = checker.symtable.size()
+        return checker
+
+    #Optimiza un AST ya revisado por el Checker (si las optimizaciones están activas)
+    def optimize(self, node):
+        if self.optimizer is None:
+            return node
+        with self.phase('optimize'):
+            return self.optimizer.optimize(node)
+
+    #Se ejecuta el programa transpilado a Python; si está en la caché no se analiza
+    def run_python(self, source):
+        self.have_errors = False
+        self.source = source
+        return self.execute(self.engines['python'].run_source, source)
 
     def find_source(self, node):
-        indices = self.parser.index_position(node)
-        if indices:
-            return self.source[indices[0]:indices[1]]
+        position = CppAST.get_position(node)
+        if position:
+            return self.source[position[1]:position[2]]
         else:
             return f'{type(node).__name__} (source not available)'
         
     def error(self, position, message):
-        if isinstance(position, CppAST.ASTNode):
-            lineno = self.parser.line_position(position)
-            (start, end) = (part_start, part_end) = self.parser.index_position(position)
+        if isinstance(position, CppAST.ASTNode) and CppAST.get_position(position):
+            lineno, start, end = CppAST.get_position(position)
+            (part_start, part_end) = (start, end)
 
             while start >= 0 and self.source[start] != '\n':
                 start -= 1
@@ -0,0 +1,113 @@
+'''
+
+Contadores de ejecución por nodo para Mini C++.
+
+CountingInterpreter es el Interpreter de referencia con un 'visit' que
+cuenta cada nodo que ejecuta (counts, por id del nodo) antes de despachar
+a su manejador. El Interpreter normal no cambia: sólo esta subclase paga
+el costo de contar.
+
+Como el Interpreter visita cada hijo con self.visit, la dirección de las
+ramas sale de los contadores:
+
+- IfStmt: veces que se ejecutó then_stmt contra el resto;
+- WhileStmt y ForStmt: evaluaciones de la condición que entraron al
+  cuerpo contra las que salieron del ciclo;
+- LogicalExpr: veces que se evaluó el operando derecho contra las que la
+  expresión se resolvió sólo con el izquierdo.
+
+listing() arma el fuente anotado con las ejecuciones de cada línea en el
+margen. Los contadores también sirven de información de perfil para los
+motores que especializan o expanden código (count y branches).
+
+'''
+
+from CppAST import *
+from CppInterpreter import Interpreter
+from CppOptimizer import walk
+from collections import defaultdict
+from tabulate import tabulate
+
+
+class CountingInterpreter(Interpreter):
+    '''
+    Interpreter que cuenta las ejecuciones de cada nodo
+    '''
+
+    def __init__(self, ctxt):
+        super().__init__(ctxt)
+        self.counts = defaultdict(int)
+        # Programa ejecutado (ya optimizado)
+        self.program = None
+
+    def visit(self, node, *args):
+        self.counts[id(node)] += 1
+        return self._visit_table[node.__class__](self, node, *args)
+
+    def visit(self, node: Program):
+        self.program = node
+        return Interpreter._visit_table[Program](self, node)
+
+    def count(self, node):
+        '''
+        Veces que se ejecutó el nodo
+        '''
+        return self.counts.get(id(node), 0) if node is not None else 0
+
+    def branches(self):
+        '''
+        (nodo, tomada, no tomada) de cada decisión que se ejecutó alguna vez
+        '''
+        result = []
+        for node in walk(self.program):
+            if isinstance(node, IfStmt):
+                total, taken = self.count(node), self.count(node.then_stmt)
+            elif isinstance(node, (WhileStmt, ForStmt)) and node.cond is not None:
+                total, taken = self.count(node.cond), self.count(node.body_stmt)
+            elif isinstance(node, LogicalExpr):
+                total, taken = self.count(node), self.count(node.right)
+            else:
+                continue
+            if total:
+                result.append((node, taken, total - taken))
+        return result
+
+    def lines(self):
+        '''
+        Ejecuciones por línea: el máximo entre las sentencias que empiezan
+        en ella y sus expresiones directas (la condición de un ciclo se
+        ejecuta una vez más que el cuerpo). Las subexpresiones no cuentan,
+        porque algunas se visitan más de una vez por ejecución.
+        '''
+        lines = {}
+        for node in walk(self.program):
+            if not isinstance(node, Statement):
+                continue
+            values = [getattr(node, name) for name in NODE_FIELDS[type(node)]]
+            for value in [node] + [value for value in values if isinstance(value, Expression)]:
+                position = get_position(value)
+                if position:
+                    lines[position[0]] = max(lines.get(position[0], 0), self.count(value))
+        return lines
+
+    def listing(self, source):
+        '''
+        Fuente con las ejecuciones de cada línea en el margen. '#####'
+        marca una línea con código que nunca se ejecutó y '-' una sin nodos.
+        '''
+        lines = self.lines()
+        width = max([len(str(count)) for count in lines.values()] + [5])
+        result = []
+        for lineno, text in enumerate(source.splitlines(), 1):
+            count = lines.get(lineno)
+            mark = '-' if count is None else str(count) if count else '#####'
+            result.append(f'{mark:>{width}}:{lineno:>5}: {text}')
+        return '\n'.join(result)
+
+    def branch_table(self):
+        table = [["Línea", "Decisión", "Tomada", "No tomada"]]
+        for node, taken, not_taken in self.branches():
+            position = get_position(node)
+            kind = node.op if isinstance(node, LogicalExpr) else type(node).__name__
+            table.append([position[0] if position else '', kind, taken, not_taken])
+        return tabulate(table, headers="firstrow", tablefmt="fancy_grid")
@@ -22,13 +22,38 @@ inválidas o el acceso a variables no inicializadas.
 
 '''
 
-from collections import ChainMap
 from CppAST import *
-from CppChecker import Checker
+from CppResolver import Resolver, GlobalScope, Frame, GLOBAL
+from CppPurity import Purity
+from collections import OrderedDict
 from rich import print
 from stdlib import *
 
 import math
+import operator
+import os
+
+# Operadores binarios sobre operandos que el Checker probó numéricos
+# ('int' o 'float'): se aplican sin revisar los valores
+_NUMERIC_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+# Tamaño de la caché de cada función memorizada (MemoFunction)
+MEMO_SIZE = int(os.environ.get('MINICPP_MEMO_SIZE', 4096))
+
+# Argumentos que pueden ser la clave de la caché de una MemoFunction
+_MEMO_TYPES = (int, float, bool, str, type(None))
 
 # Veracidad en Mini C++
 def _is_truthy(value):
@@ -39,18 +64,32 @@ def _is_truthy(value):
     else:
         return True
     
-class ReturnException(Exception):
+# Señales de control de flujo que devuelven las instrucciones: None (flujo
+# normal), BREAK, CONTINUE o un objeto Return. Los bloques y los ciclos
+# las propagan hasta el ciclo o la función que las consume.
+BREAK = object()
+CONTINUE = object()
+
+class Return:
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
-class BreakException(Exception):
-    pass
+class TailCall:
+    '''
+    Llamada en posición de cola (return f(...)). La función que la hace
+    la devuelve como resultado y Function.__call__ la ejecuta en el mismo
+    ciclo, así la recursión de cola no anida marcos de Python.
+    '''
+    __slots__ = ('function', 'args')
 
-class ContinueException(Exception):
-    pass
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
 
-class ContinueException(Exception):
-    pass
+# Resultado de Interpreter.member() para un atributo creado al asignarlo
+_DYNAMIC = (None, None, None)
 
 class MiniCExit(BaseException):
     pass
@@ -68,50 +107,137 @@ class Function:
     def arity(self) -> int:
         return len(self.node.params)
 
-    def __call__(self, interp, *args):
+    def check_arity(self, args):
         if self.node.params is not None:
             if len(args) != len(self.node.params):
                 raise CallError(f"Interp Error. Expected {len(self.node.params)} arguments but got {len(args)}")
 
-        # Crear un nuevo entorno para los parámetros
-        newenv = self.env.new_child()
-        if self.node.params is not None:
-            for param, arg in zip(self.node.params, args):
-                newenv[param.name] = arg  # Usar el atributo `name` de cada parámetro
-
-        # Cambiar el entorno actual
-        oldenv = interp.env
-        interp.env = newenv
+    # Ganchos para las subclases que instrumentan cada activación (CppProfile,
+    # CppTrace): enter(interp, node, args) antes del cuerpo y
+    # exit(interp, result) al terminar, aunque falle. Cada llamada de cola
+    # es una activación aparte.
+    enter = exit = None
 
-        try:
-            self.node.body.accept(interp)
+    def __call__(self, interp, *args):
+        self.check_arity(args)
+        return self.invoke(interp, args)
+
+    def invoke(self, interp, args):
+        '''
+        Ejecuta la función con argumentos cuya cantidad ya se revisó
+        '''
+        function = self
+        while True:
+            # Crear un marco nuevo; los parámetros ocupan los primeros slots
+            node = function.node
+            values = [None] * node.frame_size
+            values[:len(args)] = args
+            newenv = Frame(values, function.env)
+
+            # Cambiar el entorno actual
+            oldenv = interp.env
+            interp.env = newenv
+
+            hooked = function.enter is not None
+            if hooked:
+                function.enter(interp, node, args)
             result = None
-        except ReturnException as e:
-            result = e.value
-        finally:
-            interp.env = oldenv
-        return result
+            try:
+                signal = node.body.accept(interp)
+                if signal.__class__ is Return:
+                    result = signal.value
+            finally:
+                interp.env = oldenv
+                if hooked:
+                    function.exit(interp, result)
+
+            if result.__class__ is not TailCall:
+                return result
+            # La llamada de cola reemplaza a esta en lugar de anidarse
+            function, args = result.function, result.args
 
     
     def bind(self, instance):
-        env = self.env.new_child()
-        env['this'] = instance
-        return Function(self.node, env)
-    
+        return Method(self, instance)
+
+class MemoFunction(Function):
+    '''
+    Función pura (ver CppPurity) que guarda sus resultados en una caché
+    LRU de MEMO_SIZE entradas. La clave son los argumentos y sus tipos
+    (1 y 1.0 son llamadas distintas); una llamada con un argumento que no
+    es un valor simple no pasa por la caché.
+    '''
+
+    def __init__(self, node, env):
+        super().__init__(node, env)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def invoke(self, interp, args):
+        for arg in args:
+            if arg.__class__ not in _MEMO_TYPES:
+                return Function.invoke(self, interp, args)
+        key = (*args, *[arg.__class__ for arg in args])
+        cache = self.cache
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return cache[key]
+        self.misses += 1
+        result = Function.invoke(self, interp, args)
+        cache[key] = result
+        if len(cache) > MEMO_SIZE:
+            cache.popitem(last=False)
+        return result
+
+class Method:
+    '''
+    Método enlazado a una instancia, para cuando se usa como valor
+    (p.m sin llamarlo). 'this' ocupa el slot 0 del marco del método (ver
+    Resolver), así que al llamarlo sólo se antepone a los argumentos.
+    '''
+    __slots__ = ('function', 'this')
+
+    def __init__(self, function, this):
+        self.function = function
+        self.this = this
+
+    def __call__(self, interp, *args):
+        self.function.check_arity(args)
+        return self.function.invoke(interp, (self.this,) + args)
+
+def member_name(memb):
+    '''
+    Nombre con el que una clase guarda un método. El destructor se llama
+    igual que la clase, como el constructor, así que lleva el '~'
+    '''
+    if isinstance(memb, DestructorDeclStmt):
+        return '~' + memb.name
+    return memb.name
+
 class Class:
 
-    def __init__(self, name, methods):
+    def __init__(self, name, methods, fields=None):
         self.name = name
         self.methods = methods
+        # Forma de las instancias: posición de cada atributo declarado en
+        # la clase dentro de Instance.slots, y sus valores iniciales
+        fields = fields if fields is not None else {}
+        self.shape = {name: index for index, name in enumerate(fields)}
+        self.defaults = list(fields.values())
 
     def __str__(self):
         return self.name
     
-    def __call__(self, *args):
+    def __call__(self, interp, *args):
         this = Instance(self)
-        init = self.find_method('init')
-        if init:
-            init.bind(this)(*args)
+        # El constructor se llama como la clase
+        init = self.methods.get(self.name)
+        if init is not None:
+            init.bind(this)(interp, *args)
+        elif args:
+            raise CallError(f"Interp Error. Expected 0 arguments but got {len(args)}")
         return this
 
     def find_method(self, name):
@@ -122,34 +248,47 @@ class Class:
             raise AttributeError(f"Method {name} not found in class {self.name}")
         
 class Instance: 
-    def __init__(self, kclass):
-        self.kclass = kclass
-        self.fields = {}
+    '''
+    Los atributos declarados en la clase están en una lista de tamaño fijo
+    (slots) en la posición que indica Class.shape. Los que se crean al
+    asignarlos van a un diccionario (data) que sólo existe si hace falta.
+    '''
+    __slots__ = ('klass', 'slots', 'data')
+
+    def __init__(self, klass):
+        self.klass = klass
+        self.slots = klass.defaults[:]
+        self.data = None
     
     def __str__(self):
         return self.klass.name + " instance"
     
     def get(self, name):
-        if name in self.data:
+        index = self.klass.shape.get(name)
+        if index is not None:
+            return self.slots[index]
+        if self.data is not None and name in self.data:
             return self.data[name]
-        method = self.klass.find_method(name)
-        if not method:
-            raise AttributeError(f"Method {name} not found in class {self.klass.name}")
-        return method.bind(self)
+        return self.klass.find_method(name).bind(self)
     
     def set(self, name, value):
-        self.data[name] = value
-
-ThereIsBreak=False
-ThereIsContinue=False
+        index = self.klass.shape.get(name)
+        if index is not None:
+            self.slots[index] = value
+        elif self.data is None:
+            self.data = {name: value}
+        else:
+            self.data[name] = value
 
 class Interpreter(Visitor):
 
     def __init__(self, ctxt):
         self.ctxt = ctxt
-        self.env = ChainMap()
-        self.check_env = ChainMap()
+        self.globals = GlobalScope()
+        self.env = self.globals.frame
         self.localmap = {}
+        # Funciones puras que se crearon como MemoFunction
+        self.memoized = []
 
     def _check_numeric_operands(self, node, left, right):
         if isinstance(left, (int, float)) and isinstance(right, (int, float)):
@@ -166,12 +305,29 @@ class Interpreter(Visitor):
     def error(self, position, message):
         self.ctxt.error(position, message)
         raise MiniCExit()
+
+    def _values(self, depth):
+        '''
+        Valores del marco que está depth niveles por encima del actual
+        '''
+        if depth == GLOBAL:
+            return self.globals.frame.values
+        frame = self.env
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        return frame.values
     
     # Punto de entrada alto-nivel
     def interpret(self, node):
         try:
-            Checker.check(node, self.ctxt)
+            self.ctxt.check(node)
+            if not self.ctxt.have_errors:
+                node = self.ctxt.optimize(node)
+                Resolver.resolve(node, self.ctxt, self.globals)
             if not self.ctxt.have_errors:
+                if self.ctxt.memoize:
+                    Purity.analyze(node)
                 self.visit(node)
             else: print("\n The interpreter could not start because the Checker returned errors")
         except MiniCExit as e:
@@ -181,44 +337,53 @@ class Interpreter(Visitor):
 
     def visit(self, node: CompoundStmt):
         for stmt in node.stmts:
-            self.visit(stmt)
-            if ThereIsBreak:
-                return 0
-            if ThereIsContinue:
-                return 1
+            signal = self.visit(stmt)
+            if signal is not None:
+                return signal
     
     def visit(self, node: Program):
-        for k, v in stdlibFunctions.items():
-            self.env[k] = v
-        
         for d in node.decl:
-            self.visit(d)
+            signal = self.visit(d)
+            if signal is not None:
+                return signal
     
     def visit(self, node: ClassDeclStmt):
         class_members = { }
+        fields = { }
         for memb in node.class_members:
-            class_members[memb.name] = Function(memb, self.env)
-            cls = Class(node.name, class_members)
-            self.env[node.name] = cls
+            if isinstance(memb, VarDeclStmt):
+                fields[memb.name] = self.visit(memb.expr) if memb.expr else None
+            else:
+                class_members[member_name(memb)] = self.make_function(memb)
+        self.env.values[node.slot] = Class(node.name, class_members, fields)
     
     def visit(self, node: ConstructorDeclStmt):
         func = Function(node, self.env)
-        self.env[node.name] = func
+        self.env.values[node.slot] = func
     
     def visit(self, node: DestructorDeclStmt):
         func = Function(node, self.env)
-        self.env[node.name] = func
+        self.env.values[node.slot] = func
     
     def visit(self, node: FuncDeclStmt):
-        func = Function(node, self.env)
-        self.env[node.name] = func
+        self.env.values[node.slot] = self.make_function(node)
+
+    def make_function(self, node):
+        '''
+        Función (o método) declarada por node en el entorno actual
+        '''
+        if getattr(node, 'pure', None) and self.ctxt.memoize:
+            func = MemoFunction(node, self.env)
+            self.memoized.append(func)
+            return func
+        return Function(node, self.env)
 
     def visit(self, node: VarDeclStmt):
         if node.expr:
             expr = self.visit(node.expr)
         else:
             expr = None
-        self.env[node.name] = expr
+        self.env.values[node.slot] = expr
     
     def visit(self, node: PrintfStmt):
         print(self.visit(node.expr))
@@ -226,58 +391,65 @@ class Interpreter(Visitor):
     def visit(self, node: IfStmt):
         test = self.visit(node.cond)
         if _is_truthy(test):
-            self.visit(node.then_stmt)
+            return self.visit(node.then_stmt)
         elif node.else_stmt:
-            self.visit(node.else_stmt)
+            return self.visit(node.else_stmt)
     
     def visit(self, node: WhileStmt):
-        global ThereIsContinue
-        global ThereIsBreak
-
         while _is_truthy(self.visit(node.cond)):
-            ThereIsContinue = False
-            ThereIsBreak = False
-            flowControl = self.visit(node.body_stmt)
-            if flowControl == 0:
-                 break
-            elif flowControl == 1:
-                continue
-            else:
-                pass
+            signal = self.visit(node.body_stmt)
+            if signal is not None:
+                if signal is BREAK:
+                    break
+                if signal is not CONTINUE:
+                    return signal
     
     def visit(self, node: ForStmt):
-        global ThereIsContinue
-        global ThereIsBreak
-
-        self.visit(node.init)
-        while _is_truthy(self.visit(node.cond)):
-            ThereIsContinue = False
-            ThereIsBreak = False
-            flowControl = self.visit(node.body_stmt)
-            if flowControl == 0:
-                break
-            elif flowControl == 1:
-                continue
-            else:
-                pass
-            self.visit(node.update)
+        if node.init is not None:
+            self.visit(node.init)
+        while node.cond is None or _is_truthy(self.visit(node.cond)):
+            signal = self.visit(node.body_stmt)
+            if signal is not None:
+                if signal is BREAK:
+                    break
+                if signal is not CONTINUE:
+                    return signal
+            if node.update is not None:
+                self.visit(node.update)
     
     def visit(self, node: ReturnStmt):
-        raise ReturnException(self.visit(node.expr))
+        expr = node.expr
+        if expr is None:
+            return Return(None)
+        if expr.__class__ is CallExpr:
+            if expr.func.__class__ is Get:
+                obj = self.visit(expr.func.obj)
+                _, index, method = self.member(expr.func, obj)
+                if method is not None:
+                    return Return(TailCall(method, self.method_args(expr, method, obj)))
+                return Return(self.call(expr, self.attribute(expr.func, obj, index)))
+            callee = expr.func.accept(self)
+            if isinstance(callee, Function):
+                args = [arg.accept(self) for arg in expr.args] if expr.args is not None else []
+                try:
+                    callee.check_arity(args)
+                except CallError as err:
+                    self.error(expr.func, str(err))
+                return Return(TailCall(callee, args))
+            return Return(self.call(expr, callee))
+        return Return(self.visit(expr))
 
     def visit(self, node: ExprStmt):
         self.visit(node.expr)
 
     def visit(self, node: BreakStmt):
-        global ThereIsBreak
-        ThereIsBreak = True
+        return BREAK
     
     def visit(self, node: ContinueStmt):
-        global ThereIsContinue
-        ThereIsContinue = True
+        return CONTINUE
     
     def visit(self, node: SizeStmt):
-        return len(self.visit(node.expr))
+        len(self.visit(node.expr))
     
     def visit(self, node: NullStmt):
         pass
@@ -290,6 +462,14 @@ class Interpreter(Visitor):
     def visit(self, node: BinaryOpExpr):
         left = self.visit(node.left)
         right = self.visit(node.right)
+        if node.operand_type is not None:
+            return _NUMERIC_OPERATORS[node.op](left, right)
+        return self.binary(node, left, right)
+
+    def binary(self, node, left, right):
+        '''
+        Aplica el operador binario revisando los operandos
+        '''
         if node.op == '+':
             (isinstance(left, str) and isinstance(right, str)) or self._check_numeric_operands(node, left, right)
             return left + right
@@ -327,7 +507,7 @@ class Interpreter(Visitor):
     def visit(self, node: UnaryOpExpr):
         expr = self.visit(node.expr)
         if node.op == "-":
-            self._check_numeric_operand(node, expr)
+            node.static_type is not None or self._check_numeric_operand(node, expr)
             return - expr
         elif node.op == "!":
             return not _is_truthy(expr)
@@ -343,10 +523,85 @@ class Interpreter(Visitor):
         raise NotImplementedError(f"Interp Error. Logical operator '{node.op}' not implemented")
 
     def visit(self, node: VarExpr):
-        return self.env[node.name]
+        depth = node.depth
+        if depth == 0:
+            return self.env.values[node.slot]
+        if depth == GLOBAL:
+            return self.globals.frame.values[node.slot]
+        return self._values(depth)[node.slot]
     
     def visit(self, node: CallExpr):
-        callee = node.func.accept(self)
+        if node.func.__class__ is Get:
+            return self.call_method(node)
+        return self.call(node, node.func.accept(self))
+
+    def call_method(self, node):
+        '''
+        Llamada obj.m(...): el método recibe la instancia en el slot 0 de
+        su marco sin crear un Method intermedio
+        '''
+        obj = self.visit(node.func.obj)
+        _, index, method = self.member(node.func, obj)
+        if method is None:
+            # Es un atributo que guarda un invocable
+            return self.call(node, self.attribute(node.func, obj, index))
+        return method.invoke(self, self.method_args(node, method, obj))
+
+    def member(self, node: Get, obj):
+        '''
+        Busca node.name en la clase de obj y devuelve (clase, índice,
+        método): la posición del atributo en obj.slots si la clase lo
+        declara, si no el método. Si obj tiene un atributo creado al
+        asignarlo, índice y método son None. Cada acceso guarda en su caché
+        lo que encontró en la última clase que vio, así que mientras lleguen
+        instancias de esa clase no se vuelve a buscar.
+        '''
+        if not isinstance(obj, Instance):
+            self.error(node.obj, f'Interp Error{self.ctxt.find_source(node.obj)!r}  is not an instance')
+        cache = node.cache
+        if cache is None or cache[0] is not obj.klass:
+            klass = obj.klass
+            index = klass.shape.get(node.name)
+            node.cache = cache = (klass, index, klass.methods.get(node.name) if index is None else None)
+        if cache[1] is None:
+            if obj.data is not None and node.name in obj.data:
+                return _DYNAMIC
+            if cache[2] is None:
+                self.error(node.obj, f"Method {node.name} not found in class {obj.klass.name}")
+        return cache
+
+    def attribute(self, node: Get, obj, index):
+        '''
+        Valor del atributo que encontró member()
+        '''
+        if index is not None:
+            return obj.slots[index]
+        return obj.data[node.name]
+
+    def field(self, node: Set, obj):
+        '''
+        Posición en obj.slots del atributo que asigna node, o None si la
+        clase no lo declara. Usa la caché del nodo como member()
+        '''
+        cache = node.cache
+        if cache is None or cache[0] is not obj.klass:
+            node.cache = cache = (obj.klass, obj.klass.shape.get(node.name))
+        return cache[1]
+
+    def method_args(self, node, method, obj):
+        '''
+        Argumentos de la llamada a un método, con la instancia al frente
+        '''
+        args = [obj]
+        if node.args is not None:
+            for arg in node.args:
+                args.append(arg.accept(self))
+        params = method.node.params
+        if params is not None and len(params) != len(args) - 1:
+            self.error(node.func, f"Interp Error. Expected {len(params)} arguments but got {len(args) - 1}")
+        return args
+
+    def call(self, node, callee):
         if not callable(callee):
             self.error(node.func, f'Interp error {self.ctxt.find_source(node.func)!r} no es invocable')
         
@@ -361,20 +616,21 @@ class Interpreter(Visitor):
             self.error(node.func, str(err))
     
     def visit(self, node: AssignExpr):
+        values = self._values(node.depth)
         expr = 0
         if node.op == "=":
             expr = self.visit(node.expr)
         elif node.op == "+=":
-            expr = self.env[node.name] + self.visit(node.expr)
+            expr = values[node.slot] + self.visit(node.expr)
         elif node.op == "-=":
-            expr = self.env[node.name] - self.visit(node.expr)
+            expr = values[node.slot] - self.visit(node.expr)
         elif node.op == "*=":
-            expr = self.env[node.name] * self.visit(node.expr)
+            expr = values[node.slot] * self.visit(node.expr)
         elif node.op == "/=":
-            expr = self.env[node.name] / self.visit(node.expr)
+            expr = values[node.slot] / self.visit(node.expr)
         elif node.op == "%=":
-            expr = self.env[node.name] % self.visit(node.expr)
-        self.env[node.name] = expr
+            expr = values[node.slot] % self.visit(node.expr)
+        values[node.slot] = expr
     
     def visit(self, node: AssignPostFix):
         temp = self.visit(node.expr)
@@ -383,7 +639,7 @@ class Interpreter(Visitor):
             expr = self.visit(node.expr) + 1
         else:
             expr = self.visit(node.expr) - 1
-        self.env[node.expr.name] = expr
+        self._values(node.expr.depth)[node.expr.slot] = expr
         return temp
     
     def visit(self, node: AssignPreFix):
@@ -392,7 +648,7 @@ class Interpreter(Visitor):
             expr = self.visit(node.expr) + 1
         else:
             expr = self.visit(node.expr) - 1
-        self.env[node.expr.name] = expr
+        self._values(node.expr.depth)[node.expr.slot] = expr
         return expr
     
     def visit(self, node: Set):
@@ -400,20 +656,21 @@ class Interpreter(Visitor):
         val = self.visit(node.expr)
 
         if isinstance(obj, Instance):
-            obj.set(node.name, val)
+            index = self.field(node, obj)
+            if index is not None:
+                obj.slots[index] = val
+            else:
+                obj.set(node.name, val)
             return val
         else:
             self.error(node.obj, f'Interp Error{self.ctxt.find_source(node.obj)!r} is not an instance')
 
     def visit(self, node: Get):
         obj = self.visit(node.obj)
-        if isinstance(obj, Instance):
-            try:
-                return obj.get(node.name)
-            except AttributeError as err:
-                self.error(node.obj, str(err))
-        else:
-            self.error(node.obj, f'Interp Error{self.ctxt.find_source(node.obj)!r}  is not an instance')
+        _, index, method = self.member(node, obj)
+        if method is None:
+            return self.attribute(node, obj, index)
+        return Method(method, obj)
 
     def visit(self, node: ThisExpr):
-        return self.env['this']
\ No newline at end of file
+        return self._values(node.depth)[node.slot]
\ No newline at end of file
@@ -31,7 +31,7 @@ class CppLexer(sly.Lexer):
         IDENTIFIER, DESTRUCTOR, TYPE_SPECIFIER, INT_LITERAL, FLOAT_LITERAL, BOOL_LITERAL, STRING_LITERAL, # type: ignore
         IF, ELSE, WHILE, FOR, CLASS, PRINTF, RETURN, BREAK, CONTINUE, SIZE, THIS, NIL, # type: ignore
         PLUS, MINUS, PLUSPLUS, MINUSMINUS, TIMES, DIVIDE, MOD, ADDEQ, MINEQ, TIMESEQ, DIVIDEEQ, MODULEEQ, ASSIGN, EQUAL, NOT_EQUAL, LESS, LESS_EQUAL, # type: ignore
-        GREATER, GREATER_EQUAL, AND, OR, NOT, SEMICOLON, COMMA, LEFT_PAREN,  # type: ignore
+        GREATER, GREATER_EQUAL, AND, OR, NOT, SEMICOLON, COMMA, DOT, LEFT_PAREN,  # type: ignore
         RIGHT_PAREN, LEFT_BRACE, RIGHT_BRACE, NULL,  # type: ignore
     }
 
@@ -52,6 +52,7 @@ class CppLexer(sly.Lexer):
     BREAK = r'break'
     CONTINUE = r'continue'
     SIZE = r'size'
+    THIS = r'this\b'
     
 
     # Operadores
@@ -81,7 +82,7 @@ class CppLexer(sly.Lexer):
     # Delimitadores
     SEMICOLON = r';'
     COMMA = r','
-    # DOT = r'\.'
+    DOT = r'\.'
     # COLON = r':'
     LEFT_PAREN = r'\('
     RIGHT_PAREN = r'\)'
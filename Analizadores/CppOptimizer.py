@@ -0,0 +1,883 @@
+'''
+
+Optimizador del AST de Mini C++.
+
+Se ejecuta después del Checker (y antes de resolver, compilar o ejecutar)
+y devuelve un AST simplificado que se comporta igual que el original:
+
+- Expansión en línea de funciones globales pequeñas y no recursivas
+  (ver Inliner); el tamaño máximo se configura con MINICPP_INLINE_NODES.
+- Plegado de constantes: BinaryOpExpr, UnaryOpExpr y LogicalExpr cuyos
+  operandos son LiteralExpr se reemplazan por su resultado, calculado con
+  las mismas reglas del Interpreter (incluida la concatenación de cadenas).
+  Las operaciones que darían un error en tiempo de ejecución (tipos no
+  numéricos, división entre cero...) no se pliegan para que el error se
+  siga reportando donde corresponde.
+- Llamadas a funciones puras de la biblioteca estándar (sin, log,
+  degToRad...) con argumentos constantes, y las constantes PI, EULER y
+  TAU, siempre que el programa no declare ni asigne ese nombre.
+- Identidades algebraicas (x * 1, 1 * x) cuando el Checker probó que x es
+  numérico (static_type), y x + 0, 0 + x, x - 0 sólo si probó que es
+  entero (-0.0 + 0 es 0.0). Una variable sin inicializador o a la que se
+  le asigna un valor de otro tipo no tiene tipo probado.
+- Movimiento de código invariante: las expresiones de un while o un for
+  que no dependen de variables que cambian en el ciclo y que no pueden
+  fallar ni tener efectos secundarios se calculan una vez antes del
+  ciclo, en una variable temporal.
+- Eliminación de código muerto: sentencias de un bloque que siguen a un
+  return, break o continue; if y while cuya condición es constante; y
+  en las funciones, inicializadores sin efectos secundarios de variables
+  que nunca se leen (y la declaración si tampoco se asignan).
+
+'''
+
+import math
+import os
+
+from collections import Counter
+from CppAST import *
+from stdlib import stdlibFunctions
+
+# Funciones de la biblioteca estándar sin efectos secundarios
+PURE_FUNCTIONS = {
+    'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'log', 'radToDeg', 'degToRad',
+    'str', 'len', 'format', 'isInteger', 'isFloat', 'isStr',
+}
+
+# Constantes de la biblioteca estándar que se pueden plegar (INF y NAN no
+# tienen un literal en el lenguaje)
+PURE_CONSTANTS = {'PI', 'EULER', 'TAU'}
+
+NUMERIC_TYPES = {'int', 'float'}
+
+# Funciones de la biblioteca estándar que con un argumento entero no
+# fallan ni tienen efectos secundarios
+INTEGER_SAFE_FUNCTIONS = {'sin', 'cos', 'tan', 'atan', 'radToDeg', 'degToRad'}
+
+# Tamaño máximo (en nodos) del cuerpo de una función que se expande en
+# los sitios de llamada
+INLINE_MAX_NODES = int(os.environ.get('MINICPP_INLINE_NODES', 40))
+
+
+def _is_truthy(value):
+    if isinstance(value, bool):
+        return value
+    return value is not None
+
+
+def _is_number(value):
+    return isinstance(value, (int, float))
+
+
+def _is_literal_value(value):
+    # Valores que pueden volver al AST como LiteralExpr
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return value is None or isinstance(value, (bool, int, str))
+
+
+def walk(node):
+    '''
+    Nodos del subárbol (y parámetros de las funciones), en preorden
+    '''
+    pending = [node]
+    while pending:
+        value = pending.pop()
+        if type(value) is list:
+            pending.extend(reversed(value))
+        elif isinstance(value, (ASTNode, Parameter)):
+            yield value
+            if isinstance(value, ASTNode):
+                pending.extend(reversed([getattr(value, name) for name in NODE_FIELDS[type(value)]]))
+
+
+def count_nodes(node):
+    return sum(1 for value in walk(node) if isinstance(value, ASTNode))
+
+
+def clone(node, replace=None):
+    '''
+    Copia del subárbol con las mismas posiciones. 'replace' asocia nombres
+    de variables con la expresión que toma su lugar en la copia.
+    '''
+    if replace and isinstance(node, VarExpr) and node.name in replace:
+        return clone(replace[node.name])
+
+    def copy(value):
+        if isinstance(value, ASTNode):
+            return clone(value, replace)
+        if type(value) is list:
+            return [copy(item) for item in value]
+        return value
+
+    cls = type(node)
+    new = cls(*[copy(getattr(node, name)) for name in NODE_FIELDS[cls]])
+    position = get_position(node)
+    if position:
+        set_position(new, *position)
+    return new
+
+
+def recursive_functions(functions):
+    '''
+    Nombres de las funciones globales que pueden llegar a llamarse a sí
+    mismas, directamente o a través de otras funciones. Cualquier uso del
+    nombre de una función cuenta como una llamada (puede pasarse como valor).
+    '''
+    graph = {name: {value.name for value in walk(decl.body)
+                    if isinstance(value, VarExpr) and value.name in functions}
+             for name, decl in functions.items()}
+    recursive = set()
+    for name in graph:
+        seen, pending = set(), list(graph[name])
+        while pending:
+            callee = pending.pop()
+            if callee == name:
+                recursive.add(name)
+                break
+            if callee not in seen:
+                seen.add(callee)
+                pending.extend(graph[callee])
+    return recursive
+
+
+def declared_names(node):
+    '''
+    Nombres que el programa declara o asigna en cualquier ámbito
+    '''
+    return {value.name for value in walk(node)
+            if isinstance(value, (Parameter, VarDeclStmt, FuncDeclStmt, ClassDeclStmt, AssignExpr))}
+
+
+class Transformer(Visitor):
+    '''
+    Visitante que reconstruye el AST: cada visit() devuelve el nodo que
+    reemplaza al visitado, o None si el nodo se elimina. Por defecto se
+    visitan los hijos y se conserva el nodo.
+    '''
+
+    def visit(self, node: ASTNode):
+        self.transform_children(node)
+        return node
+
+    def transform_children(self, node):
+        for name in NODE_FIELDS[type(node)]:
+            value = getattr(node, name)
+            if isinstance(value, ASTNode):
+                value = self.visit(value)
+                # Una sentencia eliminada que es hija de otra queda como un bloque vacío
+                setattr(node, name, value if value is not None else CompoundStmt([]))
+            elif type(value) is list:
+                items = [self.visit(item) if isinstance(item, ASTNode) else item for item in value]
+                setattr(node, name, [item for item in items if item is not None])
+
+
+class ScopedTransformer(Transformer):
+    '''
+    Transformer que lleva los tipos declarados de las variables visibles
+    '''
+
+    def __init__(self):
+        # Tipos declarados de las variables visibles, por ámbito
+        self.scopes = [{}]
+
+    # Ámbitos
+
+    def declare(self, name, type_):
+        self.scopes[-1][name] = type_
+
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def scoped(self, node, params=()):
+        self.scopes.append({param.name: param.type_ for param in params})
+        self.transform_children(node)
+        self.scopes.pop()
+        return node
+
+    def visit(self, node: CompoundStmt):
+        return self.scoped(node)
+
+    def visit(self, node: ForStmt):
+        return self.scoped(node)
+
+    def visit(self, node: ClassDeclStmt):
+        return self.scoped(node)
+
+    def visit(self, node: FuncDeclStmt):
+        return self.scoped(node, node.params or ())
+
+    def visit(self, node: ConstructorDeclStmt):
+        return self.scoped(node, node.params or ())
+
+    def visit(self, node: VarDeclStmt):
+        if node.expr is not None:
+            node.expr = self.visit(node.expr)
+        self.declare(node.name, node.type_)
+        return node
+
+    def numeric(self, node):
+        '''
+        Indica si la expresión produce siempre un número que no es bool
+        (si no produce un error). El tipo declarado de una variable no
+        basta: puede no estar inicializada (vale nil) o recibir un bool, así
+        que se usa el tipo que probó el Checker.
+        '''
+        if isinstance(node, LiteralExpr):
+            return _is_number(node.value) and not isinstance(node.value, bool)
+        if isinstance(node, VarExpr):
+            return getattr(node, 'static_type', None) in NUMERIC_TYPES
+        if isinstance(node, BinaryOpExpr):
+            if node.op in ('-', '*', '/', '%'):
+                return True
+            if node.op == '+':
+                return self.numeric(node.left) and self.numeric(node.right)
+        if isinstance(node, UnaryOpExpr):
+            return node.op == '-'
+        return False
+
+    def integer(self, node):
+        '''
+        Indica si la expresión produce siempre un entero. Como en numeric,
+        una variable debe tener el tipo probado por el Checker.
+        '''
+        if isinstance(node, LiteralExpr):
+            return type(node.value) is int
+        if isinstance(node, VarExpr):
+            return getattr(node, 'static_type', None) == 'int'
+        if isinstance(node, BinaryOpExpr) and node.op in ('+', '-', '*'):
+            return self.integer(node.left) and self.integer(node.right)
+        if isinstance(node, UnaryOpExpr):
+            return node.op == '-' and self.integer(node.expr)
+        return False
+
+    def is_pure(self, node):
+        '''
+        Indica si evaluar la expresión no tiene efectos secundarios ni
+        puede producir un error
+        '''
+        if isinstance(node, (LiteralExpr, VarExpr)):
+            return True
+        if isinstance(node, UnaryOpExpr):
+            return (node.op == '!' or self.numeric(node.expr)) and self.is_pure(node.expr)
+        if isinstance(node, LogicalExpr):
+            return self.is_pure(node.left) and self.is_pure(node.right)
+        if isinstance(node, BinaryOpExpr):
+            if node.op not in ('==', '!='):
+                # La división y el módulo pueden fallar aunque los operandos sean números
+                if node.op in ('/', '%') or not (self.numeric(node.left) and self.numeric(node.right)):
+                    return False
+            return self.is_pure(node.left) and self.is_pure(node.right)
+        return False
+
+
+class ConstantFolder(ScopedTransformer):
+    '''
+    Plegado de constantes y simplificación algebraica
+    '''
+
+    def __init__(self, shadowed=()):
+        super().__init__()
+        # Nombres de la biblioteca estándar que el programa redefine
+        self.shadowed = set(shadowed)
+
+    # Expresiones
+
+    def fold(self, node, value):
+        '''
+        Reemplaza el nodo por el literal de su valor, con la misma posición
+        '''
+        if not _is_literal_value(value):
+            return node
+        literal = LiteralExpr(value)
+        position = get_position(node)
+        if position:
+            set_position(literal, *position)
+        return literal
+
+    def visit(self, node: BinaryOpExpr):
+        node.left = left = self.visit(node.left)
+        node.right = right = self.visit(node.right)
+
+        if isinstance(left, LiteralExpr) and isinstance(right, LiteralExpr):
+            return self.fold_binary(node, left.value, right.value)
+
+        # Identidades: el otro operando debe ser numérico para que el
+        # resultado sea exactamente el mismo valor. Sumar 0 no es una
+        # identidad en punto flotante (-0.0 + 0 es 0.0): sólo con enteros
+        if node.op in ('+', '-') and _is_zero(right) and self.integer(left):
+            return left
+        if node.op == '+' and _is_zero(left) and self.integer(right):
+            return right
+        if node.op == '*' and _is_one(right) and self.numeric(left):
+            return left
+        if node.op == '*' and _is_one(left) and self.numeric(right):
+            return right
+        return node
+
+    def fold_binary(self, node, left, right):
+        op = node.op
+        if op == '==':
+            return self.fold(node, left == right)
+        if op == '!=':
+            return self.fold(node, left != right)
+        if op == '+' and isinstance(left, str) and isinstance(right, str):
+            return self.fold(node, left + right)
+        if not (_is_number(left) and _is_number(right)):
+            return node
+        try:
+            if op == '+':
+                return self.fold(node, left + right)
+            if op == '-':
+                return self.fold(node, left - right)
+            if op == '*':
+                return self.fold(node, left * right)
+            if op == '/':
+                return self.fold(node, left / right)
+            if op == '%':
+                return self.fold(node, left % right)
+            if op == '<':
+                return self.fold(node, left < right)
+            if op == '<=':
+                return self.fold(node, left <= right)
+            if op == '>':
+                return self.fold(node, left > right)
+            if op == '>=':
+                return self.fold(node, left >= right)
+        except ArithmeticError:
+            pass
+        return node
+
+    def visit(self, node: UnaryOpExpr):
+        node.expr = expr = self.visit(node.expr)
+        if isinstance(expr, LiteralExpr):
+            if node.op == '-' and _is_number(expr.value):
+                return self.fold(node, -expr.value)
+            if node.op == '!':
+                return self.fold(node, not _is_truthy(expr.value))
+        return node
+
+    def visit(self, node: LogicalExpr):
+        node.left = left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        if isinstance(left, LiteralExpr):
+            if node.op == '||':
+                return left if _is_truthy(left.value) else node.right
+            if node.op == '&&':
+                return node.right if _is_truthy(left.value) else left
+        return node
+
+    def visit(self, node: VarExpr):
+        if node.name in PURE_CONSTANTS and node.name not in self.shadowed:
+            return self.fold(node, stdlibFunctions[node.name])
+        return node
+
+    def visit(self, node: CallExpr):
+        node.args = [self.visit(arg) for arg in node.args] if node.args is not None else None
+        func = node.func
+        if (isinstance(func, VarExpr) and func.name in PURE_FUNCTIONS
+                and func.name not in self.shadowed
+                and all(isinstance(arg, LiteralExpr) for arg in node.args or ())):
+            # Si la llamada falla se deja para que el error se reporte al ejecutar
+            try:
+                value = stdlibFunctions[func.name](None, *[arg.value for arg in node.args or ()])
+            except Exception:
+                return node
+            return self.fold(node, value)
+        return node
+
+
+def _is_zero(node):
+    return isinstance(node, LiteralExpr) and type(node.value) is int and node.value == 0
+
+
+def _is_one(node):
+    return isinstance(node, LiteralExpr) and type(node.value) is int and node.value == 1
+
+
+class InlineFunction:
+    '''
+    Función global que se puede expandir en sus sitios de llamada
+    '''
+
+    def __init__(self, decl, template, uses, free, locals_, mutates):
+        self.decl = decl
+        # Expresión del return, o el cuerpo si la función no devuelve nada
+        self.template = template
+        self.params = [param.name for param in decl.params or ()]
+        # Veces que aparece cada parámetro en la plantilla
+        self.uses = uses
+        # Nombres globales que usa o asigna el cuerpo y variables locales
+        # que declara. Las locales quedan en un bloque propio al expandirlo,
+        # que oculta a las del mismo nombre en el sitio de llamada.
+        self.free = free
+        self.locals = locals_
+        # El cuerpo llama a funciones o asigna variables
+        self.mutates = mutates
+
+    @property
+    def is_expression(self):
+        return isinstance(self.template, Expression)
+
+
+class Inliner(ScopedTransformer):
+    '''
+    Expande las llamadas a funciones globales pequeñas que no son
+    recursivas. Una función cuyo cuerpo es sólo 'return expr;' se expande
+    en cualquier expresión; una sin return, sólo donde la llamada es una
+    sentencia. 'inlined' cuenta las llamadas expandidas.
+    '''
+
+    def __init__(self, program, max_nodes=INLINE_MAX_NODES):
+        super().__init__()
+        self.max_nodes = max_nodes
+        self.inlined = 0
+        self.candidates = set()
+        self.inline = {}
+        # Funciones que se están visitando
+        self.depth = 0
+
+        if isinstance(program, Program):
+            functions = {decl.name: decl for decl in program.decl if isinstance(decl, FuncDeclStmt)}
+            # Un nombre que se declara más de una vez o se asigna puede no
+            # referirse a la función en el sitio de llamada
+            counts = Counter(value.name for value in walk(program)
+                             if isinstance(value, (Parameter, VarDeclStmt, FuncDeclStmt, ClassDeclStmt, AssignExpr)))
+            self.candidates = {name for name in functions if counts[name] == 1} - recursive_functions(functions)
+
+    def analyze(self, node):
+        '''
+        Devuelve la InlineFunction de la declaración, o None si la función
+        no se puede expandir
+        '''
+        stmts = node.body.stmts if isinstance(node.body, CompoundStmt) else None
+        if stmts is None or count_nodes(node.body) > self.max_nodes:
+            return None
+        if len(stmts) == 1 and isinstance(stmts[0], ReturnStmt) and stmts[0].expr is not None:
+            template = stmts[0].expr
+        else:
+            template = node.body
+
+        params = {param.name for param in node.params or ()}
+        uses = Counter()
+        names, locals_ = set(), set()
+        mutates = False
+        for value in walk(template):
+            if isinstance(value, (ReturnStmt, ThisExpr, Get, Set, FuncDeclStmt, ClassDeclStmt)):
+                return None
+            if isinstance(value, VarExpr):
+                if value.name in params:
+                    uses[value.name] += 1
+                else:
+                    names.add(value.name)
+            elif isinstance(value, VarDeclStmt):
+                # clone() reemplaza los parámetros por nombre: un local que
+                # oculta a un parámetro también se reemplazaría
+                if value.name in params:
+                    return None
+                locals_.add(value.name)
+            elif isinstance(value, (AssignExpr, AssignPostFix, AssignPreFix)):
+                target = value.name if isinstance(value, AssignExpr) else getattr(value.expr, 'name', None)
+                if target in params:
+                    return None
+                # Asignar a un global también exige que el sitio de llamada no lo oculte
+                names.add(target)
+                mutates = True
+            elif isinstance(value, CallExpr):
+                mutates = True
+        return InlineFunction(node, template, uses, names - locals_, locals_, mutates)
+
+    def expand(self, node, function):
+        '''
+        Copia de la plantilla con los argumentos de la llamada, o None si
+        los argumentos no permiten expandirla sin cambiar el resultado
+        '''
+        args = node.args or []
+        if len(args) != len(function.params):
+            return None
+        # Los nombres que usa el cuerpo deben ser los mismos globales en el
+        # sitio de llamada
+        for scope in self.scopes[1:]:
+            if not scope.keys().isdisjoint(function.free):
+                return None
+        for param, arg in zip(function.params, args):
+            if isinstance(arg, LiteralExpr):
+                continue
+            # Si el cuerpo puede cambiar variables, el argumento debe
+            # evaluarse antes que él
+            if function.mutates or not self.is_pure(arg):
+                return None
+            if not isinstance(arg, VarExpr) and function.uses[param] > 1:
+                return None
+            if any(value.name in function.locals for value in walk(arg) if isinstance(value, VarExpr)):
+                return None
+        self.inlined += 1
+        return clone(function.template, dict(zip(function.params, args)))
+
+    def lookup_function(self, node):
+        '''
+        Función expandible a la que se refiere la llamada, si la hay
+        '''
+        func = node.func
+        if not isinstance(func, VarExpr) or func.name not in self.inline:
+            return None
+        if any(func.name in scope for scope in self.scopes[1:]):
+            return None
+        return self.inline[func.name]
+
+    # Declaraciones
+
+    def visit(self, node: FuncDeclStmt):
+        self.depth += 1
+        self.scoped(node, node.params or ())
+        self.depth -= 1
+        self.declare(node.name, None)
+        if len(self.scopes) == 1 and node.name in self.candidates:
+            function = self.analyze(node)
+            if function is not None:
+                self.inline[node.name] = function
+        return node
+
+    def visit(self, node: ConstructorDeclStmt):
+        self.depth += 1
+        self.scoped(node, node.params or ())
+        self.depth -= 1
+        return node
+
+    def visit(self, node: DestructorDeclStmt):
+        self.depth += 1
+        self.scoped(node)
+        self.depth -= 1
+        return node
+
+    def visit(self, node: ClassDeclStmt):
+        self.declare(node.name, None)
+        return self.scoped(node)
+
+    # Llamadas
+
+    def visit(self, node: CallExpr):
+        self.transform_children(node)
+        function = self.lookup_function(node)
+        if function is None or not function.is_expression:
+            return node
+        return self.expand(node, function) or node
+
+    def visit(self, node: ExprStmt):
+        self.transform_children(node)
+        call = node.expr
+        if not isinstance(call, CallExpr):
+            return node
+        function = self.lookup_function(call)
+        # Las variables locales del cuerpo serían globales fuera de una función
+        if function is None or function.is_expression or (function.locals and not self.depth):
+            return node
+        return self.expand(call, function) or node
+
+
+# Sentencias después de las cuales el resto del bloque no se ejecuta
+TERMINATORS = (ReturnStmt, BreakStmt, ContinueStmt)
+
+
+class DeadCodeEliminator(ScopedTransformer):
+    '''
+    Elimina código que nunca se ejecuta o cuyo resultado no se usa.
+    'removed' cuenta los nodos eliminados.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.removed = 0
+        # Variables leídas y asignadas en cada función que se está visitando
+        self.functions = []
+
+    def remove(self, node):
+        self.removed += count_nodes(node)
+
+    # Declaraciones
+
+    def function(self, node, params=()):
+        read, assigned = set(), set()
+        for value in walk(node.body):
+            if isinstance(value, VarExpr):
+                read.add(value.name)
+            elif isinstance(value, AssignExpr):
+                assigned.add(value.name)
+                if value.op != '=':
+                    read.add(value.name)
+            elif isinstance(value, (Get, Set)) and isinstance(value.obj, str):
+                read.add(value.obj)
+        self.functions.append((read, assigned))
+        self.scoped(node, params)
+        self.functions.pop()
+        return node
+
+    def visit(self, node: FuncDeclStmt):
+        return self.function(node, node.params or ())
+
+    def visit(self, node: ConstructorDeclStmt):
+        return self.function(node, node.params or ())
+
+    def visit(self, node: DestructorDeclStmt):
+        return self.function(node)
+
+    def local(self, node):
+        '''
+        Declaración de una variable local en un bloque. El inicializador de
+        una variable que no se lee sólo se quita si is_pure prueba que no
+        puede fallar: quitar 'int z = y + 1;' con y sin inicializar
+        escondería el error.
+        '''
+        node = self.visit(node)
+        if not self.functions:
+            return node
+        read, assigned = self.functions[-1]
+        if node.name in read:
+            return node
+        if node.expr is not None and self.is_pure(node.expr):
+            self.remove(node.expr)
+            node.expr = None
+        if node.expr is None and node.name not in assigned:
+            self.remove(node)
+            return None
+        return node
+
+    # Sentencias
+
+    def visit(self, node: CompoundStmt):
+        self.scopes.append({})
+        stmts = []
+        for index, stmt in enumerate(node.stmts):
+            stmt = self.local(stmt) if isinstance(stmt, VarDeclStmt) else self.visit(stmt)
+            if stmt is not None:
+                stmts.append(stmt)
+            if isinstance(stmt, TERMINATORS):
+                for unreachable in node.stmts[index + 1:]:
+                    self.remove(unreachable)
+                break
+        self.scopes.pop()
+        node.stmts = stmts
+        return node
+
+    def visit(self, node: IfStmt):
+        self.transform_children(node)
+        if not isinstance(node.cond, LiteralExpr):
+            return node
+        kept = node.then_stmt if _is_truthy(node.cond.value) else node.else_stmt
+        # Un if sin else tiene como else una lista vacía
+        if not isinstance(kept, ASTNode):
+            kept = None
+        self.removed += count_nodes(node) - (count_nodes(kept) if kept is not None else 0)
+        return kept
+
+    def visit(self, node: WhileStmt):
+        self.transform_children(node)
+        if isinstance(node.cond, LiteralExpr) and not _is_truthy(node.cond.value):
+            self.remove(node)
+            return None
+        return node
+
+
+def used_names(node):
+    '''
+    Todos los nombres de variables, funciones y parámetros del programa
+    '''
+    return {value.name for value in walk(node) if hasattr(value, 'name')}
+
+
+class LoopInvariantMotion(ScopedTransformer):
+    '''
+    Saca de los ciclos las expresiones invariantes. Cada una se guarda en
+    una variable temporal declarada justo antes del ciclo (el ciclo queda
+    en un bloque junto con las temporales) y en el ciclo se reemplaza por
+    esa variable. Sólo se mueven expresiones que no pueden fallar ni
+    tienen efectos secundarios con los tipos que probó el Checker, así que
+    calcularlas aunque el ciclo no se ejecute no cambia el resultado del
+    programa.
+    '''
+
+    def __init__(self, shadowed=(), reserved=()):
+        super().__init__()
+        self.shadowed = set(shadowed)
+        # Nombres que ya usa el programa y no pueden tomar las temporales
+        self.reserved = set(reserved)
+        self.hoisted = 0
+        # Por cada función que se está visitando: índice de su primer
+        # ámbito y si declara funciones o clases que podrían capturar sus
+        # variables
+        self.functions = []
+
+    def temporary(self):
+        index = 0
+        while f'_inv{index}' in self.reserved:
+            index += 1
+        name = f'_inv{index}'
+        self.reserved.add(name)
+        return name
+
+    def is_pure(self, node):
+        if isinstance(node, CallExpr):
+            func = node.func
+            return (isinstance(func, VarExpr) and func.name in INTEGER_SAFE_FUNCTIONS
+                    and func.name not in self.shadowed
+                    and node.args is not None and len(node.args) == 1
+                    and self.integer(node.args[0]) and self.is_pure(node.args[0]))
+        if isinstance(node, BinaryOpExpr) and node.op in ('/', '%'):
+            # Dividir entre una constante distinta de cero no falla
+            right = node.right
+            return (isinstance(right, LiteralExpr) and _is_number(right.value)
+                    and not isinstance(right.value, bool) and right.value != 0
+                    and self.numeric(node.left) and self.is_pure(node.left))
+        return super().is_pure(node)
+
+    def is_local(self, name):
+        '''
+        Indica si la variable es local de la función actual y ninguna
+        función anidada puede modificarla
+        '''
+        if not self.functions:
+            return False
+        first, captures = self.functions[-1]
+        if captures:
+            return False
+        return any(name in scope for scope in self.scopes[first:])
+
+    # Declaraciones
+
+    def function(self, node, params=()):
+        captures = any(isinstance(value, (FuncDeclStmt, ClassDeclStmt)) for value in walk(node.body))
+        self.functions.append((len(self.scopes), captures))
+        self.scoped(node, params)
+        self.functions.pop()
+        return node
+
+    def visit(self, node: FuncDeclStmt):
+        return self.function(node, node.params or ())
+
+    def visit(self, node: ConstructorDeclStmt):
+        return self.function(node, node.params or ())
+
+    def visit(self, node: DestructorDeclStmt):
+        return self.function(node)
+
+    # Ciclos
+
+    def loop(self, node, parts):
+        '''
+        Mueve las expresiones invariantes de las partes del ciclo y luego
+        optimiza los ciclos internos. Devuelve el ciclo o el bloque con
+        las temporales y el ciclo.
+        '''
+        changed = set()
+        calls = False
+        for value in walk([getattr(node, part) for part in ('init',) + parts if hasattr(node, part)]):
+            if isinstance(value, (AssignExpr, VarDeclStmt, FuncDeclStmt, ClassDeclStmt)):
+                changed.add(value.name)
+            elif isinstance(value, (AssignPostFix, AssignPreFix)):
+                changed.add(getattr(value.expr, 'name', None))
+            elif isinstance(value, CallExpr) and not self.is_pure(value):
+                calls = True
+
+        def invariant(expr):
+            if isinstance(expr, (LiteralExpr, VarExpr)) or not self.is_pure(expr):
+                return False
+            for value in walk(expr):
+                if isinstance(value, VarExpr):
+                    if value.name in changed:
+                        return False
+                    # Una llamada puede cambiar cualquier variable que no sea local
+                    if calls and not self.is_local(value.name):
+                        return False
+            return True
+
+        temporaries = []
+
+        def hoist(value):
+            if isinstance(value, Expression) and invariant(value):
+                for expr, name in temporaries:
+                    if expr == value:
+                        break
+                else:
+                    name = self.temporary()
+                    temporaries.append((value, name))
+                self.hoisted += 1
+                return VarExpr(name)
+            if isinstance(value, ASTNode) and not isinstance(value, (FuncDeclStmt, ClassDeclStmt)):
+                for field in NODE_FIELDS[type(value)]:
+                    child = getattr(value, field)
+                    if isinstance(child, ASTNode):
+                        setattr(value, field, hoist(child))
+                    elif type(child) is list:
+                        setattr(value, field, [hoist(item) for item in child])
+            return value
+
+        for part in parts:
+            value = getattr(node, part)
+            if value is not None:
+                setattr(node, part, hoist(value))
+
+        if not temporaries:
+            return self.children(node)
+
+        stmts = []
+        for expr, name in temporaries:
+            decl = VarDeclStmt('int' if self.integer(expr) else 'auto', name, expr)
+            position = get_position(expr)
+            if position:
+                set_position(decl, *position)
+            stmts.append(decl)
+        block = CompoundStmt(stmts + [node])
+        self.scopes.append({})
+        for decl in stmts:
+            self.declare(decl.name, decl.type_)
+        self.children(node)
+        self.scopes.pop()
+        return block
+
+    def children(self, node):
+        # El for abre un ámbito para su inicialización
+        if isinstance(node, ForStmt):
+            return self.scoped(node)
+        self.transform_children(node)
+        return node
+
+    def visit(self, node: WhileStmt):
+        return self.loop(node, ('cond', 'body_stmt'))
+
+    def visit(self, node: ForStmt):
+        # Las expresiones de la inicialización se evalúan una sola vez
+        return self.loop(node, ('cond', 'update', 'body_stmt'))
+
+
+class Optimizer:
+    '''
+    Ejecuta las pasadas de optimización sobre un AST ya revisado por el
+    Checker. Conserva entre ejecuciones (modo interactivo) los nombres de
+    la biblioteca estándar que algún programa redefinió.
+    '''
+
+    def __init__(self, ctxt):
+        self.ctxt = ctxt
+        self.shadowed = set()
+        # Llamadas expandidas, nodos eliminados y expresiones sacadas de
+        # ciclos en la última optimización
+        self.inlined = 0
+        self.removed = 0
+        self.hoisted = 0
+
+    def optimize(self, node):
+        self.shadowed |= declared_names(node) & set(stdlibFunctions)
+        inliner = Inliner(node)
+        node = inliner.visit(node)
+        self.inlined = inliner.inlined
+        node = ConstantFolder(self.shadowed).visit(node)
+        eliminator = DeadCodeEliminator()
+        node = eliminator.visit(node)
+        self.removed = eliminator.removed
+        motion = LoopInvariantMotion(self.shadowed, used_names(node))
+        node = motion.visit(node)
+        self.hoisted = motion.hoisted
+        return node
@@ -26,15 +26,83 @@ el else y asociarlo con el if más cercano, eliminando el conflicto de shift/red
 
 from CppLexer import CppLexer
 from CppAST import *
+from CppCache import Cache
 from rich import print
+import marshal
 import sly
+from sly.yacc import LRTable
+
+
+class ParseTables:
+    '''
+    Tablas LALR mínimas que necesita sly.Parser.parse(), cargadas desde la
+    caché en lugar de construir un LRTable completo.
+    '''
+
+    def __init__(self, lr_action, lr_goto, defaulted_states):
+        self.lr_action = lr_action
+        self.lr_goto = lr_goto
+        self.defaulted_states = defaulted_states
+
+
+# sly no tiene una forma pública de cambiar cómo construye las tablas: la
+# caché reemplaza su método privado Parser.__build_lrtables, así que sólo se
+# usa con las versiones de sly en las que se revisó ese método. Con otra
+# versión sly construye las tablas como siempre.
+SLY_VERSIONS = ('0.5',)
+CACHE_TABLES = (sly.__version__ in SLY_VERSIONS
+                and callable(getattr(sly.Parser, '_Parser__build_lrtables', None)))
+
 
 class CppParser(sly.Parser):
-    debugfile = 'MiniCCParser.txt'
+    # Caché donde se guardan las tablas LALR ya construidas
+    cache = Cache()
+
+    if CACHE_TABLES:
+        @classmethod
+        def _Parser__build_lrtables(cls):
+            '''
+            Reemplaza la construcción de tablas de sly: las tablas se buscan en
+            la caché con una clave que depende de la gramática (producciones y
+            precedencias) y sólo se construyen si no están.
+            '''
+            grammar = '\n'.join(str(p) for p in cls._grammar.Productions)
+            key = Cache.key('lalr', f'{sly.__version__}\n{cls.precedence!r}\n{grammar}')
+
+            data = cls.cache.load(key)
+            if data is not None:
+                try:
+                    cls._lrtable = ParseTables(*marshal.loads(data))
+                    return True
+                except (EOFError, ValueError, TypeError):
+                    pass
+
+            lrtable = LRTable(cls._grammar)
+            cls._lrtable = lrtable
+            cls.cache.store(key, marshal.dumps(
+                (lrtable.lr_action, lrtable.lr_goto, lrtable.defaulted_states)))
+            return True
+
+    @classmethod
+    def write_debugfile(cls, filename='MiniCCParser.txt'):
+        '''
+        Escribe la gramática y los estados LALR (opción -p de Cpp.py)
+        '''
+        with open(filename, 'w') as f:
+            f.write(str(cls._grammar))
+            f.write('\n')
+            f.write(str(LRTable(cls._grammar)))
+        print(f"Parser debugging for {cls.__qualname__} written to {filename}")
 
     def __init__(self, ctxt):
-        self.current_class = None
         self.ctxt=ctxt
+        self.syntax_errors = 0
+
+    def error(self, token):
+        # Se cuentan los errores de sintaxis para no guardar en la caché
+        # un AST que el parser tuvo que recuperar
+        self.syntax_errors += 1
+        return super().error(token)
 
     #Lista de tokens
     tokens = CppLexer.tokens
@@ -58,6 +126,7 @@ class CppParser(sly.Parser):
         ('left', PLUS, MINUS), #type: ignore
         ('left', TIMES, DIVIDE, MOD), #type: ignore
         ('right', UNARY, NOT), #type: ignore
+        ('left', DOT), #type: ignore
     )
 
     #Reglas de la gramática
@@ -75,8 +144,11 @@ class CppParser(sly.Parser):
     # Declaración de clases
     @_("CLASS IDENTIFIER LEFT_BRACE { class_members } RIGHT_BRACE") #type: ignore
     def class_decl(self, p):
-        self.current_class = p.IDENTIFIER
-        print(f"[DEBUG] current_class set to: {self.current_class}")
+        # Los miembros se reducen antes que la clase, así que el nombre de
+        # los constructores se revisa aquí
+        for memb in p.class_members:
+            if isinstance(memb, ConstructorDeclStmt) and memb.name != p.IDENTIFIER:
+                raise SyntaxError(f"Error {p.lineno}: '{memb.name}' no coincide con el nombre de la clase '{p.IDENTIFIER}'")
         return ClassDeclStmt(p.IDENTIFIER, p.class_members)
 
     
@@ -88,10 +160,6 @@ class CppParser(sly.Parser):
     # Declaración de constructores
     @_("IDENTIFIER LEFT_PAREN [ params ] RIGHT_PAREN compound_stmt") #type: ignore
     def constructor_decl(self, p):
-        if self.current_class is None:
-            raise SyntaxError(f"Error {p.lineno}: No se puede declarar un constructor fuera de una clase")
-        elif p.IDENTIFIER != self.current_class:
-            raise SyntaxError(f"Error {p.lineno}: '{p.IDENTIFIER}' no coincide con el nombre de la clase '{self.current_class}'")
         return ConstructorDeclStmt(p.IDENTIFIER, p.params, p.compound_stmt)
   
     # Declaración de destructores
@@ -110,6 +178,11 @@ class CppParser(sly.Parser):
     def var_decl(self, p):
         return VarDeclStmt(p.TYPE_SPECIFIER, p.IDENTIFIER, p.expr)
     
+    # Declaración de variables cuyo tipo es una clase
+    @_("IDENTIFIER IDENTIFIER [ ASSIGN expr ] SEMICOLON") #type: ignore
+    def var_decl(self, p):
+        return VarDeclStmt(p.IDENTIFIER0, p.IDENTIFIER1, p.expr)
+    
     # Instrucciones
     @_("expr_stmt", #type: ignore
        "for_stmt",
@@ -274,6 +347,11 @@ class CppParser(sly.Parser):
     def factor(self, p):
         return CallExpr(p.factor, p.args)
     
+    # Acceso a atributos y métodos de una instancia
+    @_("factor DOT IDENTIFIER") #type: ignore
+    def factor(self, p):
+        return Get(p.factor, p.IDENTIFIER)
+    
     # Manejo del menos unario
     @_("MINUS factor %prec UNARY", #type: ignore
        "NOT factor %prec UNARY") #type: ignore
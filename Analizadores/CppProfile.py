@@ -0,0 +1,134 @@
+'''
+
+Perfilador determinista por función para Mini C++.
+
+ProfilingInterpreter es el Interpreter de referencia con cada función y
+método instrumentado (ProfiledFunction). Por cada función registra:
+
+- llamadas;
+- tiempo inclusivo: desde que empieza hasta que termina, con lo que tardan
+  las funciones que llama. En una función recursiva sólo cuenta la
+  activación más externa, para no sumar el mismo tiempo varias veces;
+- tiempo exclusivo: el inclusivo sin el de las funciones que llama;
+- tiempo exclusivo medio por llamada (exclusivo / llamadas). El inclusivo
+  no sirve para la media de una función recursiva, porque sólo cuenta la
+  activación más externa.
+
+El código del nivel global se registra como '<programa>'. Las funciones de
+la biblioteca estándar cuentan en el tiempo exclusivo de quien las llama.
+Una llamada de cola termina la activación actual y empieza la siguiente.
+
+'''
+
+from CppAST import Program, get_position
+from CppInterpreter import Interpreter, Function
+from tabulate import tabulate
+
+import json
+import time
+
+PROGRAM = '<programa>'
+
+
+class FunctionStats:
+    __slots__ = ('name', 'line', 'calls', 'inclusive', 'exclusive', 'active')
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        # Activaciones en curso (recursión)
+        self.active = 0
+
+    @property
+    def exclusive_mean(self):
+        return self.exclusive / self.calls if self.calls else 0.0
+
+
+class Profile:
+    '''
+    Tiempos por función de una ejecución
+    '''
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.stats = {}
+        # Pila de activaciones: [estadísticas, inicio, tiempo de las llamadas internas]
+        self.stack = []
+
+    def enter(self, key, name, line=None):
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = FunctionStats(name, line)
+        stats.calls += 1
+        stats.active += 1
+        self.stack.append([stats, self.clock(), 0.0])
+
+    def exit(self):
+        stats, start, inner = self.stack.pop()
+        elapsed = self.clock() - start
+        stats.active -= 1
+        if stats.active == 0:
+            stats.inclusive += elapsed
+        stats.exclusive += elapsed - inner
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def rows(self):
+        '''
+        Estadísticas ordenadas por tiempo exclusivo
+        '''
+        return sorted(self.stats.values(), key=lambda stats: stats.exclusive, reverse=True)
+
+    def table(self):
+        table = [["Función", "Línea", "Llamadas", "Inclusivo (s)", "Exclusivo (s)", "Exclusivo por llamada (ms)"]]
+        for stats in self.rows():
+            table.append([stats.name, stats.line if stats.line is not None else '', stats.calls,
+                          f"{stats.inclusive:.6f}", f"{stats.exclusive:.6f}", f"{stats.exclusive_mean * 1e3:.4f}"])
+        return tabulate(table, headers="firstrow", tablefmt="fancy_grid")
+
+    def to_json(self):
+        return json.dumps([{
+            'name': stats.name,
+            'line': stats.line,
+            'calls': stats.calls,
+            'inclusive': stats.inclusive,
+            'exclusive': stats.exclusive,
+            'exclusive_mean': stats.exclusive_mean,
+        } for stats in self.rows()], indent=2)
+
+
+class ProfiledFunction(Function):
+    '''
+    Function que registra cada activación en el Profile del intérprete
+    '''
+
+    def enter(self, interp, node, args):
+        position = get_position(node)
+        interp.profile.enter(id(node), node.name, position[0] if position else None)
+
+    def exit(self, interp, result):
+        interp.profile.exit()
+
+
+class ProfilingInterpreter(Interpreter):
+    '''
+    Interpreter cuyas funciones y métodos miden su tiempo en self.profile
+    '''
+
+    def __init__(self, ctxt):
+        super().__init__(ctxt)
+        self.profile = Profile()
+
+    def visit(self, node: Program):
+        # Sólo se mide la ejecución, no el Checker ni el Resolver
+        self.profile.enter(PROGRAM, PROGRAM)
+        try:
+            return Interpreter._visit_table[Program](self, node)
+        finally:
+            self.profile.exit()
+
+    def make_function(self, node):
+        return ProfiledFunction(node, self.env)
@@ -0,0 +1,151 @@
+'''
+
+Análisis de efectos de las funciones de Mini C++.
+
+Arma el grafo de llamadas entre las funciones declaradas en el nivel
+global y marca como pura (FuncDeclStmt.pure) a la que:
+
+- no tiene printf ni llama a input o clock;
+- no asigna variables fuera de su propio marco;
+- no lee variables globales, salvo funciones y constantes de la biblioteca
+  estándar que el programa nunca declara ni asigna;
+- no usa objetos (this, atributos) ni declara funciones o clases;
+- sólo llama, por su nombre, a funciones puras o a funciones de la
+  biblioteca estándar sin efectos. Una llamada a través de una variable
+  puede ir a cualquier función, así que la hace impura.
+
+El resultado de una función pura sólo depende de sus argumentos, así que
+el Interpreter puede guardarlo (ver MemoFunction). El análisis se hace
+después del Resolver: una variable con depth 0 está en el marco de la
+función y una con depth GLOBAL en el marco global.
+
+'''
+
+from CppAST import *
+from CppOptimizer import walk
+from CppResolver import GLOBAL
+from stdlib import stdlibFunctions
+
+# Funciones de la biblioteca estándar con efectos o cuyo resultado cambia
+# entre llamadas
+IMPURE_STDLIB = {'input', 'clock'}
+
+# Nodos que hacen impura a la función que los contiene
+_EFFECTS = (PrintfStmt, ThisExpr, Get, Set, FuncDeclStmt, ClassDeclStmt,
+            ConstructorDeclStmt, DestructorDeclStmt)
+
+_ASSIGNMENTS = (AssignExpr, AssignPostFix, AssignPreFix)
+
+
+def _target(node):
+    '''
+    Variable (VarExpr o AssignExpr) que modifica una asignación
+    '''
+    return node if isinstance(node, AssignExpr) else node.expr
+
+
+class Purity:
+    '''
+    Análisis de efectos de un programa ya resuelto
+    '''
+
+    def __init__(self):
+        # Funciones del nivel global, por nombre
+        self.functions = {}
+        # Veces que se declara cada nombre global
+        self.declarations = {}
+        # Nombres globales que alguna parte del programa asigna
+        self.assigned = set()
+
+    @classmethod
+    def analyze(cls, program):
+        '''
+        Anota FuncDeclStmt.pure en las funciones globales y devuelve los
+        nombres de las puras
+        '''
+        purity = cls()
+        purity.scan(program)
+        pure = purity.solve()
+        for name, node in purity.functions.items():
+            node.pure = name in pure
+        return pure
+
+    def scan(self, program):
+        '''
+        Registra las declaraciones globales y las asignaciones a variables
+        globales hechas desde cualquier parte
+        '''
+        pending = [program]
+        while pending:
+            value = pending.pop()
+            if type(value) is list:
+                pending.extend(value)
+                continue
+            if not isinstance(value, ASTNode):
+                continue
+            if isinstance(value, (VarDeclStmt, FuncDeclStmt, ClassDeclStmt)):
+                self.declarations[value.name] = self.declarations.get(value.name, 0) + 1
+                if isinstance(value, FuncDeclStmt):
+                    self.functions[value.name] = value
+            # Los cuerpos de funciones y clases tienen su propio marco
+            if not isinstance(value, (FuncDeclStmt, ClassDeclStmt)):
+                pending.extend(getattr(value, name) for name in NODE_FIELDS[type(value)])
+
+        for value in walk(program):
+            if isinstance(value, _ASSIGNMENTS):
+                target = _target(value)
+                if getattr(target, 'depth', None) == GLOBAL:
+                    self.assigned.add(target.name)
+
+    def stable(self, name):
+        '''
+        El nombre global siempre se refiere a la misma declaración
+        '''
+        return self.declarations.get(name, 0) <= 1 and name not in self.assigned
+
+    def effects(self, function):
+        '''
+        Nombres de las funciones globales que llama la función, o None si
+        hace algo que la vuelve impura
+        '''
+        callees = set()
+        for node in walk(function.body):
+            if isinstance(node, _EFFECTS):
+                return None
+            if isinstance(node, _ASSIGNMENTS) and getattr(_target(node), 'depth', None) != 0:
+                return None
+            if isinstance(node, CallExpr):
+                callee = node.func
+                if not isinstance(callee, VarExpr) or callee.depth != GLOBAL:
+                    return None
+                if callee.name in self.functions:
+                    callees.add(callee.name)
+            elif isinstance(node, VarExpr) and node.depth != 0:
+                if node.depth != GLOBAL or not self.stable(node.name):
+                    return None
+                if node.name not in self.functions and (node.name not in stdlibFunctions
+                                                        or node.name in IMPURE_STDLIB
+                                                        or node.name in self.declarations):
+                    return None
+        return callees
+
+    def solve(self):
+        '''
+        Punto fijo sobre el grafo de llamadas: se parte de las funciones sin
+        efectos propios y se quitan las que llaman a una impura
+        '''
+        graph = {}
+        for name, node in self.functions.items():
+            if self.stable(name):
+                callees = self.effects(node)
+                if callees is not None:
+                    graph[name] = callees
+
+        changed = True
+        while changed:
+            changed = False
+            for name in list(graph):
+                if any(callee not in graph for callee in graph[name]):
+                    del graph[name]
+                    changed = True
+        return set(graph)
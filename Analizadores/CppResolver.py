@@ -0,0 +1,283 @@
+'''
+
+Resolución estática de ámbitos para Mini C++.
+
+Pasada que se ejecuta entre el Checker y el Interpreter. A cada referencia
+a una variable (VarExpr, AssignExpr, this) le asigna un par (depth, slot):
+
+- depth: cuántos marcos de función hay que subir desde el marco actual
+  hasta el que declara la variable, o GLOBAL si es una variable global.
+- slot: posición de la variable dentro de la lista de valores de ese marco.
+
+Cada declaración (VarDeclStmt, FuncDeclStmt, ClassDeclStmt...) recibe su
+slot y cada función el tamaño de su marco (frame_size). Así el Interpreter
+guarda las variables en marcos de tamaño fijo respaldados por una lista en
+lugar de buscarlas por nombre en un ChainMap.
+
+Los bloques ({ ... } y for) abren un ámbito nuevo: una declaración en un
+bloque interno oculta a la del bloque exterior en vez de sobrescribirla.
+
+Los métodos y constructores reciben la instancia ('this') en el slot 0 de
+su propio marco y sus parámetros a continuación; así una llamada a un
+método sólo crea el marco de la llamada.
+
+'''
+
+from CppAST import *
+from stdlib import stdlibFunctions
+
+# Profundidad especial para las variables del marco global
+GLOBAL = -1
+
+
+class Frame:
+    '''
+    Marco de activación: valores de las variables por slot y marco del
+    ámbito que lo contiene (el de definición de la función).
+    '''
+    __slots__ = ('values', 'parent')
+
+    def __init__(self, values, parent=None):
+        self.values = values
+        self.parent = parent
+
+    def __repr__(self):
+        return f'Frame({self.values!r})'
+
+
+class GlobalScope:
+    '''
+    Nombres del marco global y su slot. Persiste entre ejecuciones del mismo
+    intérprete (modo interactivo) y siempre contiene la biblioteca estándar.
+    '''
+
+    def __init__(self):
+        self.slots = {}
+        self.frame = Frame([])
+        for name, value in stdlibFunctions.items():
+            self.declare(name)
+            self.frame.values.append(value)
+
+    def declare(self, name):
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def grow(self):
+        # Agrega espacio para los globales declarados en la última resolución
+        values = self.frame.values
+        values.extend([None] * (len(self.slots) - len(values)))
+
+
+class FunctionScope:
+    '''
+    Ámbito de una función durante la resolución: pila de bloques
+    (nombre -> slot) y número de slots usados por su marco.
+    '''
+
+    def __init__(self):
+        self.blocks = [{}]
+        self.size = 0
+
+    def declare(self, name):
+        slot = self.size
+        self.size += 1
+        self.blocks[-1][name] = slot
+        return slot
+
+    def lookup(self, name):
+        for block in reversed(self.blocks):
+            if name in block:
+                return block[name]
+        return None
+
+
+class Resolver(Visitor):
+    '''
+    Visitante que anota el AST con los slots de las variables.
+    '''
+
+    def __init__(self, ctxt, globals_):
+        self.ctxt = ctxt
+        self.globals = globals_
+        self.functions = []
+
+    @classmethod
+    def resolve(cls, node, ctxt, globals_):
+        resolver = cls(ctxt, globals_)
+        resolver.visit(node)
+        globals_.grow()
+        return resolver
+
+    def error(self, position, message):
+        self.ctxt.error(position, message)
+
+    # Utilidades
+
+    def declare(self, name):
+        if self.functions:
+            return self.functions[-1].declare(name)
+        return self.globals.declare(name)
+
+    def lookup(self, node, name):
+        '''
+        Devuelve (depth, slot) de la variable visible con ese nombre
+        '''
+        for depth, scope in enumerate(reversed(self.functions)):
+            slot = scope.lookup(name)
+            if slot is not None:
+                return depth, slot
+        if name in self.globals.slots:
+            return GLOBAL, self.globals.slots[name]
+        self.error(node, f"Error de resolución. La variable '{name}' no ha sido declarada")
+        return GLOBAL, None
+
+    def begin_block(self):
+        if self.functions:
+            self.functions[-1].blocks.append({})
+
+    def end_block(self):
+        if self.functions:
+            self.functions[-1].blocks.pop()
+
+    def function(self, node, params):
+        '''
+        Resuelve el cuerpo de una función en un marco nuevo cuyos primeros
+        slots son los parámetros.
+        '''
+        scope = FunctionScope()
+        self.functions.append(scope)
+        for param in params:
+            scope.declare(param)
+        self.visit(node.body)
+        self.functions.pop()
+        node.frame_size = scope.size
+
+    # Declaraciones
+
+    def visit(self, node: Program):
+        for decl in node.decl:
+            self.visit(decl)
+
+    def visit(self, node: CompoundStmt):
+        self.begin_block()
+        for stmt in node.stmts:
+            self.visit(stmt)
+        self.end_block()
+
+    def visit(self, node: ClassDeclStmt):
+        node.slot = self.declare(node.name)
+
+        for memb in node.class_members:
+            if isinstance(memb, VarDeclStmt):
+                # Los valores iniciales de los atributos se calculan al
+                # declarar la clase, en el ámbito que la contiene
+                if memb.expr:
+                    self.visit(memb.expr)
+            else:
+                # Los métodos no ocupan slots: se buscan en la clase
+                params = memb.params if not isinstance(memb, DestructorDeclStmt) else None
+                self.function(memb, ['this'] + [param.name for param in params or []])
+
+    def visit(self, node: FuncDeclStmt):
+        node.slot = self.declare(node.name)
+        self.function(node, [param.name for param in node.params] if node.params is not None else [])
+
+    def visit(self, node: ConstructorDeclStmt):
+        node.slot = self.declare(node.name)
+        self.function(node, [param.name for param in node.params] if node.params is not None else [])
+
+    def visit(self, node: DestructorDeclStmt):
+        node.slot = self.declare(node.name)
+        self.function(node, [])
+
+    def visit(self, node: VarDeclStmt):
+        # El inicializador se resuelve antes de declarar la variable
+        if node.expr:
+            self.visit(node.expr)
+        node.slot = self.declare(node.name)
+
+    def visit(self, node: PrintfStmt):
+        self.visit(node.expr)
+
+    def visit(self, node: IfStmt):
+        self.visit(node.cond)
+        self.visit(node.then_stmt)
+        if node.else_stmt:
+            self.visit(node.else_stmt)
+
+    def visit(self, node: WhileStmt):
+        self.visit(node.cond)
+        self.visit(node.body_stmt)
+
+    def visit(self, node: ForStmt):
+        self.begin_block()
+        for part in (node.init, node.cond, node.update, node.body_stmt):
+            if part is not None:
+                self.visit(part)
+        self.end_block()
+
+    def visit(self, node: ReturnStmt):
+        if node.expr is not None:
+            self.visit(node.expr)
+
+    def visit(self, node: ExprStmt):
+        if node.expr is not None:
+            self.visit(node.expr)
+
+    def visit(self, node: BreakStmt):
+        pass
+
+    def visit(self, node: ContinueStmt):
+        pass
+
+    def visit(self, node: SizeStmt):
+        self.visit(node.expr)
+
+    def visit(self, node: NullStmt):
+        pass
+
+    # Expresiones
+
+    def visit(self, node: LiteralExpr):
+        pass
+
+    def visit(self, node: CallExpr):
+        self.visit(node.func)
+        if node.args is not None:
+            for arg in node.args:
+                self.visit(arg)
+
+    def visit(self, node: VarExpr):
+        node.depth, node.slot = self.lookup(node, node.name)
+
+    def visit(self, node: UnaryOpExpr):
+        self.visit(node.expr)
+
+    def visit(self, node: BinaryOpExpr):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit(self, node: LogicalExpr):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit(self, node: AssignExpr):
+        self.visit(node.expr)
+        node.depth, node.slot = self.lookup(node, node.name)
+
+    def visit(self, node: AssignPostFix):
+        self.visit(node.expr)
+
+    def visit(self, node: AssignPreFix):
+        self.visit(node.expr)
+
+    def visit(self, node: Set):
+        self.visit(node.obj)
+        self.visit(node.expr)
+
+    def visit(self, node: Get):
+        self.visit(node.obj)
+
+    def visit(self, node: ThisExpr):
+        node.depth, node.slot = self.lookup(node, 'this')
@@ -0,0 +1,188 @@
+'''
+
+Perfilador por muestreo para Mini C++.
+
+A diferencia de ProfilingInterpreter (CppProfile.py), no instrumenta nada:
+un hilo aparte despierta cada INTERVAL segundos, toma la pila de Python del
+hilo que ejecuta el programa (sys._current_frames) y la traduce a Mini C++:
+
+- los marcos de los métodos visit del Interpreter (self, node, ...) dicen
+  qué nodo se está ejecutando; el más interno con posición da la línea;
+- los marcos de Function.invoke (y sus subclases) marcan el inicio de una
+  activación de la función node.name.
+
+Así cada muestra cuenta para una línea del fuente y para una pila de
+llamadas de Mini C++ ("<programa>:12;fib:5;fib:5"), que se escribe en el
+formato de pilas colapsadas que leen flamegraph.pl o speedscope.
+
+Mientras el hilo duerme el programa corre a la velocidad normal. Si
+recorrer la pila tarda el hilo espera más entre muestras, para que su
+costo no pase de BUDGET del tiempo total. Ese costo no es todo lo que
+pierde el programa: mientras el hilo recorre la pila tiene el GIL, y cada
+marco que visita deja de ser un marco ligero del intérprete y se copia
+cuando termina la llamada. Por eso sólo se recorren los MAX_FRAMES marcos
+más internos (la base de una recursión profunda queda como '...') y cada
+muestra se guarda como una tupla, sin armar textos. thread_share sólo es
+el tiempo del hilo; lo que cuesta de verdad el muestreo en tiempo de reloj
+lo mide Benchmarks/bench_sampler.py contra una ejecución sin muestrear.
+
+'''
+
+from CppAST import ASTNode, get_position
+from collections import Counter
+from tabulate import tabulate
+
+import sys
+import threading
+import time
+
+INTERVAL = 0.005
+BUDGET = 0.02
+MAX_FRAMES = 1000
+PROGRAM = '<programa>'
+
+# Tipos de marcos de Python
+_OTHER, _NODE, _ACTIVATION = range(3)
+
+
+class Sampler:
+    '''
+    Muestras de la ejecución de un programa por línea y por pila de llamadas
+    '''
+
+    def __init__(self, interval=INTERVAL, budget=BUDGET):
+        self.interval = interval
+        self.budget = budget
+        # Muestras por línea del fuente y por pila: tupla de (función,
+        # línea) desde la base, con None en lugar de la base si se cortó
+        self.lines = Counter()
+        self.stacks = Counter()
+        self.samples = 0
+        # Segundos que pasó el hilo de muestreo recorriendo pilas
+        self.cost = 0.0
+        # Segundos de reloj de run()
+        self.elapsed = 0.0
+        self._kinds = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self, function, *args):
+        '''
+        Ejecuta function(*args) en el hilo actual tomando muestras
+        '''
+        self.start(threading.get_ident())
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.stop()
+
+    def start(self, ident):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.loop, args=(ident,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def loop(self, ident):
+        interval = self.interval
+        while not self._stop.wait(interval):
+            start = time.perf_counter()
+            frame = sys._current_frames().get(ident)
+            if frame is not None:
+                self.sample(frame)
+                # Un marco con referencias vivas hace que Python conserve al
+                # terminar el marco que lo llamó, y así toda la pila
+                frame = None
+            spent = time.perf_counter() - start
+            self.cost += spent
+            interval = max(self.interval, spent / self.budget)
+
+    def kind(self, code):
+        kind = self._kinds.get(code)
+        if kind is None:
+            names = code.co_varnames
+            if code.co_name == 'invoke' and 'node' in names:
+                kind = _ACTIVATION
+            elif names[:2] == ('self', 'node'):
+                kind = _NODE
+            else:
+                kind = _OTHER
+            self._kinds[code] = kind
+        return kind
+
+    def sample(self, frame):
+        '''
+        Registra la pila de Mini C++ que corresponde al marco de Python
+        '''
+        calls = []
+        leaf = line = None
+        kinds = self._kinds
+        for _ in range(MAX_FRAMES):
+            code = frame.f_code
+            kind = kinds.get(code)
+            if kind is None:
+                kind = self.kind(code)
+            # Dentro de una activación sólo importa el nodo más interno;
+            # f_locals arma un diccionario, así que se lee lo menos posible
+            if kind == _NODE and line is None:
+                position = get_position(frame.f_locals.get('node'))
+                if position:
+                    line = position[0]
+                    if leaf is None:
+                        leaf = line
+            elif kind == _ACTIVATION:
+                node = frame.f_locals.get('node')
+                if isinstance(node, ASTNode):
+                    # Entrando o saliendo de la función: cuenta para su declaración
+                    if line is None:
+                        position = get_position(node)
+                        line = position[0] if position else None
+                        if leaf is None:
+                            leaf = line
+                    calls.append((node.name, line))
+                    line = None
+            frame = frame.f_back
+            if frame is None:
+                break
+        if leaf is None:
+            return
+        calls.append((PROGRAM, line) if frame is None else None)
+        calls.reverse()
+        self.samples += 1
+        self.lines[leaf] += 1
+        self.stacks[tuple(calls)] += 1
+
+    @staticmethod
+    def label(name, line):
+        return name if line is None else f'{name}:{line}'
+
+    @property
+    def thread_share(self):
+        '''
+        Fracción del tiempo de run() que el hilo pasó recorriendo pilas
+        '''
+        return self.cost / self.elapsed if self.elapsed else 0.0
+
+    def table(self, source, limit=20):
+        '''
+        Las líneas con más muestras, con su código
+        '''
+        code = source.splitlines()
+        table = [["Línea", "Muestras", "%", "Código"]]
+        for line, hits in self.lines.most_common(limit):
+            text = code[line - 1].strip() if 0 < line <= len(code) else ''
+            table.append([line, hits, f"{hits / self.samples * 100:.1f}", text[:60]])
+        return tabulate(table, headers="firstrow", tablefmt="fancy_grid")
+
+    def collapsed(self):
+        '''
+        Pilas en formato colapsado: "marco;marco;... muestras" por línea
+        '''
+        stacks = Counter()
+        for stack, hits in self.stacks.items():
+            stacks[';'.join('...' if call is None else self.label(*call) for call in stack)] += hits
+        return ''.join(f'{stack} {hits}\n' for stack, hits in sorted(stacks.items()))
@@ -0,0 +1,143 @@
+'''
+
+Telemetría de las fases del compilador Mini C++.
+
+Context registra en un Telemetry (Context.stats) cada fase por la que pasa
+un programa: lex y parse en Context.parse (load si el AST sale de la
+caché), check y optimize cuando un motor los pide a Context, y execute en
+Context.run. Por cada fase guarda:
+
+- tiempo de reloj y de CPU (del proceso). Las fases pueden anidarse (el
+  motor revisa y optimiza dentro de execute); el tiempo de cada una no
+  incluye el de las fases internas;
+- pico de memoria con tracemalloc: lo máximo que creció la memoria
+  reservada durante la fase, internas incluidas. tracemalloc hace más
+  lento el programa, así que con memory=False sólo se miden tiempos.
+
+Además guarda la cantidad de tokens, de nodos del AST y de símbolos
+declarados en las tablas del Checker.
+
+'''
+
+from tabulate import tabulate
+
+import time
+import tracemalloc
+
+PHASES = ['load', 'lex', 'parse', 'check', 'optimize', 'execute']
+
+
+class PhaseStats:
+    __slots__ = ('name', 'calls', 'wall', 'cpu', 'peak')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        # Bytes; None si no se midió la memoria
+        self.peak = None
+
+    def as_dict(self):
+        return {'calls': self.calls, 'wall': self.wall, 'cpu': self.cpu, 'peak': self.peak}
+
+
+class Phase:
+    '''
+    Medición de una fase en curso (se usa con 'with')
+    '''
+    __slots__ = ('telemetry', 'stats', 'wall', 'cpu', 'inner_wall', 'inner_cpu', 'memory', 'peak')
+
+    def __init__(self, telemetry, stats):
+        self.telemetry = telemetry
+        self.stats = stats
+
+    def __enter__(self):
+        telemetry = self.telemetry
+        stack = telemetry.stack
+        if telemetry.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            # El pico hasta ahora le corresponde a la fase que contiene a esta
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.memory = current
+            self.peak = current
+        stack.append(self)
+        self.inner_wall = self.inner_cpu = 0.0
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        telemetry = self.telemetry
+        stack = telemetry.stack
+        stack.pop()
+        stats = self.stats
+        stats.calls += 1
+        stats.wall += wall - self.inner_wall
+        stats.cpu += cpu - self.inner_cpu
+        if stack:
+            stack[-1].inner_wall += wall
+            stack[-1].inner_cpu += cpu
+        if telemetry.memory and tracemalloc.is_tracing():
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            stats.peak = max(stats.peak or 0, peak - self.memory)
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+        return False
+
+
+class Telemetry:
+    '''
+    Fases y tamaños de un programa
+    '''
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.phases = {}
+        self.stack = []
+        self.tokens = None
+        self.nodes = None
+        self.symbols = None
+        self.scopes = None
+
+    def phase(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(name)
+        return Phase(self, stats)
+
+    def stop(self):
+        '''
+        Deja de medir la memoria
+        '''
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @property
+    def wall(self):
+        return sum(stats.wall for stats in self.phases.values())
+
+    def as_dict(self):
+        return {
+            'phases': {name: stats.as_dict() for name, stats in self.phases.items()},
+            'tokens': self.tokens,
+            'nodes': self.nodes,
+            'symbols': self.symbols,
+            'scopes': self.scopes,
+        }
+
+    def table(self):
+        table = [["Fase", "Veces", "Reloj (s)", "CPU (s)", "Pico de memoria (KB)"]]
+        order = sorted(self.phases, key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES))
+        for name in order:
+            stats = self.phases[name]
+            peak = f"{stats.peak / 1024:.1f}" if stats.peak is not None else ''
+            table.append([name, stats.calls, f"{stats.wall:.4f}", f"{stats.cpu:.4f}", peak])
+        table.append(["total", '', f"{self.wall:.4f}", f"{sum(s.cpu for s in self.phases.values()):.4f}", ''])
+        return tabulate(table, headers="firstrow", tablefmt="fancy_grid")
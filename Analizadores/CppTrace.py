@@ -0,0 +1,162 @@
+'''
+
+Exportación de la compilación y la ejecución en el formato Trace Event
+de Chrome (lo abren Perfetto y chrome://tracing).
+
+TraceWriter escribe un arreglo JSON de eventos de duración ("B" al empezar,
+"E" al terminar) a medida que ocurren: los guarda en un búfer de
+BUFFER_EVENTS eventos y lo vacía en el archivo, así que una ejecución larga
+no necesita tener la traza en memoria. close() termina el arreglo.
+
+- Context registra sus fases (lex, parse, check, optimize, execute) con
+  TraceWriter.phase cuando Context.trace no es None.
+- TracingInterpreter es el Interpreter de referencia cuyas funciones y
+  métodos (TracedFunction) registran cada llamada, con sus argumentos y
+  el valor que devuelve. Una llamada de cola termina el evento actual y
+  empieza otro.
+
+Todos los eventos van en la misma línea de tiempo (el programa es
+secuencial aunque se ejecute en otro hilo), así que las llamadas quedan
+anidadas dentro de la fase execute.
+
+'''
+
+from CppAST import get_position
+from CppInterpreter import Interpreter, Function, TailCall
+
+import json
+import math
+import os
+import time
+
+BUFFER_EVENTS = 4096
+# Largo máximo del texto de un argumento en la traza
+MAX_ARG = 64
+
+_TID = 1
+
+
+def _arg(value):
+    '''
+    Valor de Mini C++ en una forma que se puede escribir en JSON
+    '''
+    if value is None or value.__class__ is bool:
+        return value
+    if value.__class__ is int and abs(value) < 1 << 53:
+        return value
+    if value.__class__ is float and math.isfinite(value):
+        return value
+    text = str(value)
+    return text if len(text) <= MAX_ARG else text[:MAX_ARG] + '...'
+
+
+class _Span:
+    '''
+    Evento de duración que se escribe al entrar y al salir de un 'with'
+    '''
+    __slots__ = ('trace', 'name', 'category')
+
+    def __init__(self, trace, name, category):
+        self.trace = trace
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.trace.begin(self.name, self.category)
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.end()
+        return False
+
+
+class TraceWriter:
+    '''
+    Escritor de una traza en el formato Trace Event
+    '''
+
+    def __init__(self, path, buffer_events=BUFFER_EVENTS):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.buffer = []
+        self.buffer_events = buffer_events
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = 0
+        # Nombres de los eventos abiertos, para cerrarlos con el mismo nombre
+        self.open = []
+        self.file.write('[\n')
+        self.write({'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': _TID,
+                    'args': {'name': 'Mini C++'}})
+        self.write({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': _TID,
+                    'args': {'name': 'programa'}})
+
+    def now(self):
+        return round((time.perf_counter() - self.origin) * 1e6, 3)
+
+    def write(self, event):
+        self.buffer.append(json.dumps(event, ensure_ascii=False))
+        self.events += 1
+        if len(self.buffer) >= self.buffer_events:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            # Después del primer evento cada uno empieza con una coma
+            prefix = ',\n' if self.events > len(self.buffer) else ''
+            self.file.write(prefix + ',\n'.join(self.buffer))
+            self.buffer = []
+
+    def begin(self, name, category, args=None):
+        event = {'name': name, 'cat': category, 'ph': 'B', 'ts': self.now(), 'pid': self.pid, 'tid': _TID}
+        if args:
+            event['args'] = args
+        self.open.append(name)
+        self.write(event)
+
+    def end(self, args=None):
+        name = self.open.pop()
+        event = {'name': name, 'ph': 'E', 'ts': self.now(), 'pid': self.pid, 'tid': _TID}
+        if args:
+            event['args'] = args
+        self.write(event)
+
+    def phase(self, name):
+        return _Span(self, name, 'fase')
+
+    def close(self):
+        '''
+        Cierra los eventos que quedaron abiertos y termina el archivo
+        '''
+        if self.file.closed:
+            return
+        while self.open:
+            self.end()
+        self.flush()
+        self.file.write('\n]\n')
+        self.file.close()
+
+
+class TracedFunction(Function):
+    '''
+    Function que registra cada activación en la traza del Context
+    '''
+
+    def enter(self, interp, node, args):
+        position = get_position(node)
+        interp.ctxt.trace.begin(node.name, 'llamada', {
+            'línea': position[0] if position else None,
+            'argumentos': [_arg(value) for value in args],
+        })
+
+    def exit(self, interp, result):
+        interp.ctxt.trace.end({'resultado': '<llamada de cola>' if result.__class__ is TailCall else _arg(result)})
+
+
+class TracingInterpreter(Interpreter):
+    '''
+    Interpreter cuyas funciones y métodos registran sus llamadas en ctxt.trace
+    '''
+
+    def make_function(self, node):
+        return TracedFunction(node, self.env)
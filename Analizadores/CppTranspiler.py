@@ -0,0 +1,567 @@
+'''
+
+Transpilador de Mini C++ a Python.
+
+El AST revisado se traduce a código fuente de Python que luego se compila
+con compile() y se ejecuta directamente sobre el intérprete de CPython:
+
+- Cada función de Mini C++ se convierte en una función de Python, con sus
+  parámetros y variables como variables locales rápidas.
+- Las declaraciones del nivel superior se ejecutan en el espacio de nombres
+  del módulo generado.
+- Los nombres globales de Mini C++ llevan el prefijo 'mc_' para no chocar
+  con palabras reservadas de Python ni con las funciones auxiliares.
+- Las variables locales se nombran con el slot que les da el Resolver y el
+  nivel de anidamiento de su función ('mc2_3_x': slot 3 de una función
+  dentro de otra). Así una variable de un bloque interno que oculta a otra
+  con el mismo nombre es otra variable de Python, como en el Interpreter.
+
+Igual que en el Interpreter, asignar desde una función a una variable
+declarada en un ámbito exterior modifica esa variable (se generan
+declaraciones 'global' y 'nonlocal').
+
+El código generado se guarda en la caché (CppCache), así que volver a
+ejecutar el mismo programa no necesita ni el lexer ni el parser.
+
+'''
+
+from CppAST import *
+from CppCache import Cache
+from CppInterpreter import Class, MiniCExit, Instance, AttributeError, member_name, _NUMERIC_OPERATORS
+from CppResolver import Resolver, GlobalScope, GLOBAL
+from dataclasses import fields
+from rich import print
+from stdlib import *
+from types import FunctionType
+
+import marshal
+
+PREFIX = 'mc_'
+
+_COMPARISONS = {'<', '<=', '>', '>=', '==', '!='}
+
+
+def _children(node):
+    '''
+    Hijos directos de un nodo del AST
+    '''
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    yield item
+
+
+def _outer_assignments(body):
+    '''
+    Variables de un ámbito exterior (depth, slot, nombre) a las que se
+    asigna dentro de un cuerpo de función, sin entrar en las funciones
+    anidadas.
+    '''
+    assigned = set()
+    pending = [body]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (FuncDeclStmt, ClassDeclStmt, ConstructorDeclStmt, DestructorDeclStmt)):
+            continue
+        if isinstance(node, (AssignPostFix, AssignPreFix)):
+            target = node.expr
+        elif isinstance(node, AssignExpr):
+            target = node
+        else:
+            target = None
+        if target is not None and target.depth != 0:
+            assigned.add((target.depth, target.slot, target.name))
+        pending.extend(_children(node))
+    return assigned
+
+
+def _is_bool(node):
+    '''
+    Indica si la expresión produce siempre un bool, en cuyo caso la
+    veracidad de Mini C++ coincide con la de Python.
+    '''
+    if isinstance(node, BinaryOpExpr):
+        return node.op in _COMPARISONS
+    if isinstance(node, UnaryOpExpr):
+        return node.op == '!'
+    if isinstance(node, LiteralExpr):
+        return isinstance(node.value, bool)
+    if isinstance(node, LogicalExpr):
+        return _is_bool(node.left) and _is_bool(node.right)
+    return False
+
+
+class PythonGenerator(Visitor):
+    '''
+    Visitante que genera el código fuente de Python. Las instrucciones
+    se agregan a self.lines y las expresiones devuelven su texto.
+    '''
+
+    def __init__(self):
+        self.lines = []
+        self.level = 0
+        self.temps = 0
+        # Funciones que se están generando, de la más externa a la actual
+        self.scopes = []
+        # Pila de ciclos: nombre de la bandera de continue de cada for (o None)
+        self.loops = []
+        # Nombres que sólo se declaran como funciones: se llaman directamente
+        self.functions = set()
+
+    @classmethod
+    def generate(cls, node):
+        gen = cls()
+        functions, variables = set(), set()
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if isinstance(current, FuncDeclStmt):
+                functions.add(current.name)
+            elif isinstance(current, (VarDeclStmt, ClassDeclStmt)):
+                variables.add(current.name)
+            pending.extend(_children(current))
+        gen.functions = functions - variables
+        if isinstance(node, Program):
+            for decl in node.decl:
+                gen.visit(decl)
+        else:
+            gen.visit(node)
+        return '\n'.join(gen.lines) + '\n'
+
+    def emit(self, line):
+        self.lines.append('    ' * self.level + line)
+
+    def temp(self):
+        self.temps += 1
+        return f'_t{self.temps}'
+
+    def body(self, stmt):
+        '''
+        Genera un bloque indentado; Python no admite bloques vacíos.
+        '''
+        self.level += 1
+        start = len(self.lines)
+        self.visit(stmt)
+        if len(self.lines) == start:
+            self.emit('pass')
+        self.level -= 1
+
+    def truthy(self, node):
+        '''
+        Condición de Python equivalente a _is_truthy(node)
+        '''
+        code = self.visit(node)
+        if _is_bool(node):
+            return code
+        t = self.temp()
+        return f'({t} := {code}) is not False and {t} is not None'
+
+    # Declaraciones
+
+    def visit(self, node: Program):
+        for decl in node.decl:
+            self.visit(decl)
+
+    def visit(self, node: CompoundStmt):
+        for stmt in node.stmts:
+            self.visit(stmt)
+
+    def variable(self, depth, slot, name):
+        '''
+        Nombre de Python de la variable que el Resolver ubicó en (depth, slot)
+        '''
+        if depth == GLOBAL:
+            return PREFIX + name
+        return f'mc{len(self.scopes) - depth}_{slot}_{name}'
+
+    def declared(self, node):
+        '''
+        Nombre de Python de una declaración del ámbito actual
+        '''
+        if not self.scopes:
+            return PREFIX + node.name
+        return self.variable(0, node.slot, node.name)
+
+    def _function(self, node, name, params):
+        assigned = _outer_assignments(node.body)
+        self.scopes.append(node)
+        # Los parámetros ocupan los primeros slots del marco de la función
+        self.emit(f"def {name}({', '.join(self.variable(0, slot, p) for slot, p in enumerate(params))}):")
+        self.level += 1
+        for depth, slot, outer in sorted(assigned, key=lambda ref: (ref[0], ref[1])):
+            self.emit(f"{'global' if depth == GLOBAL else 'nonlocal'} {self.variable(depth, slot, outer)}")
+        self.level -= 1
+        loops, self.loops = self.loops, []
+        self.body(node.body)
+        self.loops = loops
+        self.scopes.pop()
+
+    def visit(self, node: FuncDeclStmt):
+        params = [param.name for param in node.params] if node.params is not None else []
+        self._function(node, self.declared(node), params)
+
+    def visit(self, node: ConstructorDeclStmt):
+        params = [param.name for param in node.params] if node.params is not None else []
+        self._function(node, self.declared(node), params)
+
+    def visit(self, node: DestructorDeclStmt):
+        self._function(node, self.declared(node), [])
+
+    def visit(self, node: ClassDeclStmt):
+        # Los métodos reciben 'this' como primer parámetro y se envuelven
+        # en _Method para poder enlazarlos a una instancia.
+        methods = []
+        fields = []
+        for memb in node.class_members:
+            if isinstance(memb, VarDeclStmt):
+                value = self.visit(memb.expr) if memb.expr else 'None'
+                fields.append(f"{memb.name!r}: {value}")
+                continue
+            params = [param.name for param in memb.params] if getattr(memb, 'params', None) is not None else []
+            name = f'_method_{node.name}_{member_name(memb).replace("~", "_")}'
+            self._function(memb, name, ['this'] + params)
+            methods.append(f"{member_name(memb)!r}: _Method({name})")
+        self.emit(f"{self.declared(node)} = _Class({node.name!r}, {{{', '.join(methods)}}}, {{{', '.join(fields)}}})")
+
+    def visit(self, node: VarDeclStmt):
+        value = self.visit(node.expr) if node.expr else 'None'
+        self.emit(f'{self.declared(node)} = {value}')
+
+    def visit(self, node: PrintfStmt):
+        self.emit(f'_print({self.visit(node.expr)})')
+
+    def visit(self, node: IfStmt):
+        self.emit(f'if {self.truthy(node.cond)}:')
+        self.body(node.then_stmt)
+        if node.else_stmt:
+            self.emit('else:')
+            self.body(node.else_stmt)
+
+    def visit(self, node: WhileStmt):
+        self.emit(f'while {self.truthy(node.cond)}:')
+        self.loops.append(None)
+        self.body(node.body_stmt)
+        self.loops.pop()
+
+    def visit(self, node: ForStmt):
+        if node.init is not None:
+            self.visit(node.init)
+        cond = self.truthy(node.cond) if node.cond is not None else 'True'
+        if not self._has_continue(node.body_stmt):
+            self.emit(f'while {cond}:')
+            self.loops.append(None)
+            self.level += 1
+            self.visit(node.body_stmt)
+            if node.update is not None:
+                self._discard(node.update)
+            else:
+                self.emit('pass')
+            self.level -= 1
+            self.loops.pop()
+            return
+
+        # Con continue la actualización debe ejecutarse igualmente: se pone
+        # al principio de la iteración, protegida por una bandera.
+        flag = self.temp()
+        self.emit(f'{flag} = False')
+        self.emit('while True:')
+        self.level += 1
+        if node.update is not None:
+            self.emit(f'if {flag}:')
+            self.level += 1
+            self._discard(node.update)
+            self.level -= 1
+        self.emit(f'{flag} = True')
+        self.emit(f'if not ({cond}):')
+        self.emit('    break')
+        self.loops.append(flag)
+        self.visit(node.body_stmt)
+        self.loops.pop()
+        self.level -= 1
+
+    def _has_continue(self, node):
+        if isinstance(node, ContinueStmt):
+            return True
+        if isinstance(node, (WhileStmt, ForStmt, FuncDeclStmt, ClassDeclStmt)):
+            return False
+        return any(self._has_continue(child) for child in _children(node))
+
+    def visit(self, node: ReturnStmt):
+        value = self.visit(node.expr) if node.expr is not None else 'None'
+        if self.scopes:
+            self.emit(f'return {value}')
+        else:
+            self.emit(f'raise _Halt({value})')
+
+    def _discard(self, expr):
+        '''
+        Expresión usada como instrucción: las asignaciones y los ++/--
+        se generan como instrucciones de asignación de Python.
+        '''
+        if isinstance(expr, AssignExpr):
+            name = self.variable(expr.depth, expr.slot, expr.name)
+            if expr.op == '=':
+                self.emit(f'{name} = {self.visit(expr.expr)}')
+            else:
+                self.emit(f'{name} {expr.op} {self.visit(expr.expr)}')
+        elif isinstance(expr, (AssignPostFix, AssignPreFix)):
+            self.emit(f"{self.visit(expr.expr)} {'+=' if expr.op == '++' else '-='} 1")
+        else:
+            self.emit(self.visit(expr))
+
+    def visit(self, node: ExprStmt):
+        self._discard(node.expr)
+
+    def visit(self, node: BreakStmt):
+        self.emit('break')
+
+    def visit(self, node: ContinueStmt):
+        self.emit('continue')
+
+    def visit(self, node: SizeStmt):
+        self.emit(f'len({self.visit(node.expr)})')
+
+    def visit(self, node: NullStmt):
+        return 'None'
+
+    # Expresiones
+
+    def visit(self, node: LiteralExpr):
+        return repr(node.value)
+
+    def visit(self, node: BinaryOpExpr):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        # El operador de Python directo sólo si el Checker probó los tipos
+        # (== y != no revisan sus operandos); si no, se revisan al ejecutar
+        if node.operand_type is not None or node.op in ('==', '!='):
+            return f'({left} {node.op} {right})'
+        return f'_binary({node.op!r}, {left}, {right})'
+
+    def visit(self, node: UnaryOpExpr):
+        if node.op == '-':
+            return f'(-{self.visit(node.expr)})'
+        elif node.op == '!':
+            return f'(not ({self.truthy(node.expr)}))'
+        raise NotImplementedError(f"Interp Error. Unary operator '{node.op}' not implemented")
+
+    def visit(self, node: LogicalExpr):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        if _is_bool(node.left):
+            op = 'or' if node.op == '||' else 'and'
+            return f'({left} {op} {right})'
+        t = self.temp()
+        truthy = f'(({t} := {left}) is not False and {t} is not None)'
+        if node.op == '||':
+            return f'({t} if {truthy} else {right})'
+        if node.op == '&&':
+            return f'({right} if {truthy} else {t})'
+        raise NotImplementedError(f"Interp Error. Logical operator '{node.op}' not implemented")
+
+    def visit(self, node: VarExpr):
+        return self.variable(node.depth, node.slot, node.name)
+
+    def visit(self, node: CallExpr):
+        args = [self.visit(arg) for arg in node.args] if node.args is not None else []
+        if isinstance(node.func, VarExpr) and node.func.name in stdlibFunctions:
+            # Las funciones de la biblioteca estándar no pueden redefinirse
+            return f"{PREFIX}{node.func.name}(_interp{''.join(', ' + a for a in args)})"
+        if isinstance(node.func, VarExpr) and node.func.name in self.functions:
+            return f"{self.visit(node.func)}({', '.join(args)})"
+        return f"_call({self.visit(node.func)}{''.join(', ' + a for a in args)})"
+
+    def visit(self, node: AssignExpr):
+        # Igual que en el Interpreter, la asignación vale None
+        name = self.variable(node.depth, node.slot, node.name)
+        value = self.visit(node.expr)
+        if node.op != '=':
+            value = f'{name} {node.op[0]} {value}'
+        return f'(({name} := {value}), None)[1]'
+
+    def visit(self, node: AssignPostFix):
+        name = self.visit(node.expr)
+        return f"({name}, ({name} := {name} {node.op[0]} 1))[0]"
+
+    def visit(self, node: AssignPreFix):
+        name = self.visit(node.expr)
+        return f"({name} := {name} {node.op[0]} 1)"
+
+    def visit(self, node: Set):
+        return f'_set({self.visit(node.obj)}, {node.name!r}, {self.visit(node.expr)})'
+
+    def visit(self, node: Get):
+        return f'_get({self.visit(node.obj)}, {node.name!r})'
+
+    def visit(self, node: ThisExpr):
+        return self.variable(node.depth, node.slot, 'this')
+
+
+class _Halt(Exception):
+    '''
+    Un return en el nivel superior termina el programa
+    '''
+    def __init__(self, value):
+        self.value = value
+
+
+class _Method:
+    '''
+    Método de clase generado: una función de Python cuyo primer
+    parámetro es 'this'.
+    '''
+    def __init__(self, function):
+        self.function = function
+
+    def bind(self, instance):
+        return _BoundMethod(self.function, instance)
+
+
+class _BoundMethod:
+    '''
+    Método enlazado a una instancia. Como las clases y la biblioteca
+    estándar, recibe el intérprete como primer argumento.
+    '''
+    __slots__ = ('function', 'this')
+
+    def __init__(self, function, this):
+        self.function = function
+        self.this = this
+
+    def __call__(self, interp, *args):
+        return self.function(self.this, *args)
+
+
+class PythonBackend:
+    '''
+    Motor de ejecución que transpila el AST a Python. Expone la misma
+    interfaz que Interpreter (interpret, error, env) y además run_source,
+    que usa la caché de código.
+    '''
+
+    def __init__(self, ctxt, cache=None):
+        self.ctxt = ctxt
+        self.cache = cache if cache is not None else Cache()
+        # Sólo se usa para que el Resolver ubique las variables locales
+        self.globals = GlobalScope()
+        self.env = self.namespace()
+
+    def error(self, position, message):
+        self.ctxt.error(position, message)
+        raise MiniCExit()
+
+    def namespace(self):
+        interp = self
+
+        def call(callee, *args):
+            # Las funciones generadas son funciones de Python; el resto de
+            # invocables (biblioteca estándar, clases) reciben el intérprete.
+            if isinstance(callee, FunctionType):
+                return callee(*args)
+            if not callable(callee):
+                interp.error(None, f'Interp error {callee!r} no es invocable')
+            return callee(interp, *args)
+
+        def binary(op, left, right):
+            # Igual que Interpreter.binary: + también une dos strings
+            if op == '+' and isinstance(left, str) and isinstance(right, str):
+                return left + right
+            if not (isinstance(left, (int, float)) and isinstance(right, (int, float))):
+                interp.error(None, f"Interp Error. In '{op}', operands must be numeric")
+            return _NUMERIC_OPERATORS[op](left, right)
+
+        def get(obj, name):
+            if not isinstance(obj, Instance):
+                interp.error(None, f'Interp Error {obj!r} is not an instance')
+            try:
+                return obj.get(name)
+            except AttributeError as err:
+                interp.error(None, str(err))
+
+        def set_(obj, name, value):
+            if not isinstance(obj, Instance):
+                interp.error(None, f'Interp Error {obj!r} is not an instance')
+            obj.set(name, value)
+            return value
+
+        env = {
+            '__builtins__': __builtins__,
+            '_interp': self,
+            '_print': print,
+            '_call': call,
+            '_binary': binary,
+            '_get': get,
+            '_set': set_,
+            '_Class': Class,
+            '_Method': _Method,
+            '_Halt': _Halt,
+        }
+        for name, value in stdlibFunctions.items():
+            env[PREFIX + name] = value
+        return env
+
+    def compile(self, node):
+        Resolver.resolve(node, self.ctxt, self.globals)
+        if self.ctxt.have_errors:
+            raise MiniCExit()
+        source = PythonGenerator.generate(node)
+        return compile(source, '<mini-c++>', 'exec')
+
+    def execute(self, code):
+        try:
+            exec(code, self.env)
+        except _Halt:
+            pass
+        except CallError as err:
+            self.error(None, f'Interp Error. {err}')
+        except TypeError as err:
+            self.error(None, f'Interp Error. {err}')
+
+    # Punto de entrada alto-nivel
+    def interpret(self, node):
+        try:
+            self.ctxt.check(node)
+            if not self.ctxt.have_errors:
+                self.execute(self.compile(self.ctxt.optimize(node)))
+            else: print("\n The interpreter could not start because the Checker returned errors")
+        except MiniCExit as e:
+            pass
+
+    def run_source(self, source):
+        '''
+        Ejecuta un programa a partir de su código fuente. Si el código de
+        Python generado para ese fuente ya está en la caché, no se hace el
+        análisis léxico, sintáctico ni semántico.
+        '''
+        # El código optimizado y el sin optimizar se guardan por separado
+        key = self.cache.key('py' if self.ctxt.optimizer is None else 'py-opt', source)
+        data = self.cache.load(key)
+        if data is not None:
+            try:
+                code = marshal.loads(data)
+            except (EOFError, ValueError, TypeError):
+                code = None
+            if code is not None:
+                try:
+                    self.execute(code)
+                except MiniCExit:
+                    pass
+                return
+
+        try:
+            self.ctxt.parse(source)
+            if self.ctxt.have_errors:
+                return
+            self.ctxt.check(self.ctxt.ast)
+            if self.ctxt.have_errors:
+                print("\n The interpreter could not start because the Checker returned errors")
+                return
+            code = self.compile(self.ctxt.optimize(self.ctxt.ast))
+            self.cache.store(key, marshal.dumps(code))
+            self.execute(code)
+        except MiniCExit:
+            pass
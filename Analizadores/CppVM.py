@@ -0,0 +1,745 @@
+'''
+
+Máquina virtual de pila para Mini C++.
+
+El AST revisado se traduce a un código lineal de instrucciones de ancho
+fijo: cada instrucción ocupa dos enteros (opcode, operando) empaquetados
+en un array('i'). Los literales, nombres y prototipos de función viven en
+tablas aparte (constantes y nombres) y el operando es un índice a ellas
+o un destino de salto.
+
+- if, while, for, break, continue y los operadores && y || se traducen
+  a saltos, sin excepciones ni banderas globales.
+- Las llamadas entre funciones de Mini C++ no usan la pila de Python:
+  la VM apila un registro de activación propio y sigue en el mismo ciclo
+  de despacho.
+- Las variables están en marcos de tamaño fijo (Frame), en el slot que
+  les asigna el Resolver, igual que en el Interpreter de referencia. Las
+  del marco actual y las globales se acceden con LOAD_FAST/STORE_FAST y
+  LOAD_GLOBAL/STORE_GLOBAL; las de una función externa, con
+  LOAD_DEREF/STORE_DEREF, cuyo operando es un índice a la tabla de
+  referencias (depth, slot) del código.
+
+'''
+
+from array import array
+from CppAST import *
+from CppInterpreter import _is_truthy, Class, MiniCExit, AttributeError, Instance, Method, member_name
+from CppResolver import Resolver, GlobalScope, Frame, GLOBAL
+from rich import print
+from stdlib import *
+
+import operator
+
+# Opcodes. El orden sigue aproximadamente la frecuencia de uso, que es
+# también el orden en que el ciclo de despacho los compara.
+OPCODES = [
+    'LOAD_FAST', 'LOAD_CONST', 'STORE_FAST', 'JUMP_IF_FALSE', 'JUMP', 'POP',
+    'LT', 'LE', 'GT', 'GE', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD', 'EQ', 'NE',
+    'LOAD_GLOBAL', 'STORE_GLOBAL', 'INPLACE', 'CALL', 'RETURN',
+    'POST_INC', 'POST_DEC', 'PRE_INC', 'PRE_DEC', 'LOAD_DEREF', 'STORE_DEREF',
+    'NEG', 'NOT', 'JUMP_IF_FALSE_OR_POP', 'JUMP_IF_TRUE_OR_POP', 'PRINT', 'SIZE',
+    'MAKE_FUNCTION', 'MAKE_CLASS', 'GET_ATTR', 'SET_ATTR',
+]
+
+for _opcode, _opname in enumerate(OPCODES):
+    globals()[_opname] = _opcode
+
+# Operadores de asignación compuesta, indexados por el operando de INPLACE
+INPLACE_OPS = ['+=', '-=', '*=', '/=', '%=']
+_INPLACE = [operator.add, operator.sub, operator.mul, operator.truediv, operator.mod]
+
+_BINARY = {
+    '+': ADD, '-': SUB, '*': MUL, '/': DIV, '%': MOD,
+    '<': LT, '<=': LE, '>': GT, '>=': GE, '==': EQ, '!=': NE,
+}
+
+# Función de cada operador binario, indexada por opcode (LT .. NE)
+_BINOPS = [None] * len(OPCODES)
+for _opname, _function in [('LT', operator.lt), ('LE', operator.le), ('GT', operator.gt),
+                           ('GE', operator.ge), ('ADD', operator.add), ('SUB', operator.sub),
+                           ('MUL', operator.mul), ('DIV', operator.truediv), ('MOD', operator.mod),
+                           ('EQ', operator.eq), ('NE', operator.ne)]:
+    _BINOPS[OPCODES.index(_opname)] = _function
+
+_JUMPS = {JUMP, JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP}
+
+_NUMERIC = (int, float)
+
+# Los marcos de la VM no usan la pila de Python: sin este límite una
+# recursión sin fin crece hasta agotar la memoria. Al pasarlo se lanza
+# RecursionError, que Context.execute reporta como en los otros motores
+MAX_DEPTH = 1_000_000
+
+
+class CodeObject:
+    '''
+    Resultado de compilar un cuerpo de código: instrucciones, constantes,
+    nombres de atributos, referencias (depth, slot) a variables, los
+    nombres de las variables (para el desensamblador) y los nodos del AST
+    asociados a las instrucciones que pueden reportar errores.
+    '''
+
+    def __init__(self, name, ops, consts, names, refs, varnames, nodes):
+        self.name = name
+        self.ops = ops
+        # El ciclo de despacho lee una copia en lista: indexar el array('i')
+        # crea un objeto int nuevo en cada lectura y es notablemente más lento.
+        self.insns = ops.tolist()
+        self.consts = consts
+        self.names = names
+        self.refs = refs
+        self.varnames = varnames
+        self.nodes = nodes
+
+
+class FunctionProto:
+    '''
+    Prototipo de una función: su nodo y su código ya compilado.
+    '''
+
+    def __init__(self, node, code):
+        self.node = node
+        self.code = code
+        self.size = node.frame_size
+        self.params = [param.name for param in node.params] if getattr(node, 'params', None) is not None else None
+
+
+class VMFunction:
+    '''
+    Función de Mini C++ en tiempo de ejecución: prototipo más entorno de
+    definición.
+    '''
+
+    def __init__(self, proto, env):
+        self.proto = proto
+        self.env = env
+
+    @property
+    def node(self):
+        return self.proto.node
+
+    @property
+    def arity(self) -> int:
+        return len(self.proto.params)
+
+    def __call__(self, interp, *args):
+        # Llamada desde fuera de la VM (p.ej. desde la biblioteca estándar)
+        return interp.call(self, list(args))
+
+    def check_arity(self, args):
+        params = self.proto.params
+        if params is not None and len(args) != len(params):
+            raise CallError(f"Interp Error. Expected {len(params)} arguments but got {len(args)}")
+
+    def invoke(self, interp, args):
+        # Llamada con los argumentos ya revisados (p.ej. un Method desde Class)
+        values = [None] * self.proto.size
+        values[:len(args)] = args
+        return interp.execute(self.proto.code, Frame(values, self.env))
+
+    def bind(self, instance):
+        return Method(self, instance)
+
+
+class BytecodeCompiler(Visitor):
+    '''
+    Visitante que genera el código de un cuerpo (programa o función).
+    Cada función anidada se compila con su propio BytecodeCompiler.
+    '''
+
+    def __init__(self, name, function=False):
+        self.name = name
+        # Las declaraciones de una función van en su marco; las del
+        # programa, en el marco global
+        self.function = function
+        self.ops = array('i')
+        self.consts = []
+        self.const_index = {}
+        self.names = []
+        self.name_index = {}
+        self.refs = []
+        self.ref_index = {}
+        self.varnames = {}
+        self.nodes = {}
+        # Pila de ciclos: (posición de continue, lista de saltos de break, lista de saltos de continue)
+        self.loops = []
+
+    @classmethod
+    def compile(cls, node, name='<program>'):
+        compiler = cls(name)
+        if isinstance(node, Program):
+            for decl in node.decl:
+                compiler.visit(decl)
+        else:
+            compiler.visit(node)
+        compiler.emit(LOAD_CONST, compiler.const(None))
+        compiler.emit(RETURN)
+        return compiler.code()
+
+    @classmethod
+    def compile_function(cls, node):
+        compiler = cls(node.name, function=True)
+        compiler.visit(node.body)
+        compiler.emit(LOAD_CONST, compiler.const(None))
+        compiler.emit(RETURN)
+        return FunctionProto(node, compiler.code())
+
+    def code(self):
+        return CodeObject(self.name, self.ops, self.consts, self.names, self.refs, self.varnames, self.nodes)
+
+    # Utilidades de emisión
+
+    def emit(self, op, arg=0, node=None):
+        if node is not None:
+            self.nodes[len(self.ops)] = node
+        self.ops.append(op)
+        self.ops.append(arg)
+        return len(self.ops) - 2
+
+    def label(self):
+        return len(self.ops)
+
+    def patch(self, pos, target):
+        self.ops[pos + 1] = target
+
+    def const(self, value):
+        # Las constantes se comparten por valor y tipo (True y 1 son distintos)
+        key = (type(value), value) if isinstance(value, (int, float, str, bool, type(None))) else id(value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_index[key]
+
+    def name_of(self, name):
+        if name not in self.name_index:
+            self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return self.name_index[name]
+
+    def ref(self, depth, slot, name):
+        key = (depth, slot)
+        self.varnames[key] = name
+        if key not in self.ref_index:
+            self.ref_index[key] = len(self.refs)
+            self.refs.append(key)
+        return self.ref_index[key]
+
+    def load(self, depth, slot, name):
+        self.varnames[depth, slot] = name
+        if depth == 0:
+            self.emit(LOAD_FAST, slot)
+        elif depth == GLOBAL:
+            self.emit(LOAD_GLOBAL, slot)
+        else:
+            self.emit(LOAD_DEREF, self.ref(depth, slot, name))
+
+    def store(self, depth, slot, name):
+        self.varnames[depth, slot] = name
+        if depth == 0:
+            self.emit(STORE_FAST, slot)
+        elif depth == GLOBAL:
+            self.emit(STORE_GLOBAL, slot)
+        else:
+            self.emit(STORE_DEREF, self.ref(depth, slot, name))
+
+    def declare(self, node):
+        # Guarda el valor en la pila en el slot de la declaración
+        self.store(0 if self.function else GLOBAL, node.slot, node.name)
+
+    # Declaraciones
+
+    def visit(self, node: Program):
+        for decl in node.decl:
+            self.visit(decl)
+
+    def visit(self, node: CompoundStmt):
+        for stmt in node.stmts:
+            self.visit(stmt)
+
+    def visit(self, node: ClassDeclStmt):
+        members = [(member_name(memb), BytecodeCompiler.compile_function(memb))
+                   for memb in node.class_members if not isinstance(memb, VarDeclStmt)]
+        # Los valores iniciales de los atributos quedan en la pila
+        fields = []
+        for memb in node.class_members:
+            if isinstance(memb, VarDeclStmt):
+                if memb.expr:
+                    self.visit(memb.expr)
+                else:
+                    self.emit(LOAD_CONST, self.const(None))
+                fields.append(memb.name)
+        self.emit(MAKE_CLASS, self.const((node.name, members, tuple(fields))))
+        self.declare(node)
+
+    def _func_decl(self, node):
+        proto = BytecodeCompiler.compile_function(node)
+        self.emit(MAKE_FUNCTION, self.const(proto))
+        self.declare(node)
+
+    def visit(self, node: FuncDeclStmt):
+        self._func_decl(node)
+
+    def visit(self, node: ConstructorDeclStmt):
+        self._func_decl(node)
+
+    def visit(self, node: DestructorDeclStmt):
+        self._func_decl(node)
+
+    def visit(self, node: VarDeclStmt):
+        if node.expr:
+            self.visit(node.expr)
+        else:
+            self.emit(LOAD_CONST, self.const(None))
+        self.declare(node)
+
+    def visit(self, node: PrintfStmt):
+        self.visit(node.expr)
+        self.emit(PRINT)
+
+    def visit(self, node: IfStmt):
+        self.visit(node.cond)
+        jump_else = self.emit(JUMP_IF_FALSE)
+        self.visit(node.then_stmt)
+        if node.else_stmt:
+            jump_end = self.emit(JUMP)
+            self.patch(jump_else, self.label())
+            self.visit(node.else_stmt)
+            self.patch(jump_end, self.label())
+        else:
+            self.patch(jump_else, self.label())
+
+    def _loop_body(self, body):
+        self.loops.append(([], []))
+        self.visit(body)
+        return self.loops.pop()
+
+    def visit(self, node: WhileStmt):
+        start = self.label()
+        self.visit(node.cond)
+        jump_end = self.emit(JUMP_IF_FALSE)
+        breaks, continues = self._loop_body(node.body_stmt)
+        self.emit(JUMP, start)
+        end = self.label()
+        self.patch(jump_end, end)
+        for pos in breaks:
+            self.patch(pos, end)
+        for pos in continues:
+            self.patch(pos, start)
+
+    def visit(self, node: ForStmt):
+        if node.init is not None:
+            self.visit(node.init)
+        start = self.label()
+        jump_end = None
+        if node.cond is not None:
+            self.visit(node.cond)
+            jump_end = self.emit(JUMP_IF_FALSE)
+        breaks, continues = self._loop_body(node.body_stmt)
+        update = self.label()
+        if node.update is not None:
+            self._discard(node.update)
+        self.emit(JUMP, start)
+        end = self.label()
+        if jump_end is not None:
+            self.patch(jump_end, end)
+        for pos in breaks:
+            self.patch(pos, end)
+        for pos in continues:
+            self.patch(pos, update)
+
+    def visit(self, node: ReturnStmt):
+        if node.expr is not None:
+            self.visit(node.expr)
+        else:
+            self.emit(LOAD_CONST, self.const(None))
+        self.emit(RETURN)
+
+    def _discard(self, expr):
+        '''
+        Evalúa una expresión cuyo valor no se usa. Las asignaciones
+        simples se emiten sin dejar su resultado (None) en la pila.
+        '''
+        if isinstance(expr, AssignExpr):
+            self._store(expr)
+        else:
+            self.visit(expr)
+            self.emit(POP)
+
+    def visit(self, node: ExprStmt):
+        self._discard(node.expr)
+
+    def visit(self, node: BreakStmt):
+        self.loops[-1][0].append(self.emit(JUMP))
+
+    def visit(self, node: ContinueStmt):
+        self.loops[-1][1].append(self.emit(JUMP))
+
+    def visit(self, node: SizeStmt):
+        self.visit(node.expr)
+        self.emit(SIZE, node=node)
+
+    def visit(self, node: NullStmt):
+        self.emit(LOAD_CONST, self.const(None))
+
+    # Expresiones
+
+    def visit(self, node: LiteralExpr):
+        self.emit(LOAD_CONST, self.const(node.value))
+
+    def visit(self, node: BinaryOpExpr):
+        if node.op not in _BINARY:
+            raise NotImplementedError(f"Interp Error. Binary operator '{node.op}' not implemented")
+        self.visit(node.left)
+        self.visit(node.right)
+        self.emit(_BINARY[node.op], node=node)
+
+    def visit(self, node: UnaryOpExpr):
+        self.visit(node.expr)
+        if node.op == '-':
+            self.emit(NEG, node=node)
+        elif node.op == '!':
+            self.emit(NOT)
+        else:
+            raise NotImplementedError(f"Interp Error. Unary operator '{node.op}' not implemented")
+
+    def visit(self, node: LogicalExpr):
+        self.visit(node.left)
+        if node.op == '||':
+            jump = self.emit(JUMP_IF_TRUE_OR_POP)
+        elif node.op == '&&':
+            jump = self.emit(JUMP_IF_FALSE_OR_POP)
+        else:
+            raise NotImplementedError(f"Interp Error. Logical operator '{node.op}' not implemented")
+        self.visit(node.right)
+        self.patch(jump, self.label())
+
+    def visit(self, node: VarExpr):
+        self.load(node.depth, node.slot, node.name)
+
+    def visit(self, node: CallExpr):
+        self.visit(node.func)
+        args = node.args if node.args is not None else []
+        for arg in args:
+            self.visit(arg)
+        self.emit(CALL, len(args), node=node)
+
+    def _store(self, node):
+        if node.op == '=':
+            self.visit(node.expr)
+        elif node.op in INPLACE_OPS:
+            self.load(node.depth, node.slot, node.name)
+            self.visit(node.expr)
+            self.emit(INPLACE, INPLACE_OPS.index(node.op))
+        else:
+            self.emit(LOAD_CONST, self.const(0))
+        self.store(node.depth, node.slot, node.name)
+
+    def visit(self, node: AssignExpr):
+        # Igual que en el Interpreter, la asignación vale None
+        self._store(node)
+        self.emit(LOAD_CONST, self.const(None))
+
+    def visit(self, node: AssignPostFix):
+        var = node.expr
+        self.emit(POST_INC if node.op == '++' else POST_DEC, self.ref(var.depth, var.slot, var.name))
+
+    def visit(self, node: AssignPreFix):
+        var = node.expr
+        self.emit(PRE_INC if node.op == '++' else PRE_DEC, self.ref(var.depth, var.slot, var.name))
+
+    def visit(self, node: Set):
+        self.visit(node.obj)
+        self.visit(node.expr)
+        self.emit(SET_ATTR, self.name_of(node.name), node=node)
+
+    def visit(self, node: Get):
+        self.visit(node.obj)
+        self.emit(GET_ATTR, self.name_of(node.name), node=node)
+
+    def visit(self, node: ThisExpr):
+        self.load(node.depth, node.slot, 'this')
+
+
+def disassemble(code):
+    '''
+    Devuelve un listado legible del código, incluyendo el de las
+    funciones anidadas.
+    '''
+    lines = [f"Disassembly of {code.name}:"]
+    ops = code.ops
+    for pc in range(0, len(ops), 2):
+        op, arg = ops[pc], ops[pc + 1]
+        detail = ''
+        if op == LOAD_CONST:
+            detail = f"({code.consts[arg]!r})"
+        elif op == MAKE_FUNCTION:
+            detail = f"({code.consts[arg].node.name})"
+        elif op == MAKE_CLASS:
+            detail = f"({code.consts[arg][0]})"
+        elif op in (LOAD_FAST, STORE_FAST):
+            detail = f"({code.varnames[0, arg]})"
+        elif op in (LOAD_GLOBAL, STORE_GLOBAL):
+            detail = f"({code.varnames[GLOBAL, arg]})"
+        elif op in (LOAD_DEREF, STORE_DEREF, POST_INC, POST_DEC, PRE_INC, PRE_DEC):
+            detail = f"({code.varnames[code.refs[arg]]})"
+        elif op in (GET_ATTR, SET_ATTR):
+            detail = f"({code.names[arg]})"
+        elif op == INPLACE:
+            detail = f"({INPLACE_OPS[arg]})"
+        elif op in _JUMPS:
+            detail = f"(to {arg})"
+        lines.append(f"{pc:>6} {OPCODES[op]:<22}{arg:>4} {detail}")
+    for const in code.consts:
+        if isinstance(const, FunctionProto):
+            lines.append('')
+            lines.append(disassemble(const.code))
+        elif isinstance(const, tuple):
+            for _, proto in const[1]:
+                lines.append('')
+                lines.append(disassemble(proto.code))
+    return '\n'.join(lines)
+
+
+class VM:
+    '''
+    Motor de ejecución que compila el AST a bytecode y lo ejecuta en un
+    único ciclo de despacho. Expone la misma interfaz que Interpreter
+    (interpret, error, env).
+    '''
+
+    def __init__(self, ctxt):
+        self.ctxt = ctxt
+        self.globals = GlobalScope()
+        self.env = self.globals.frame
+
+    def error(self, position, message):
+        self.ctxt.error(position, message)
+        raise MiniCExit()
+
+    # Punto de entrada alto-nivel
+    def interpret(self, node):
+        try:
+            self.ctxt.check(node)
+            if not self.ctxt.have_errors:
+                node = self.ctxt.optimize(node)
+                Resolver.resolve(node, self.ctxt, self.globals)
+            if not self.ctxt.have_errors:
+                # La biblioteca estándar ya está en el marco global (GlobalScope)
+                code = BytecodeCompiler.compile(node)
+                self.execute(code, self.env)
+            else: print("\n The interpreter could not start because the Checker returned errors")
+        except MiniCExit as e:
+            pass
+
+    def call(self, function, args):
+        '''
+        Invoca una función de la VM desde código Python.
+        '''
+        env = self._enter(function, args, None)
+        return self.execute(function.proto.code, env)
+
+    def _enter(self, function, args, node, this=None):
+        '''
+        Marco de una llamada. Los parámetros ocupan los primeros slots; en
+        un método, después de 'this', que va en el slot 0.
+        '''
+        proto = function.proto
+        params = proto.params
+        if params is not None and len(args) != len(params):
+            message = f"Interp Error. Expected {len(params)} arguments but got {len(args)}"
+            if node is None:
+                raise CallError(message)
+            self.error(node.func, message)
+        if this is not None:
+            args = [this] + args
+        values = [None] * proto.size
+        values[:len(args)] = args
+        return Frame(values, function.env)
+
+    @staticmethod
+    def _values(env, depth, globals_):
+        '''
+        Lista de valores del marco que está depth niveles por encima de env
+        '''
+        if depth == GLOBAL:
+            return globals_
+        while depth:
+            env = env.parent
+            depth -= 1
+        return env.values
+
+    def _numeric_error(self, code, pc, plural=True):
+        node = code.nodes[pc]
+        if plural:
+            self.error(node, f"Interp Error. In '{node.op}', operands must be numeric")
+        self.error(node, f"Interp Error. In '{node.op}', operand must be numeric")
+
+    def execute(self, code, env):
+        frames = []
+        ops = code.insns
+        consts = code.consts
+        names = code.names
+        refs = code.refs
+        values = env.values
+        globals_ = self.globals.frame.values
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        numeric = _NUMERIC
+        binops = _BINOPS
+
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += 2
+
+            if op == LOAD_FAST:
+                push(values[arg])
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == STORE_FAST:
+                values[arg] = pop()
+            elif op == JUMP_IF_FALSE:
+                value = pop()
+                if value is False or value is None:
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == POP:
+                pop()
+            elif op <= NE:
+                # Operadores binarios (LT .. NE). Todos salvo == y != exigen
+                # operandos numéricos; + admite además dos cadenas.
+                r = pop()
+                l = stack[-1]
+                if op < EQ and not (isinstance(l, numeric) and isinstance(r, numeric)):
+                    if not (op == ADD and isinstance(l, str) and isinstance(r, str)):
+                        self._numeric_error(code, pc - 2)
+                stack[-1] = binops[op](l, r)
+            elif op == LOAD_GLOBAL:
+                push(globals_[arg])
+            elif op == STORE_GLOBAL:
+                globals_[arg] = pop()
+            elif op == INPLACE:
+                r = pop()
+                stack[-1] = _INPLACE[arg](stack[-1], r)
+            elif op == CALL:
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = []
+                callee = pop()
+                this = None
+                if callee.__class__ is Method and callee.function.__class__ is VMFunction:
+                    # Método enlazado: se ejecuta en este mismo ciclo
+                    this = callee.this
+                    callee = callee.function
+                if callee.__class__ is VMFunction:
+                    if len(frames) >= MAX_DEPTH:
+                        raise RecursionError('maximum VM call depth exceeded')
+                    callee_env = self._enter(callee, args, code.nodes[pc - 2], this)
+                    frames.append((code, pc, env, stack))
+                    code = callee.proto.code
+                    ops = code.insns
+                    consts = code.consts
+                    names = code.names
+                    refs = code.refs
+                    env = callee_env
+                    values = env.values
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                    pc = 0
+                else:
+                    node = code.nodes[pc - 2]
+                    if not callable(callee):
+                        self.error(node.func, f'Interp error {self.ctxt.find_source(node.func)!r} no es invocable')
+                    try:
+                        push(callee(self, *args))
+                    except CallError as err:
+                        self.error(node.func, str(err))
+            elif op == RETURN:
+                value = pop()
+                if not frames:
+                    return value
+                code, pc, env, stack = frames.pop()
+                ops = code.insns
+                consts = code.consts
+                names = code.names
+                refs = code.refs
+                values = env.values
+                push = stack.append
+                pop = stack.pop
+                push(value)
+            elif op == POST_INC or op == POST_DEC:
+                depth, slot = refs[arg]
+                frame = values if depth == 0 else self._values(env, depth, globals_)
+                value = frame[slot]
+                frame[slot] = value + 1 if op == POST_INC else value - 1
+                push(value)
+            elif op == PRE_INC or op == PRE_DEC:
+                depth, slot = refs[arg]
+                frame = values if depth == 0 else self._values(env, depth, globals_)
+                value = frame[slot] + 1 if op == PRE_INC else frame[slot] - 1
+                frame[slot] = value
+                push(value)
+            elif op == LOAD_DEREF:
+                depth, slot = refs[arg]
+                push(self._values(env, depth, globals_)[slot])
+            elif op == STORE_DEREF:
+                depth, slot = refs[arg]
+                self._values(env, depth, globals_)[slot] = pop()
+            elif op == NEG:
+                if not isinstance(stack[-1], numeric):
+                    self._numeric_error(code, pc - 2, plural=False)
+                stack[-1] = - stack[-1]
+            elif op == NOT:
+                stack[-1] = not _is_truthy(stack[-1])
+            elif op == JUMP_IF_FALSE_OR_POP:
+                value = stack[-1]
+                if value is False or value is None:
+                    pc = arg
+                else:
+                    pop()
+            elif op == JUMP_IF_TRUE_OR_POP:
+                value = stack[-1]
+                if value is False or value is None:
+                    pop()
+                else:
+                    pc = arg
+            elif op == PRINT:
+                print(pop())
+            elif op == SIZE:
+                len(pop())
+            elif op == MAKE_FUNCTION:
+                push(VMFunction(consts[arg], env))
+            elif op == MAKE_CLASS:
+                name, members, fields = consts[arg]
+                # 'values' es el marco actual: los valores iniciales van aparte
+                defaults = {}
+                if fields:
+                    defaults = dict(zip(fields, stack[-len(fields):]))
+                    del stack[-len(fields):]
+                push(Class(name, {memb_name: VMFunction(proto, env) for memb_name, proto in members}, defaults))
+            elif op == GET_ATTR:
+                obj = stack[-1]
+                node = code.nodes[pc - 2]
+                if not isinstance(obj, Instance):
+                    self.error(node.obj, f'Interp Error{self.ctxt.find_source(node.obj)!r}  is not an instance')
+                try:
+                    stack[-1] = obj.get(names[arg])
+                except AttributeError as err:
+                    self.error(node.obj, str(err))
+            elif op == SET_ATTR:
+                value = pop()
+                obj = stack[-1]
+                if not isinstance(obj, Instance):
+                    node = code.nodes[pc - 2]
+                    self.error(node.obj, f'Interp Error{self.ctxt.find_source(node.obj)!r} is not an instance')
+                obj.set(names[arg], value)
+                stack[-1] = value
+            else:
+                raise RuntimeError(f"VM Error. Opcode desconocido {op}")
@@ -0,0 +1,79 @@
+'''
+
+Caché en disco (CppCache): expulsión LRU, entradas dañadas y claves que
+cambian con la versión del compilador y la forma del AST.
+
+uso: python -m pytest -q Analizadores/tests
+
+'''
+
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import CppCache
+import CppContext
+from CppCache import Cache
+from CppContext import Context
+
+SOURCE = '''
+int doble(int n) { return n * 2; }
+printf(doble(21));
+'''
+
+
+def parse(cache, source=SOURCE):
+    ctxt = Context(cache=cache)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctxt.parse(source)
+    assert not ctxt.have_errors
+    return ctxt
+
+
+def entries(directory):
+    return sorted(name for name in os.listdir(directory) if not name.startswith('.'))
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = Cache(str(tmp_path), max_size=250)
+    for age, key in enumerate(['a', 'b']):
+        cache.store(key, b'x' * 100)
+        # Fechas distintas aunque el reloj del sistema de archivos sea grueso
+        os.utime(cache.path(key), (1000 + age, 1000 + age))
+    # Leer 'a' la vuelve la más reciente: al pasar el límite se borra 'b'
+    assert cache.load('a') == b'x' * 100
+    cache.store('c', b'x' * 100)
+    assert entries(tmp_path) == ['a', 'c']
+    assert cache.load('b') is None
+
+
+def test_corrupt_ast_entry_is_parsed_again(tmp_path):
+    cache = Cache(str(tmp_path))
+    expected = parse(cache).ast
+    [name] = entries(tmp_path)
+    with open(os.path.join(tmp_path, name), 'wb') as file:
+        file.write(b'no es un AST')
+    # La entrada dañada se ignora, se vuelve a analizar y se reemplaza
+    assert parse(cache).ast == expected
+    assert parse(cache).ast == expected
+    with open(os.path.join(tmp_path, name), 'rb') as file:
+        assert file.read() != b'no es un AST'
+
+
+def test_keys_change_with_versions(monkeypatch):
+    key = Cache.key('ast', SOURCE)
+    monkeypatch.setattr(CppCache, 'COMPILER_VERSION', CppCache.COMPILER_VERSION + '-otra')
+    assert Cache.key('ast', SOURCE) != key
+
+
+def test_ast_signature_invalidates_entries(tmp_path, monkeypatch):
+    cache = Cache(str(tmp_path))
+    parse(cache)
+    assert len(entries(tmp_path)) == 1
+    # Con otra forma de las clases del AST la entrada anterior no sirve
+    monkeypatch.setattr(CppContext, 'AST_SIGNATURE', CppContext.AST_SIGNATURE + '#')
+    parse(cache)
+    assert len(entries(tmp_path)) == 2
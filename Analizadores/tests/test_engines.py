@@ -0,0 +1,377 @@
+'''
+
+Todos los motores de ejecución deben dar la misma salida que el
+Interpreter de referencia, con el optimizador apagado y encendido.
+
+uso: python -m pytest -q Analizadores/tests
+
+'''
+
+import contextlib
+import functools
+import glob
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppCache import Cache
+from CppContext import Context
+
+ENGINES = ['tree', 'adaptive', 'closure', 'vm', 'python']
+
+HERE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Programas de ejemplo que se comparan en todos los motores. Los que
+# tardan más de un par de segundos por motor sólo corren con MCC_SLOW=1
+PROGRAMS = sorted(glob.glob(os.path.join(HERE, 'Pruebas', '*.mcc'))
+                  + glob.glob(os.path.join(HERE, 'Benchmarks', '*.mcc')))
+SLOW = {'recursion.mcc'}
+
+
+def run(source, engine, optimize):
+    '''
+    (líneas impresas, mensajes de error) de ejecutar el programa. Los
+    mensajes cambian entre motores (el de Python no conoce la posición del
+    error), así que se guardan aparte y sólo se compara si hubo alguno.
+    '''
+    ctxt = Context(cache=False, optimize=optimize)
+    errors = []
+
+    def error(position, message):
+        errors.append(message)
+        ctxt.have_errors = True
+    ctxt.error = error
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ctxt.parse(source)
+        assert not ctxt.have_errors, errors
+        ctxt.run(engine)
+    # El Checker imprime los parámetros de cada función que revisa
+    lines = [line for line in out.getvalue().splitlines() if not line.startswith('[Parameter')]
+    return lines, errors
+
+
+def assert_agree(source):
+    expected, errors = run(source, 'tree', optimize=False)
+    for optimize in (False, True):
+        for engine in ENGINES:
+            lines, others = run(source, engine, optimize)
+            assert lines == expected, (engine, optimize)
+            assert bool(others) == bool(errors), (engine, optimize, others)
+    return expected
+
+
+@functools.lru_cache(maxsize=None)
+def reference(path):
+    '''
+    Fuente y resultado del Interpreter sin optimizar para un programa de
+    ejemplo, o None si tiene errores de sintaxis
+    '''
+    with open(path) as file:
+        source = file.read()
+    if not parses(source):
+        return None
+    return source, run(source, 'tree', optimize=False)
+
+
+def parses(source):
+    ctxt = Context(cache=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctxt.parse(source)
+    return not ctxt.have_errors
+
+
+def assert_fails(source):
+    '''
+    El programa debe terminar con un error de ejecución en todos los motores
+    '''
+    assert run(source, 'tree', optimize=False)[1]
+    return assert_agree(source)
+
+
+def test_global_updated_in_function():
+    assert assert_agree('''
+int total = 10;
+int veces = 1;
+void sumar(int n) {
+    total = total + n;
+    veces *= 2;
+}
+sumar(5);
+sumar(15);
+veces++;
+printf(total);
+printf(veces);
+''') == ['30', '5']
+
+
+def test_block_shadows_outer_variable():
+    assert assert_agree('''
+int f(int n) {
+    int x = n;
+    {
+        string x = "a";
+        printf(x);
+    }
+    return x + 1;
+}
+printf(f(1));
+''') == ['"a"', '2']
+
+
+def test_typed_operators_under_shadowing():
+    # El Checker prueba que 'x + 1' y 'x * n' son enteros: los motores que
+    # usan esa prueba deben ver la variable del bloque correcto
+    assert assert_agree('''
+int f(int n) {
+    int x = n;
+    int total = 0;
+    for (int i = 0; i < 3; i++) {
+        {
+            string x = "s";
+            x = x + "t";
+            printf(x);
+        }
+        {
+            float x = 0.5;
+            total += x * 2;
+        }
+        total += x * n;
+    }
+    return total + x + 1;
+}
+printf(f(2));
+''') == ['"s""t"', '"s""t"', '"s""t"', '18.0']
+
+
+def test_identities_need_proven_numbers():
+    # 'x * 1' y 'y + 0' no son 'x' ni 'y' si x es un bool o y vale nil
+    assert assert_agree('''
+int x = true;
+printf(x * 1);
+''') == ['1']
+    assert_fails('''
+int y;
+printf(y + 0);
+''')
+    # Sumar 0 cambia el signo de -0.0
+    assert assert_agree('''
+float z = -0.0;
+printf(z + 0);
+printf(0 + z);
+printf(z * 1);
+''') == ['0.0', '0.0', '-0.0']
+
+
+def test_dead_code_keeps_failing_initializers():
+    assert_fails('''
+int f() {
+    int y;
+    int z = y + 1;
+    return 5;
+}
+printf(f());
+''')
+    assert_fails('''
+int f(int n) {
+    float w;
+    float z = -w;
+    return n;
+}
+printf(f(1));
+''')
+    assert assert_agree('''
+int f(int n) {
+    int z = n * 2 + 1;
+    bool b = n == 3;
+    return n;
+}
+printf(f(1));
+''') == ['1']
+
+
+def test_inlined_bodies_keep_their_scope():
+    # Las locales de la función expandida no pisan las del sitio de llamada
+    assert assert_agree('''
+void show(int v) {
+    int t = v * 2;
+    printf(t);
+}
+int main() {
+    int t = 1;
+    show(5);
+    printf(t);
+}
+main();
+''') == ['10', '1']
+    # Un global que el cuerpo asigna no es el local del mismo nombre del llamador
+    assert assert_agree('''
+int count = 0;
+void bump(int v) {
+    count = v;
+    count += 1;
+}
+int main() {
+    int count = 1;
+    bump(5);
+    printf(count);
+}
+void other() {
+    bump(7);
+}
+main();
+printf(count);
+other();
+printf(count);
+''') == ['1', '6', '8']
+    # Un local del cuerpo que oculta a un parámetro no es el argumento
+    assert assert_agree('''
+void show(int a) {
+    {
+        int a = 3;
+        printf(a);
+    }
+    printf(a);
+}
+int main() {
+    show(5);
+}
+main();
+''') == ['3', '5']
+
+
+def test_invariants_not_hoisted_from_loops_that_do_not_run():
+    # y no está inicializada: 'y * 3' y 'sin(y)' fallarían antes del ciclo
+    assert assert_agree('''
+int y;
+int i = 0;
+float s = 0;
+while (i < 0) {
+    s = s + y * 3 + sin(y);
+    i = i + 1;
+}
+printf("done");
+''') == ['"done"']
+    assert assert_agree('''
+int k = 4;
+int s = 0;
+for (int i = 0; i < 3; i++) {
+    s += k * 3 + k / 2;
+}
+printf(s);
+''') == ['42.0']
+
+
+def test_nested_functions_and_methods():
+    assert assert_agree('''
+int g = 1;
+int outer(int a) {
+    int x = a;
+    int inner(int b) {
+        x += b;
+        g++;
+        int y = x * 2;
+        {
+            string x = "s";
+            printf(x);
+        }
+        return y + x;
+    }
+    int r = inner(3);
+    printf(x);
+    return r + inner(1);
+}
+class Caja {
+    int v = 2;
+    int doble(int k) {
+        this.v = this.v * k;
+        return this.v;
+    }
+}
+printf(outer(10));
+printf(g);
+Caja c = Caja();
+printf(c.doble(3));
+printf(c.doble(2));
+for (int i = 0; i < 3; i++) {
+    int cuadrado = i * i;
+    g += cuadrado;
+}
+printf(g);
+''') == ['"s"', '13', '"s"', '81', '3', '6', '12', '8']
+
+
+def test_class_declared_in_function():
+    # Declarar la clase no debe tocar las locales de la función
+    assert assert_agree('''
+int main() {
+    int n = 5;
+    class Caja {
+        int v = 1;
+        Caja(int a) {
+            this.v = a;
+        }
+        int doble() {
+            return this.v + 3;
+        }
+    }
+    Caja c = Caja(n);
+    printf(n);
+    printf(c.doble());
+}
+main();
+''') == ['5', '8']
+
+
+@pytest.mark.parametrize('optimize', [False, True], ids=['O0', 'O1'])
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('path', PROGRAMS, ids=os.path.basename)
+def test_programs(path, engine, optimize):
+    name = os.path.basename(path)
+    if name in SLOW and not os.environ.get('MCC_SLOW'):
+        pytest.skip('programa lento: MCC_SLOW=1 para correrlo')
+    if reference(path) is None:
+        pytest.skip('el programa tiene errores de sintaxis')
+    source, (expected, errors) = reference(path)
+    lines, others = run(source, engine, optimize)
+    assert lines == expected
+    assert bool(others) == bool(errors), others
+
+
+def test_python_cache_keeps_optimized_code_apart(tmp_path):
+    # Un programa con una llamada que el optimizador expande
+    source = '''
+int doble(int n) { return n * 2; }
+printf(doble(21));
+'''
+    for optimize in (True, False, True):
+        ctxt = Context(cache=False, optimize=optimize)
+        ctxt.engines['python'].cache = Cache(str(tmp_path))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            ctxt.run_python(source)
+        lines = [line for line in out.getvalue().splitlines() if not line.startswith('[Parameter')]
+        assert lines == ['42']
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_untyped_operands_checked_at_run_time(monkeypatch):
+    # input() puede devolver un string donde el programa espera un número
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('abc\n' * 100))
+    assert_fails('int n = input(""); printf(n * 2);')
+    assert_fails('int n = input(""); printf(n < "b");')
+    assert assert_agree('int n = input(""); printf(n + "x");') == ['""abc"x"']
+
+
+def test_vm_stops_runaway_recursion(monkeypatch):
+    # La VM no usa la pila de Python: el límite de marcos la detiene
+    import CppVM
+    monkeypatch.setattr(CppVM, 'MAX_DEPTH', 1000)
+    lines, errors = run('int f(int n) { return 1 + f(n + 1); }\nprintf(f(0));', 'vm', optimize=False)
+    assert errors == ['Interp Error. Maximum recursion depth exceeded']
+    assert run('int f(int n) { if (n == 0) { return 0; } return 1 + f(n - 1); }\nprintf(f(900));',
+               'vm', optimize=False)[0] == ['900']
@@ -0,0 +1,124 @@
+'''
+
+Memorización de funciones puras (CppPurity y MemoFunction): sólo se
+memorizan las funciones sin efectos y la salida es la misma que sin
+memorizar.
+
+uso: python -m pytest -q Analizadores/tests
+
+'''
+
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+
+
+def run(source, memoize):
+    '''
+    (líneas impresas, funciones memorizadas por nombre)
+    '''
+    ctxt = Context(cache=False, memoize=memoize)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ctxt.parse(source)
+        assert not ctxt.have_errors
+        ctxt.run()
+    lines = [line for line in out.getvalue().splitlines() if not line.startswith('[Parameter')]
+    memoized = {func.node.name: func for func in getattr(ctxt.interp, 'memoized', [])}
+    return lines, memoized
+
+
+def assert_memo_agrees(source):
+    expected, _ = run(source, memoize=False)
+    lines, memoized = run(source, memoize=True)
+    assert lines == expected
+    return lines, memoized
+
+
+def test_pure_function_is_memoized():
+    lines, memoized = assert_memo_agrees('''
+int fib(int n) {
+    if (n < 2) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+printf(fib(20));
+printf(fib(20));
+''')
+    assert lines == ['6765', '6765']
+    assert set(memoized) == {'fib'}
+    assert memoized['fib'].misses == 21
+    assert memoized['fib'].hits > 0
+
+
+def test_function_reading_a_global_is_not_memoized():
+    lines, memoized = assert_memo_agrees('''
+int base = 1;
+int mas(int n) {
+    return n + base;
+}
+printf(mas(1));
+base = 5;
+printf(mas(1));
+''')
+    assert lines == ['2', '6']
+    assert not memoized
+
+
+def test_function_with_printf_is_not_memoized():
+    lines, memoized = assert_memo_agrees('''
+int eco(int n) {
+    printf(n);
+    return n;
+}
+eco(1);
+eco(1);
+''')
+    assert lines == ['1', '1']
+    assert not memoized
+
+
+def test_function_assigning_a_global_is_not_memoized():
+    lines, memoized = assert_memo_agrees('''
+int llamadas = 0;
+int contar(int n) {
+    llamadas += 1;
+    return n;
+}
+contar(3);
+contar(3);
+printf(llamadas);
+''')
+    assert lines == ['2']
+    assert not memoized
+
+
+def test_instance_arguments_skip_the_cache():
+    # 'primero' es pura, pero una instancia no es un valor simple: la
+    # llamada no pasa por la caché y ve el objeto como está ahora
+    lines, memoized = assert_memo_agrees('''
+class Caja {
+    int v = 1;
+}
+int leer(int c) {
+    return c.v;
+}
+int primero(int n, int c) {
+    return n;
+}
+Caja c = Caja();
+printf(leer(c));
+c.v = 2;
+printf(leer(c));
+printf(primero(7, c));
+printf(primero(7, c));
+''')
+    assert lines == ['1', '2', '7', '7']
+    assert set(memoized) == {'primero'}
+    assert memoized['primero'].hits == memoized['primero'].misses == 0
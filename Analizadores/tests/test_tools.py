@@ -0,0 +1,144 @@
+'''
+
+Pruebas de humo de las herramientas de medición: traza (CppTrace),
+perfil (CppProfile), contadores (CppCounters), telemetría (CppTelemetry)
+y muestreo (CppSampler).
+
+uso: python -m pytest -q Analizadores/tests
+
+'''
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CppContext import Context
+from CppCounters import CountingInterpreter
+from CppProfile import ProfilingInterpreter
+from CppSampler import Sampler, PROGRAM
+
+# fib(10) hace 177 llamadas; suma se llama una vez por vuelta del for
+SOURCE = '''
+int fib(int n) {
+    if (n < 2) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+int suma(int a, int b) {
+    return a + b;
+}
+int total = 0;
+for (int i = 0; i < 7; i++) {
+    total = suma(total, i);
+}
+printf(total);
+printf(fib(10));
+'''
+
+
+def context(**options):
+    ctxt = Context(cache=False, optimize=False, **options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctxt.parse(SOURCE)
+    assert not ctxt.have_errors
+    return ctxt
+
+
+def execute(ctxt, function):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ctxt.execute(function, ctxt.ast)
+    return [line for line in out.getvalue().splitlines() if not line.startswith('[Parameter')]
+
+
+def test_trace_is_valid_json_with_balanced_events(tmp_path):
+    path = str(tmp_path / 'trace.json')
+    # Un búfer chico para que la traza se escriba en varias partes
+    ctxt = context(trace=path)
+    ctxt.trace.buffer_events = 16
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ctxt.run()
+    ctxt.trace.close()
+    with open(path, encoding='utf-8') as file:
+        events = json.load(file)
+
+    open_ = []
+    calls = {}
+    for event in events:
+        if event['ph'] == 'B':
+            open_.append(event['name'])
+            calls[event['name']] = calls.get(event['name'], 0) + 1
+        elif event['ph'] == 'E':
+            assert open_.pop() == event['name']
+    assert not open_
+    assert calls['fib'] == 177
+    assert calls['suma'] == 7
+    assert calls['execute'] == 1
+
+
+def test_profile_counts_calls():
+    ctxt = context()
+    profiler = ProfilingInterpreter(ctxt)
+    assert execute(ctxt, profiler.interpret) == ['21', '55']
+    stats = {row.name: row for row in profiler.profile.rows()}
+    assert stats['fib'].calls == 177
+    assert stats['suma'].calls == 7
+    assert stats['<programa>'].calls == 1
+    for row in stats.values():
+        assert 0 <= row.exclusive <= row.inclusive + 1e-9
+    assert [row['name'] for row in json.loads(profiler.profile.to_json())] == [row.name for row in profiler.profile.rows()]
+
+
+def test_counts_match_loop_iterations():
+    ctxt = context()
+    counter = CountingInterpreter(ctxt)
+    assert execute(ctxt, counter.interpret) == ['21', '55']
+    lines = counter.lines()
+    # Línea 12: la condición del for se evalúa una vez más que el cuerpo
+    assert lines[12] == 8
+    assert lines[13] == 7
+    assert lines[9] == 7
+    assert lines[4] == 89
+    [(node, taken, not_taken)] = [branch for branch in counter.branches() if branch[0].__class__.__name__ == 'ForStmt']
+    assert (taken, not_taken) == (7, 1)
+    assert '    7:   13:     total = suma(total, i);' in counter.listing(SOURCE).splitlines()
+
+
+def test_telemetry_records_phases():
+    ctxt = context(stats=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctxt.run()
+    ctxt.stats.stop()
+    data = ctxt.stats.as_dict()
+    assert {'parse', 'check', 'execute'} <= set(data['phases'])
+    assert data['nodes'] > 0 and data['tokens'] > 0
+
+
+def test_sampler_collapsed_stacks():
+    source = '''
+int vueltas(int n) {
+    int s = 0;
+    for (int i = 0; i < n; i++) {
+        s += i % 7;
+    }
+    return s;
+}
+printf(vueltas(300000));
+'''
+    ctxt = Context(cache=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctxt.parse(source)
+        sampler = Sampler()
+        ctxt.execute(sampler.run, ctxt.interp.interpret, ctxt.ast)
+    assert sampler.samples > 0
+    assert 0 <= sampler.thread_share < 1
+    for line in sampler.collapsed().splitlines():
+        stack, hits = line.rsplit(' ', 1)
+        assert stack.startswith(PROGRAM) and int(hits) > 0
+    assert sum(sampler.lines.values()) == sampler.samples